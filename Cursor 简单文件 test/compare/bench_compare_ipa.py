@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+IPA对比工具的性能基准
+用法：
+    python3 bench_compare_ipa.py categorize [IPA路径]
+    python3 bench_compare_ipa.py zipread [条目数 ...]
+"""
+
+import os
+import sys
+import time
+import random
+import struct
+import tempfile
+import tracemalloc
+import zipfile
+
+import compare_ipa
+from zip_directory import central_directory
+
+def synthetic_paths(count, seed=0):
+    """生成接近真实Flutter IPA结构的路径列表"""
+    rng = random.Random(seed)
+    frameworks = ['App', 'Flutter', 'SDWebImageWebPCoder', 'sqflite_darwin', 'flutter_boost',
+                  'shared_preferences_foundation', 'path_provider_foundation', 'fluttertoast']
+    packages = ['cupertino_icons', 'fluttertoast', 'flutter_boost', 'lottie', 'image_picker']
+    exts = ['.png', '.json', '.ttf', '.plist', '.strings', '.nib', '.car', '.dat', '.otf', '']
+    app = 'Payload/CamExam.app/'
+    paths = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.5:
+            paths.append(f'{app}Frameworks/App.framework/flutter_assets/packages/'
+                         f'{rng.choice(packages)}/assets/img_{i}{rng.choice(exts)}')
+        elif kind < 0.7:
+            framework = rng.choice(frameworks)
+            paths.append(f'{app}Frameworks/{framework}.framework/res_{i}{rng.choice(exts)}')
+        elif kind < 0.8:
+            paths.append(f'{app}{rng.choice(["en", "zh-Hans", "ja"])}.lproj/file_{i}{rng.choice(exts)}')
+        else:
+            paths.append(f'{app}res/{i}/file_{i}{rng.choice(exts)}')
+    return paths
+
+def bench_categorize(paths, repeat=3):
+    """测量分类引擎的单条目耗时（微秒）"""
+    best = None
+    for _ in range(repeat):
+        # 每轮新建引擎，包含构建规则表和framework缓存的开销
+        categorizer = compare_ipa.FileCategorizer()
+        start = time.perf_counter()
+        for file_path in paths:
+            categorizer.categorize_both(file_path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(paths) * 1e6
+
+def write_synthetic_zip(zip_path, paths):
+    """直接写出只包含空文件（stored）的压缩包，条目数超过65535时写ZIP64 EOCD
+    
+    比逐个 writestr 快得多，用于生成上百万条目的中央目录
+    """
+    central_records = []
+    with open(zip_path, 'wb') as f:
+        for file_path in paths:
+            name = file_path.encode('utf-8')
+            offset = f.tell()
+            f.write(struct.pack('<4s5H3I2H', b'PK\x03\x04', 20, 0x800, 0, 0, 0, 0, 0, 0, len(name), 0) + name)
+            central_records.append(struct.pack('<4s6H3I5H2I', b'PK\x01\x02', 20, 20, 0x800, 0, 0, 0,
+                                               0, 0, 0, len(name), 0, 0, 0, 0, 0, offset) + name)
+        cd_offset = f.tell()
+        for record in central_records:
+            f.write(record)
+        cd_size = f.tell() - cd_offset
+        count = len(central_records)
+        if count > 0xFFFF:
+            eocd64_offset = f.tell()
+            f.write(struct.pack('<4sQ2H2I4Q', b'PK\x06\x06', 44, 45, 45, 0, 0, count, count, cd_size, cd_offset))
+            f.write(struct.pack('<4sIQI', b'PK\x06\x07', 0, eocd64_offset, 1))
+        short_count = min(count, 0xFFFF)
+        f.write(struct.pack('<4s4H2IH', b'PK\x05\x06', 0, 0, short_count, short_count,
+                            min(cd_size, 0xFFFFFFFF), min(cd_offset, 0xFFFFFFFF), 0))
+
+def read_with_zipfile(zip_path):
+    with zipfile.ZipFile(zip_path, 'r') as zip_file:
+        return [(info.filename, info.file_size, info.compress_size, info.CRC, info.compress_type)
+                for info in zip_file.filelist if not info.is_dir()]
+
+def read_with_central_directory(zip_path):
+    with central_directory(zip_path) as entries:
+        return list(entries)
+
+def bench_reader(reader, zip_path, repeat=3):
+    """测量读取中央目录的最短耗时（秒）和内存峰值（字节，单独测量一轮）"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        reader(zip_path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    reader(zip_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+def bench_zipread(counts):
+    """对比 zipfile 与 zip_directory 读取中央目录的耗时和内存"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for count in counts:
+            zip_path = os.path.join(tmp_dir, f'synthetic_{count}.zip')
+            write_synthetic_zip(zip_path, synthetic_paths(count))
+            if read_with_zipfile(zip_path) != read_with_central_directory(zip_path):
+                print(f"⚠️  {count} 个条目: 两种读取方式的结果不一致")
+            zipfile_time, zipfile_peak = bench_reader(read_with_zipfile, zip_path)
+            fast_time, fast_peak = bench_reader(read_with_central_directory, zip_path)
+            print(f"{count} 个条目: zipfile {zipfile_time * 1000:.1f} ms / 峰值 {zipfile_peak / 1e6:.1f} MB，"
+                  f"中央目录读取器 {fast_time * 1000:.1f} ms / 峰值 {fast_peak / 1e6:.1f} MB，"
+                  f"加速 {zipfile_time / fast_time:.1f}x")
+            os.remove(zip_path)
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'categorize'
+    if command == 'categorize':
+        if len(sys.argv) > 2:
+            with zipfile.ZipFile(sys.argv[2], 'r') as zip_file:
+                paths = [info.filename for info in zip_file.filelist if not info.is_dir()]
+        else:
+            paths = synthetic_paths(100000)
+        per_entry = bench_categorize(paths)
+        print(f"分类引擎: {len(paths)} 个条目，每条目 {per_entry:.2f} µs")
+    elif command == 'zipread':
+        counts = [int(count) for count in sys.argv[2:]] or [10000, 100000, 1000000]
+        bench_zipread(counts)
+    else:
+        print(f"未知的基准项: {command}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
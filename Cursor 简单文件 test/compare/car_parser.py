@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Assets.car（编译后的Asset Catalog）解析
+Assets.car 是BOM格式的容器（大端），其中 RENDITIONS 树保存每个渲染资源的CSI数据（小端），
+FACETKEYS 树保存资源名称到渲染键的映射。
+解析时只按偏移读取需要的结构，不复制块数据，buffer 可以是 bytes 或 mmap
+"""
+
+import struct
+
+BOM_MAGIC = b'BOMStore'
+TREE_MAGIC = b'tree'
+
+# CSI头：tag, version, flags, width, height, scaleFactor, pixelFormat, colorModel,
+#        modtime, layout, zero, name[128], tlvLength, bitmapCount, reserved, payloadSize
+CSI_HEADER_FORMAT = '<4sIIIIIIIIHH128sIIII'
+CSI_HEADER_SIZE = struct.calcsize(CSI_HEADER_FORMAT)
+
+# 渲染键中的属性编号（CoreUI的 kCRThemeXXXName）
+ATTRIBUTE_SCALE = 12
+ATTRIBUTE_IDIOM = 15
+ATTRIBUTE_IDENTIFIER = 17
+
+IDIOM_NAMES = {
+    0: 'universal',
+    1: 'iphone',
+    2: 'ipad',
+    3: 'tv',
+    4: 'car',
+    5: 'watch',
+    6: 'marketing',
+}
+
+# 树的最大深度和最多遍历的节点数，防止损坏的文件造成死循环
+MAX_TREE_DEPTH = 64
+MAX_TREE_NODES = 1000000
+
+class CarFormatError(Exception):
+    """BOM/CAR 格式错误"""
+
+def _cstring(raw):
+    return raw.split(b'\0', 1)[0].decode('utf-8', 'replace')
+
+class BOMStore:
+    """BOM容器：按块编号和变量名访问数据块
+
+    块以 (偏移, 长度) 表示，读取时直接在原buffer上 unpack_from，不复制数据
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        if len(buffer) < 32 or buffer[:8] != BOM_MAGIC:
+            raise CarFormatError("不是BOM文件")
+        _, _, index_offset, _, vars_offset, _ = struct.unpack_from('>IIIIII', buffer, 8)
+        self._check_range(index_offset, 4)
+        self.block_count = struct.unpack_from('>I', buffer, index_offset)[0]
+        self._pointers_offset = index_offset + 4
+        self._check_range(self._pointers_offset, self.block_count * 8)
+
+        self.vars = {}
+        self._check_range(vars_offset, 4)
+        var_count = struct.unpack_from('>I', buffer, vars_offset)[0]
+        offset = vars_offset + 4
+        for _ in range(var_count):
+            self._check_range(offset, 5)
+            block_id, name_length = struct.unpack_from('>IB', buffer, offset)
+            self._check_range(offset + 5, name_length)
+            name = buffer[offset + 5:offset + 5 + name_length].decode('ascii', 'replace')
+            self.vars[name] = block_id
+            offset += 5 + name_length
+
+    def _check_range(self, offset, length):
+        if offset < 0 or length < 0 or offset + length > len(self.buffer):
+            raise CarFormatError("数据越界")
+
+    def block(self, block_id):
+        """返回块的 (偏移, 长度)"""
+        if block_id >= self.block_count:
+            raise CarFormatError(f"无效的块编号: {block_id}")
+        address, length = struct.unpack_from('>II', self.buffer, self._pointers_offset + block_id * 8)
+        self._check_range(address, length)
+        return address, length
+
+    def named_block(self, name):
+        """返回变量对应块的 (偏移, 长度)，变量不存在时返回None"""
+        block_id = self.vars.get(name)
+        if block_id is None:
+            return None
+        return self.block(block_id)
+
+    def tree_items(self, name):
+        """按顺序遍历BOM树的叶子节点
+
+        Yields:
+            ((键偏移, 键长度), (值偏移, 值长度))
+        """
+        tree = self.named_block(name)
+        if tree is None:
+            return
+        tree_offset, tree_length = tree
+        if tree_length < 12 or self.buffer[tree_offset:tree_offset + 4] != TREE_MAGIC:
+            raise CarFormatError(f"{name} 不是BOM树")
+        node_id = struct.unpack_from('>I', self.buffer, tree_offset + 8)[0]
+
+        # 沿最左侧的子节点下降到第一个叶子
+        for _ in range(MAX_TREE_DEPTH):
+            node_offset, node_length = self.block(node_id)
+            is_leaf, count = struct.unpack_from('>HH', self.buffer, node_offset)
+            if is_leaf:
+                break
+            if count == 0:
+                return
+            node_id = struct.unpack_from('>I', self.buffer, node_offset + 12)[0]
+        else:
+            raise CarFormatError(f"{name} 树过深")
+
+        # 沿forward链表遍历所有叶子
+        visited = set()
+        while node_id and node_id not in visited and len(visited) < MAX_TREE_NODES:
+            visited.add(node_id)
+            node_offset, node_length = self.block(node_id)
+            _, count, forward = struct.unpack_from('>HHI', self.buffer, node_offset)
+            if 12 + count * 8 > node_length:
+                raise CarFormatError(f"{name} 树节点越界")
+            for index in range(count):
+                value_id, key_id = struct.unpack_from('>II', self.buffer, node_offset + 12 + index * 8)
+                yield self.block(key_id), self.block(value_id)
+            node_id = forward
+
+def _key_format(store):
+    """KEYFORMAT：渲染键中各位置对应的属性编号"""
+    block = store.named_block('KEYFORMAT')
+    if block is None:
+        raise CarFormatError("缺少KEYFORMAT")
+    offset, length = block
+    if length < 12:
+        raise CarFormatError("KEYFORMAT过短")
+    count = struct.unpack_from('<I', store.buffer, offset + 8)[0]
+    if 12 + count * 4 > length:
+        raise CarFormatError("KEYFORMAT越界")
+    return list(struct.unpack_from(f'<{count}I', store.buffer, offset + 12))
+
+def _facet_names(store):
+    """FACETKEYS：资源名称 -> 渲染键中的Identifier"""
+    names = {}
+    buffer = store.buffer
+    for (key_offset, key_length), (value_offset, value_length) in store.tree_items('FACETKEYS'):
+        if value_length < 6:
+            continue
+        name = buffer[key_offset:key_offset + key_length].decode('utf-8', 'replace')
+        attribute_count = struct.unpack_from('<H', buffer, value_offset + 4)[0]
+        attribute_count = min(attribute_count, (value_length - 6) // 4)
+        for index in range(attribute_count):
+            attribute, value = struct.unpack_from('<HH', buffer, value_offset + 6 + index * 4)
+            if attribute == ATTRIBUTE_IDENTIFIER:
+                names.setdefault(value, name)
+                break
+    return names
+
+def pixel_format_name(pixel_format):
+    """像素格式的四字符码（如 ARGB、JPEG、PDF、DATA）"""
+    name = struct.pack('>I', pixel_format).decode('ascii', 'replace').strip()
+    return name or '-'
+
+def parse_car(buffer):
+    """解析Assets.car中的渲染资源
+
+    Args:
+        buffer: 整个文件的内容（bytes 或 mmap）
+
+    Returns:
+        渲染资源列表，每项为
+        (资源名称, CSI文件名, 倍率, 设备, 像素格式, 宽, 高, 大小, 属性键)
+        属性键为去掉Identifier之后的 ((属性, 值), ...)，与名称一起用于在新旧版本之间对应同一个资源
+    """
+    store = BOMStore(buffer)
+    tokens = _key_format(store)
+    facet_names = _facet_names(store)
+
+    renditions = []
+    for (key_offset, key_length), (value_offset, value_length) in store.tree_items('RENDITIONS'):
+        token_count = min(len(tokens), key_length // 2)
+        values = struct.unpack_from(f'<{token_count}H', buffer, key_offset)
+        attributes = dict(zip(tokens, values))
+
+        csi_name = ''
+        width = height = 0
+        scale = attributes.get(ATTRIBUTE_SCALE, 0)
+        pixel_format = '-'
+        if value_length >= CSI_HEADER_SIZE:
+            csi = struct.unpack_from(CSI_HEADER_FORMAT, buffer, value_offset)
+            width, height, scale_factor, pixel_format_code = csi[3], csi[4], csi[5], csi[6]
+            csi_name = _cstring(csi[11])
+            pixel_format = pixel_format_name(pixel_format_code)
+            if scale_factor:
+                scale = scale_factor / 100
+
+        identifier = attributes.get(ATTRIBUTE_IDENTIFIER)
+        name = facet_names.get(identifier) or csi_name or f"#{identifier}"
+        idiom = IDIOM_NAMES.get(attributes.get(ATTRIBUTE_IDIOM, 0), str(attributes.get(ATTRIBUTE_IDIOM)))
+        attribute_key = tuple((attribute, value) for attribute, value in zip(tokens, values)
+                              if attribute != ATTRIBUTE_IDENTIFIER and value)
+        renditions.append((name, csi_name, scale, idiom, pixel_format, width, height, value_length, attribute_key))
+    return renditions
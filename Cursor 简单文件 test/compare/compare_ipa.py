@@ -5,14 +5,54 @@ IPA文件大小对比工具
 比较新旧版本IPA文件的大小差异和资源变化
 """
 
+import io
 import os
+import re
+import csv
+import html
+import sys
 import zipfile
 import json
+import pickle
+import hashlib
+import heapq
+import mmap
+import shutil
+import tempfile
+import time
+import types
+from array import array
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, deque
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from itertools import zip_longest
 
-def get_file_size(filepath):
-    """获取文件大小（字节）"""
+from image_inspector import (MAX_SCREEN_POINTS, PILLOW_AVAILABLE, image_scale, is_oversized, logical_size,
+                             png_recompressed_size, read_image_header)
+from car_parser import parse_car
+from compression_stats import (DEFAULT_DEFLATE_RATIO, INEFFECTIVE_RATIO, file_extension, is_compressible,
+                               is_precompressed, method_name, thinning_removals)
+from directory_walker import (DirectoryArchive, directory_fingerprint, estimated_archive_size, is_directory_input,
+                              walk_directory)
+from flutter_analyzer import flutter_assets_group, snapshot_layout
+from framework_version import plist_version, scan_binary_versions, version_key
+from macho_parser import is_macho_prefix, parse_macho, section_sizes
+from remote_ipa import (BLOCK_CACHE_ENV, RangeFile, evict_block_cache, is_remote_url, remote_central_directory,
+                        remote_fingerprint, remote_info, remote_size)
+from size_budget import (EXIT_ERROR, EXIT_INVALID, EXIT_PASSED, EXIT_VIOLATED, SCOPE_NAMES, BudgetError,
+                         evaluate_budget, load_budget)
+from strings_parser import is_strings_file, lproj_locale, parse_strings_keys
+from zip_directory import ZipDirectoryError, central_directory
+
+def get_file_size(filepath, entries=None):
+    """获取文件大小（字节），支持远程URL；目录输入按条目表估算打包后的大小"""
+    if is_remote_url(filepath):
+        return remote_size(filepath)
+    if entries is not None and is_directory_input(filepath):
+        return estimated_archive_size((entries.paths[row] for row in entries.unique_rows()),
+                                      entries.total_compressed_size)
     return os.path.getsize(filepath)
 
 def format_size(size_bytes):
@@ -44,527 +84,2516 @@ def shorten_framework_name(framework_name):
         if long_name in name:
             name = name.replace(long_name, short_name)
     
-    # 如果名称仍然很长，截断并添加省略号
-    if len(name) > 25:
-        name = name[:22] + '...'
+    # 如果名称仍然很长，截断并添加省略号
+    if len(name) > 25:
+        name = name[:22] + '...'
+    
+    return name + '.framework'
+
+class EntryTable:
+    """列式存储的IPA条目表
+    
+    路径字符串做intern，解压前后大小存放在 array('Q') 列中，CRC32存放在 array('I') 列中，
+    压缩方式（ZipInfo.compress_type）存放在 array('H') 列中，分类以小整数编码存放，通过 categories 查表还原，
+    避免为几万个条目各自创建一个小dict。
+    """
+    
+    def __init__(self):
+        self.paths = []
+        self.sizes = array('Q')
+        self.compressed_sizes = array('Q')
+        self.crcs = array('I')
+        self.methods = array('H')
+        self.agg_codes = array('I')
+        self.detail_codes = array('I')
+        self.categories = []
+        self._category_codes = {}
+        self.index = {}  # 路径 -> 行号（路径重复时以最后一条为准）
+        self.total_size = 0
+        self.total_compressed_size = 0
+    
+    def __len__(self):
+        return len(self.paths)
+    
+    def __getstate__(self):
+        # 跨进程传递时只保留列数据，路径索引和分类编码表在接收端重建
+        state = self.__dict__.copy()
+        del state['index']
+        del state['_category_codes']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.paths = [sys.intern(file_path) for file_path in self.paths]
+        self.index = {file_path: row for row, file_path in enumerate(self.paths)}
+        self._category_codes = {category: code for code, category in enumerate(self.categories)}
+    
+    @classmethod
+    def from_state(cls, state):
+        """从 __getstate__ 导出的列数据重建条目表"""
+        table = cls.__new__(cls)
+        table.__setstate__(state)
+        return table
+    
+    def category_code(self, category):
+        """获取分类对应的编码，不存在时分配新编码"""
+        code = self._category_codes.get(category)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(category)
+            self._category_codes[category] = code
+        return code
+    
+    def append(self, file_path, size, compressed_size, agg_type, detail_type, crc=0, method=zipfile.ZIP_DEFLATED):
+        """追加一个条目"""
+        file_path = sys.intern(file_path)
+        self.index[file_path] = len(self.paths)
+        self.paths.append(file_path)
+        self.sizes.append(size)
+        self.compressed_sizes.append(compressed_size)
+        self.crcs.append(crc)
+        self.methods.append(method)
+        self.agg_codes.append(self.category_code(agg_type))
+        self.detail_codes.append(self.category_code(detail_type))
+        self.total_size += size
+        self.total_compressed_size += compressed_size
+    
+    def unique_rows(self):
+        """返回去重后的行号（同名条目只保留最后一条）"""
+        if len(self.index) == len(self.paths):
+            return range(len(self.paths))
+        return self.index.values()
+    
+    def entry(self, row, aggregate_mode=True):
+        """将一行还原成 {'size', 'type', 'compressed_size', 'crc'}"""
+        codes = self.agg_codes if aggregate_mode else self.detail_codes
+        return {
+            'size': self.sizes[row],
+            'type': self.categories[codes[row]],
+            'compressed_size': self.compressed_sizes[row],
+            'crc': self.crcs[row]
+        }
+    
+    def view(self, aggregate_mode=True):
+        """获取 路径 -> 条目 的只读映射视图"""
+        return EntryView(self, aggregate_mode)
+    
+    def type_totals(self, aggregate_mode=True):
+        """按分类汇总 (压缩后大小, 解压后大小)"""
+        codes = self.agg_codes if aggregate_mode else self.detail_codes
+        compressed_by_code = defaultdict(int)
+        uncompressed_by_code = defaultdict(int)
+        sizes = self.sizes
+        compressed_sizes = self.compressed_sizes
+        for row in self.unique_rows():
+            code = codes[row]
+            compressed_by_code[code] += compressed_sizes[row]
+            uncompressed_by_code[code] += sizes[row]
+        by_type_compressed = defaultdict(int)
+        by_type_uncompressed = defaultdict(int)
+        for code, size in compressed_by_code.items():
+            by_type_compressed[self.categories[code]] = size
+            by_type_uncompressed[self.categories[code]] = uncompressed_by_code[code]
+        return by_type_compressed, by_type_uncompressed
+
+class EntryView(Mapping):
+    """条目表的映射视图，按需生成 {'size', 'type', 'compressed_size'}，供报告生成使用"""
+    
+    def __init__(self, table, aggregate_mode=True):
+        self.table = table
+        self.aggregate_mode = aggregate_mode
+    
+    def __getitem__(self, file_path):
+        return self.table.entry(self.table.index[file_path], self.aggregate_mode)
+    
+    def __iter__(self):
+        return iter(self.table.index)
+    
+    def __len__(self):
+        return len(self.table.index)
+    
+    def __contains__(self, file_path):
+        return file_path in self.table.index
+
+# 嵌套压缩包中条目的虚拟路径分隔符：outer.zip!/inner/path
+NESTED_SEPARATOR = '!/'
+# 作为嵌套压缩包展开的文件扩展名
+NESTED_ARCHIVE_EXTENSIONS = ('.zip',)
+# 展开嵌套压缩包时，同时读入内存的压缩包大小上限
+NESTED_MEMORY_BUDGET = 256 * 1000 * 1000
+
+def open_nested_archive(zip_file, info):
+    """以可seek的方式打开zip中的嵌套压缩包，不解压到磁盘
+    
+    未压缩存储的条目直接在外层流上seek；压缩过的条目需要随机访问，整体读入内存
+    """
+    if info.compress_type == zipfile.ZIP_STORED:
+        return zipfile.ZipFile(zip_file.open(info))
+    return zipfile.ZipFile(io.BytesIO(zip_file.read(info)))
+
+def nested_archive_cost(info):
+    """打开嵌套压缩包需要占用的内存"""
+    return 0 if info.compress_type == zipfile.ZIP_STORED else info.file_size
+
+def iter_archive_entries(zip_file, nested_depth=0, nested_budget=NESTED_MEMORY_BUDGET):
+    """遍历zip中的文件条目，nested_depth大于0时递归展开嵌套的压缩包
+    
+    嵌套条目使用虚拟路径 outer.zip!/inner/path；外层条目在IPA中的压缩后大小
+    按内层条目的压缩后大小比例分摊，保证各条目压缩后大小之和不变
+    
+    Yields:
+        (file_path, 解压后大小, 压缩后大小, CRC32, 压缩方式)
+    """
+    for info in zip_file.filelist:
+        if info.is_dir():
+            continue
+        file_path = info.filename
+        if nested_depth > 0 and file_path.lower().endswith(NESTED_ARCHIVE_EXTENSIONS):
+            nested_entries = expand_nested_archive(zip_file, info, nested_depth, nested_budget)
+            if nested_entries:
+                yield from nested_entries
+                continue
+        # CRC32直接取自中央目录，不需要解压
+        yield file_path, info.file_size, info.compress_size, info.CRC, info.compress_type
+
+def expand_nested_archive(zip_file, info, nested_depth, nested_budget):
+    """展开一个嵌套压缩包，无法展开（超出内存预算、不是zip或为空）时返回None"""
+    cost = nested_archive_cost(info)
+    if cost > nested_budget:
+        print(f"⚠️  嵌套压缩包超出内存预算，未展开: {info.filename} ({format_size(cost)})")
+        return None
+    try:
+        with open_nested_archive(zip_file, info) as nested:
+            entries = list(iter_archive_entries(nested, nested_depth - 1, nested_budget - cost))
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, EOFError) as e:
+        print(f"⚠️  无法展开嵌套压缩包: {info.filename} ({e})")
+        return None
+    
+    inner_compressed = sum(entry[2] for entry in entries)
+    if not entries or inner_compressed == 0:
+        return None
+    # 外层压缩后大小按比例分摊，余数计入最大的条目
+    prefix = info.filename + NESTED_SEPARATOR
+    shares = [entry[2] * info.compress_size // inner_compressed for entry in entries]
+    largest = max(range(len(entries)), key=lambda index: entries[index][2])
+    shares[largest] += info.compress_size - sum(shares)
+    return [(prefix + file_path, size, share, crc, method)
+            for (file_path, size, _, crc, method), share in zip(entries, shares)]
+
+def open_member(zip_file, file_path, nested_archives=None):
+    """打开条目，支持嵌套压缩包中的虚拟路径
+    
+    Args:
+        nested_archives: 可选的 {外层路径: (ZipFile, 内层的nested_archives)}，同一批条目复用已打开的嵌套压缩包
+    
+    Returns:
+        (stream, ZipInfo)
+    """
+    outer_path, sep, inner_path = file_path.partition(NESTED_SEPARATOR)
+    if not sep:
+        info = zip_file.getinfo(file_path)
+        return zip_file.open(info), info
+    nested = nested_archives.get(outer_path) if nested_archives is not None else None
+    if nested is None:
+        nested = (open_nested_archive(zip_file, zip_file.getinfo(outer_path)), {})
+        if nested_archives is not None:
+            nested_archives[outer_path] = nested
+    # 更深层的嵌套在内层压缩包中继续解析
+    return open_member(nested[0], inner_path, nested[1])
+
+class IPAScanError(Exception):
+    """IPA无法解析（不是ZIP、文件被截断、没有任何条目等）"""
+
+def scan_ipa_entries(ipa_path, categorizer=None, nested_depth=0, nested_budget=NESTED_MEMORY_BUDGET):
+    """单次扫描IPA中央目录，生成条目表
+    
+    每个条目同时记录汇总分类和详细分类，汇总视图和详细视图都从这张表派生，
+    避免对同一个IPA多次打开、多次遍历filelist；不展开嵌套压缩包时用 zip_directory 直接解码中央目录，
+    格式不支持时回退到 zipfile
+    
+    Args:
+        nested_depth: 展开嵌套压缩包的最大层数，0表示不展开
+        nested_budget: 展开嵌套压缩包时的内存预算（字节）
+    
+    Returns:
+        (table, total_uncompressed_size, total_compressed_size)
+        table: EntryTable
+    
+    Raises:
+        IPAScanError: 无法解析或没有任何条目；不返回空表，避免报告和门禁把解析失败当作体积减少到0
+    """
+    if categorizer is None:
+        categorizer = get_default_categorizer()
+    
+    try:
+        table = None
+        if is_directory_input(ipa_path):
+            # 未打包的 .app/.xcarchive：遍历目录，压缩后大小为估算值
+            if nested_depth > 0:
+                print(f"⚠️  目录输入不展开嵌套压缩包: {ipa_path}")
+            table = fill_entry_table(walk_directory(ipa_path), categorizer)
+        elif nested_depth <= 0:
+            # 不展开嵌套压缩包时直接解码中央目录，不创建ZipInfo对象
+            open_directory = remote_central_directory if is_remote_url(ipa_path) else central_directory
+            try:
+                with open_directory(ipa_path) as entries:
+                    table = fill_entry_table(entries, categorizer)
+            except ZipDirectoryError:
+                table = None
+        if table is None:
+            with open_ipa_zip(ipa_path) as zip_file:
+                table = fill_entry_table(iter_archive_entries(zip_file, nested_depth, nested_budget), categorizer)
+    except Exception as e:
+        raise IPAScanError(f"解析IPA文件时出错: {ipa_path}: {e}") from e
+    if len(table) == 0:
+        raise IPAScanError(f"IPA中没有任何文件: {ipa_path}")
+    
+    return table, table.total_size, table.total_compressed_size
+
+def open_ipa_zip(ipa_path):
+    """以ZipFile打开本地IPA或远程URL（远程时条目按需通过Range请求读取），目录输入返回 DirectoryArchive"""
+    if is_directory_input(ipa_path):
+        return DirectoryArchive(ipa_path)
+    if is_remote_url(ipa_path):
+        return zipfile.ZipFile(RangeFile(ipa_path), 'r')
+    return zipfile.ZipFile(ipa_path, 'r')
+
+def fill_entry_table(entries, categorizer):
+    """将 (file_path, 解压后大小, 压缩后大小, CRC32, 压缩方式) 条目分类后写入新的条目表"""
+    table = EntryTable()
+    categorize_both = categorizer.categorize_both
+    for file_path, size, compressed_size, crc, method in entries:
+        agg_type, detail_type = categorize_both(file_path)
+        table.append(file_path, size, compressed_size, agg_type, detail_type, crc, method)
+    return table
+
+# 缓存格式版本，EntryTable结构或分类规则变化时需要递增
+ANALYSIS_CACHE_VERSION = 3
+# 内容级分析结果缓存（content/）的文件格式版本，以及它在 --cache-max-mb 中最多占用的比例
+CONTENT_CACHE_FORMAT = 2
+CONTENT_CACHE_SHARE = 0.25
+# EOCD记录(22字节) + 最长65535字节的注释
+EOCD_SEARCH_SIZE = 22 + 0xFFFF
+
+def ipa_fingerprint(ipa_path):
+    """计算IPA指纹：文件大小 + mtime + ZIP尾部目录记录(EOCD)的哈希
+    
+    EOCD中包含中央目录的偏移和大小，内容有任何变化都会反映在这里，
+    只需读取文件末尾，不必对整个IPA做哈希；远程IPA以ETag/Last-Modified代替mtime
+    """
+    if is_remote_url(ipa_path):
+        return remote_fingerprint(ipa_path)
+    if is_directory_input(ipa_path):
+        return directory_fingerprint(ipa_path)
+    stat = os.stat(ipa_path)
+    tail_size = min(stat.st_size, EOCD_SEARCH_SIZE)
+    with open(ipa_path, 'rb') as f:
+        f.seek(stat.st_size - tail_size)
+        tail = f.read(tail_size)
+    
+    eocd_pos = tail.rfind(b'PK\x05\x06')
+    if eocd_pos == -1:
+        record = tail
+    elif eocd_pos >= 20 and tail[eocd_pos - 20:eocd_pos - 16] == b'PK\x06\x07':
+        # ZIP64：连同ZIP64 EOCD定位记录一起哈希
+        record = tail[eocd_pos - 20:]
+    else:
+        record = tail[eocd_pos:]
+    digest = hashlib.sha1(record).hexdigest()
+    return f"{stat.st_size}-{stat.st_mtime_ns}-{digest}"
+
+def code_fingerprint(code):
+    """函数字节码、常量和引用名称的指纹，函数体修改后随之变化
+    
+    嵌套的代码对象（lambda、推导式等）递归展开；frozenset常量按排序后的内容表示，不受字符串哈希随机化影响
+    """
+    parts = [code.co_code.hex(), ','.join(code.co_names)]
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            parts.append(code_fingerprint(const))
+        elif isinstance(const, frozenset):
+            parts.append(repr(sorted(const, key=repr)))
+        else:
+            parts.append(repr(const))
+    return '|'.join(parts)
+
+def categorizer_fingerprint(categorizer):
+    """分类规则的指纹，规则变化时缓存自动失效
+    
+    判断函数按函数体（而不只是名称）计入指纹；分类引擎本身的framework/详细分类逻辑同样计入
+    """
+    parts = [categorizer.default_category]
+    for category, matcher in categorizer.rules:
+        if callable(matcher):
+            code = getattr(matcher, '__code__', None)
+            name = getattr(matcher, '__qualname__', type(matcher).__qualname__)
+            parts.append(f"{category}:{name}:{code_fingerprint(code) if code is not None else ''}")
+        else:
+            parts.append(f"{category}:{','.join(matcher)}")
+    for func in (type(categorizer).categorize_both, type(categorizer)._framework_detail,
+                 type(categorizer)._categorize_plain, shorten_framework_name):
+        parts.append(code_fingerprint(func.__code__))
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+class AnalysisCache:
+    """IPA分析结果的磁盘缓存
+    
+    以IPA指纹为键，用pickle保存EntryTable的列数据（array列直接按二进制序列化）；
+    按最近使用时间(LRU)淘汰，保证缓存目录总大小不超过 max_bytes
+    """
+    
+    def __init__(self, cache_dir, max_bytes=1024 * 1000 * 1000):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+    
+    def _cache_file(self, ipa_path, categorizer, variant=''):
+        key_source = f"{ANALYSIS_CACHE_VERSION}|{ipa_fingerprint(ipa_path)}|{categorizer_fingerprint(categorizer)}"
+        if variant:
+            key_source += f"|{variant}"
+        key = hashlib.sha1(key_source.encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{key}.entries"
+    
+    def get(self, ipa_path, categorizer, variant=''):
+        """读取缓存，未命中或缓存损坏时返回None
+        
+        variant 区分同一个IPA的不同扫描方式（如展开嵌套压缩包）
+        """
+        cache_file = self._cache_file(ipa_path, categorizer, variant)
+        try:
+            with open(cache_file, 'rb') as f:
+                table = EntryTable.from_state(pickle.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️  分析缓存损坏，已忽略: {cache_file} ({e})")
+            self._remove(cache_file)
+            return None
+        
+        # 更新mtime，作为LRU的最近使用时间
+        try:
+            os.utime(cache_file)
+        except OSError:
+            pass
+        return table
+    
+    def put(self, ipa_path, categorizer, table, variant=''):
+        """写入缓存并按LRU淘汰超出容量的旧条目"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_file = self._cache_file(ipa_path, categorizer, variant)
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_file, 'wb') as f:
+                # 只保存列数据（dict/list/array），不依赖脚本的模块名
+                pickle.dump(table.__getstate__(), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            print(f"⚠️  写入分析缓存失败: {e}")
+            self._remove(tmp_file)
+            return
+        self.evict()
+    
+    def evict(self):
+        """删除最久未使用的缓存，直到总大小不超过上限
+        
+        content/ 下内容级分析结果占用的空间同样计入上限（它自己按条目LRU淘汰，见 ContentResultCache）
+        """
+        content_size = 0
+        for results_file in (self.cache_dir / 'content').glob('*.results'):
+            try:
+                content_size += results_file.stat().st_size
+            except OSError:
+                continue
+        
+        cached = []
+        for cache_file in self.cache_dir.glob('*.entries'):
+            try:
+                stat = cache_file.stat()
+            except OSError:
+                continue
+            cached.append((stat.st_mtime, stat.st_size, cache_file))
+        
+        total_size = content_size + sum(size for _, size, _ in cached)
+        cached.sort()
+        for _, size, cache_file in cached:
+            if total_size <= self.max_bytes:
+                break
+            self._remove(cache_file)
+            total_size -= size
+    
+    @staticmethod
+    def _remove(cache_file):
+        try:
+            os.remove(cache_file)
+        except OSError:
+            pass
+
+def load_or_scan_ipa(ipa_path, cache=None, categorizer=None, nested_depth=0, nested_budget=NESTED_MEMORY_BUDGET):
+    """优先从缓存读取IPA条目表，未命中时扫描并写入缓存
+    
+    Returns:
+        (table, total_uncompressed_size, total_compressed_size)
+    """
+    if categorizer is None:
+        categorizer = get_default_categorizer()
+    variant = f"nested={nested_depth},{nested_budget}" if nested_depth > 0 else ''
+    if cache is not None:
+        table = cache.get(ipa_path, categorizer, variant)
+        if table is not None:
+            print(f"命中分析缓存: {Path(ipa_path).name}")
+            return table, table.total_size, table.total_compressed_size
+    
+    table, total_size, total_compressed_size = scan_ipa_entries(ipa_path, categorizer, nested_depth, nested_budget)
+    if cache is not None:
+        cache.put(ipa_path, categorizer, table, variant)
+    return table, total_size, total_compressed_size
+
+def entries_view(entries, aggregate_mode=True):
+    """从条目表派生出 路径 -> {'size', 'type', 'compressed_size'} 视图"""
+    return entries.view(aggregate_mode)
+
+def analyze_ipa_content(ipa_path, aggregate_mode=True):
+    """分析IPA文件内容
+    
+    Args:
+        ipa_path: IPA文件路径
+        aggregate_mode: 是否使用汇总模式。True时将子组件汇总到主framework
+    """
+    entries, total_uncompressed_size, total_compressed_size = scan_ipa_entries(ipa_path)
+    return entries_view(entries, aggregate_mode), total_uncompressed_size, total_compressed_size
+
+def _is_payload_executable(file_path, path_lower):
+    """Payload内没有扩展名的文件视为可执行文件"""
+    return '/payload/' in path_lower and not '.' in Path(file_path).name
+
+# 分类规则表：按优先级排列，前面的规则优先命中
+# 规则可以是扩展名列表（在路径任意位置出现即命中），也可以是判断函数 predicate(file_path, path_lower)
+DEFAULT_CATEGORY_RULES = [
+    ('图片资源', ['.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg', '.ico']),
+    ('视频资源', ['.mp4', '.mov', '.avi', '.m4v', '.3gp']),
+    ('音频资源', ['.mp3', '.wav', '.aac', '.m4a', '.caf']),
+    ('字体资源', ['.ttf', '.otf', '.woff']),
+    ('Interface文件', ['.nib', '.storyboard', '.xib']),
+    ('可执行文件', _is_payload_executable),
+    ('配置文件', ['.plist', '.json', '.xml', '.strings']),
+    ('数据库文件', ['.db', '.sqlite', '.realm']),
+]
+
+DEFAULT_CATEGORY = '其他文件'
+# framework文件的汇总分类为 "Framework - <缩写后的framework名称>"
+FRAMEWORK_CATEGORY_PREFIX = 'Framework - '
+
+class FileCategorizer:
+    """预编译的文件分类引擎
+    
+    每次运行构建一次：扩展名规则编译成 后缀 -> (优先级, 分类) 的字典，
+    只需要在路径中每个'.'的位置查表，而不是对每条规则做线性子串扫描；
+    framework名称及其缩写按framework目录缓存。
+    """
+    
+    def __init__(self, rules=None, default_category=DEFAULT_CATEGORY):
+        self.rules = list(rules if rules is not None else DEFAULT_CATEGORY_RULES)
+        self.default_category = default_category
+        self.suffix_map = {}
+        self.predicate_rules = []
+        for priority, (category, matcher) in enumerate(self.rules):
+            if callable(matcher):
+                self.predicate_rules.append((priority, category, matcher))
+            else:
+                for ext in matcher:
+                    # 同一后缀出现在多条规则中时，以优先级高的为准
+                    self.suffix_map.setdefault(ext.lower(), (priority, category))
+        # 所有后缀都以'.'开头时可以按'.'的位置查表，否则退化为子串扫描
+        self.dot_anchored = all(ext.startswith('.') for ext in self.suffix_map)
+        self.suffix_lengths = sorted({len(ext) for ext in self.suffix_map})
+        self._framework_cache = {}
+    
+    def _framework_short_name(self, framework_dir):
+        """按framework目录缓存缩写后的framework名称"""
+        short_name = self._framework_cache.get(framework_dir)
+        if short_name is None:
+            framework_name = framework_dir.split('/')[-1] + '.framework'
+            short_name = shorten_framework_name(framework_name)
+            self._framework_cache[framework_dir] = short_name
+        return short_name
+    
+    def _match_suffix(self, path_lower):
+        """返回路径中命中的优先级最高的后缀规则 (优先级, 分类)"""
+        best = None
+        suffix_map = self.suffix_map
+        if self.dot_anchored:
+            dot = path_lower.find('.')
+            while dot != -1:
+                for length in self.suffix_lengths:
+                    hit = suffix_map.get(path_lower[dot:dot + length])
+                    if hit is not None and (best is None or hit[0] < best[0]):
+                        best = hit
+                dot = path_lower.find('.', dot + 1)
+        else:
+            for ext, hit in suffix_map.items():
+                if ext in path_lower and (best is None or hit[0] < best[0]):
+                    best = hit
+        return best
+    
+    def _categorize_plain(self, file_path, path_lower):
+        """非framework文件的分类"""
+        best = self._match_suffix(path_lower)
+        for priority, category, predicate in self.predicate_rules:
+            if best is not None and best[0] < priority:
+                break
+            if predicate(file_path, path_lower):
+                return category
+        if best is not None:
+            return best[1]
+        return self.default_category
+    
+    def categorize_both(self, file_path):
+        """一次计算同时返回 (汇总分类, 详细分类)"""
+        path_lower = file_path.lower()
+        
+        # Framework文件 - 提取具体的framework名称和子组件
+        if '.framework/' in path_lower:
+            # 提取framework名称，例如从 "Frameworks/App.framework/App" 提取 "App.framework"
+            framework_dir = file_path.split('.framework/')[0]
+            short_framework_name = self._framework_short_name(framework_dir)
+            agg_type = f'{FRAMEWORK_CATEGORY_PREFIX}{short_framework_name}'
+            return agg_type, self._framework_detail(file_path, short_framework_name, agg_type)
+        elif file_path.endswith('.framework'):
+            short_name = shorten_framework_name(Path(file_path).name)
+            agg_type = f'{FRAMEWORK_CATEGORY_PREFIX}{short_name}'
+            return agg_type, agg_type
+        
+        category = self._categorize_plain(file_path, path_lower)
+        return category, category
+    
+    def _framework_detail(self, file_path, short_framework_name, agg_type):
+        """详细模式：显示framework的子组件分类"""
+        parts = file_path.split('.framework/', 1)
+        if len(parts) < 2:
+            # 后缀大小写不一致（如 .FRAMEWORK/）时无法定位子路径，按普通framework文件处理
+            return agg_type
+        remaining_path = parts[1]
+        
+        # 检查是否包含bundle
+        if '.bundle/' in remaining_path:
+            bundle_match = remaining_path.split('.bundle/')[0]
+            bundle_name = bundle_match.split('/')[-1] + '.bundle'
+            return f'{agg_type} → {bundle_name}'
+        
+        # 检查是否包含其他特殊目录结构
+        if 'flutter_assets/' in remaining_path:
+            # 进一步分析flutter_assets的子目录
+            assets_path = remaining_path.split('flutter_assets/', 1)[1]
+            if assets_path.startswith('packages/'):
+                package_path = assets_path.split('packages/', 1)[1]
+                package_name = package_path.split('/')[0]
+                return f'{agg_type} → flutter_assets → {package_name}'
+            elif assets_path.startswith('shaders/'):
+                return f'{agg_type} → flutter_assets → shaders'
+            elif assets_path.startswith('fonts/'):
+                return f'{agg_type} → flutter_assets → fonts'
+            elif assets_path.startswith('assets/'):
+                return f'{agg_type} → flutter_assets → assets'
+            else:
+                return f'{agg_type} → flutter_assets'
+        
+        # 普通framework文件
+        return agg_type
+    
+    def categorize(self, file_path, aggregate_mode=True):
+        """根据文件路径和扩展名分类文件"""
+        agg_type, detail_type = self.categorize_both(file_path)
+        return agg_type if aggregate_mode else detail_type
+
+_default_categorizer = None
+
+def get_default_categorizer():
+    """获取默认规则的分类引擎（进程内只构建一次）"""
+    global _default_categorizer
+    if _default_categorizer is None:
+        _default_categorizer = FileCategorizer()
+    return _default_categorizer
+
+def categorize_file(file_path, aggregate_mode=True):
+    """根据文件路径和扩展名分类文件
+    
+    Args:
+        file_path: 文件路径
+        aggregate_mode: 是否使用汇总模式。True时将子组件汇总到主framework，False时显示详细分类
+    """
+    return get_default_categorizer().categorize(file_path, aggregate_mode)
+
+# 并行解压时在途（已提交、未完成）任务的解压字节数上限
+EXTRACT_INFLIGHT_BYTES = 512 * 1000 * 1000
+# 单个解压任务的目标字节数和最多文件数
+EXTRACT_BATCH_BYTES = 32 * 1000 * 1000
+EXTRACT_BATCH_FILES = 64
+
+@contextmanager
+def analysis_pool(jobs=1):
+    """jobs大于1时创建进程池，否则返回None表示在当前进程串行执行"""
+    if not jobs or jobs <= 1:
+        yield None
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield executor
+
+def submit_job(executor, func, *args):
+    """提交任务到进程池；没有进程池时直接在当前进程执行，统一返回Future"""
+    if executor is not None:
+        return executor.submit(func, *args)
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def compare_ipa_files(old_ipa_path, new_ipa_path, jobs=1, cache=None, output=None,
+                      max_files_per_type=20, significant_change=1024, analyses=(), content_cache=None,
+                      max_inflight_bytes=EXTRACT_INFLIGHT_BYTES, nested_depth=0, nested_budget=NESTED_MEMORY_BUDGET):
+    """比较两个IPA文件
+    
+    Args:
+        jobs: 并行进程数。大于1时新旧IPA在进程池中并行分析
+        cache: AnalysisCache，命中时直接复用已分析的条目表
+        analyses: 需要执行的内容级分析名称（见 CONTENT_ANALYSES）
+        content_cache: ContentResultCache，按文件内容复用内容级分析结果
+        max_inflight_bytes: 内容级分析并行解压时在途的解压字节数上限
+        nested_depth: 展开嵌套压缩包（如framework中的.zip资源）的最大层数，0表示不展开
+        nested_budget: 展开嵌套压缩包时的内存预算（字节）
+        output: 已打开的文本文件。指定时报告逐行写入该文件并返回行数，否则返回完整报告字符串
+        max_files_per_type: 每个类型最多展示的文件数
+        significant_change: 小于该变化量（字节）的修改不展示
+    """
+    with analysis_pool(jobs) as executor:
+        if executor is not None:
+            print(f"正在并行分析新旧版本IPA文件（{jobs}个进程）...")
+        futures = []
+        for label, ipa_path in (("旧", old_ipa_path), ("新", new_ipa_path)):
+            if executor is None:
+                # 串行时 submit_job 立即执行，提示在各自的扫描之前打印
+                print(f"正在分析{label}版本IPA文件...")
+            futures.append(submit_job(executor, load_or_scan_ipa, ipa_path, cache, None, nested_depth, nested_budget))
+        old_future, new_future = futures
+        
+        # 单次扫描，汇总视图用于生成类型总览，详细视图用于展示具体文件列表
+        old_entries, _, _ = old_future.result()
+        new_entries, _, _ = new_future.result()
+        
+        # 差异模型只计算一次，所有报告共用
+        model = DiffModel(old_ipa_path, new_ipa_path, old_entries, new_entries,
+                          max_files_per_type=max_files_per_type, significant_change=significant_change)
+        
+        # 内容级分析复用同一个进程池，共用一个解压调度器
+        if analyses:
+            if content_cache is None:
+                content_cache = ContentResultCache()
+            scheduler = ExtractionScheduler(executor, max_inflight_bytes=max_inflight_bytes)
+            try:
+                for name in analyses:
+                    print(f"正在进行内容分析: {name}...")
+                    CONTENT_ANALYSES[name](model, scheduler, content_cache)
+            finally:
+                close_archives()
+            content_cache.save()
+    
+    # 生成报告 - 使用详细数据来展示文件列表
+    if output is not None:
+        html_file_path = generate_html_report(model)
+        return write_report_lines(output, iter_report_lines(model, html_file_path))
+    
+    return generate_report(model)
+
+# 文件变化状态
+STATUS_ADDED = "新增"
+STATUS_MODIFIED = "修改"              # 大小发生变化
+STATUS_CONTENT_CHANGED = "内容修改"   # 大小不变但CRC32不同
+STATUS_DELETED = "删除"
+STATUS_MOVED = "移动"                 # 旧路径删除、新路径新增且CRC32和大小都相同
+
+# 排序优先级：新增 -> 修改 -> 删除 -> 内容修改 -> 移动（后两者对体积没有影响，排在最后）
+STATUS_PRIORITY = {
+    STATUS_ADDED: 1,
+    STATUS_MODIFIED: 2,
+    STATUS_DELETED: 3,
+    STATUS_CONTENT_CHANGED: 4,
+    STATUS_MOVED: 5,
+}
+
+# 即使大小变化很小也需要展示的状态
+ALWAYS_SHOWN_STATUSES = (STATUS_ADDED, STATUS_DELETED, STATUS_CONTENT_CHANGED, STATUS_MOVED)
+
+def classify_change(old_info, new_info):
+    """根据中央目录中的大小和CRC32判断文件变化状态
+    
+    Returns:
+        变化状态；文件在新旧版本中完全一致时返回None
+    """
+    if not old_info:
+        return STATUS_ADDED
+    if not new_info:
+        return STATUS_DELETED
+    if old_info['size'] != new_info['size']:
+        return STATUS_MODIFIED
+    if old_info['crc'] != new_info['crc']:
+        return STATUS_CONTENT_CHANGED
+    return None
+
+def detect_moves(old_files, new_files):
+    """识别在不同路径之间移动/重命名的文件
+    
+    以 (CRC32, 大小) 为键，对只存在于旧版本的文件建立哈希索引，
+    再逐个匹配只存在于新版本的文件，整体为线性时间；
+    同名文件（如在不同bundle之间移动）优先配对。
+    空文件的CRC32都相同，不参与配对。
+    同一份内容对应多个新旧路径时按路径顺序配对（只对删除、新增的路径排序），结果与IPA中的条目顺序无关。
+    
+    Returns:
+        {新路径: 旧路径}
+    """
+    deleted_by_name = defaultdict(deque)
+    deleted_by_key = defaultdict(deque)
+    for file_path in sorted(file_path for file_path in old_files if file_path not in new_files):
+        info = old_files[file_path]
+        if info['size'] == 0:
+            continue
+        key = (info['crc'], info['size'])
+        deleted_by_name[key + (file_path.rsplit('/', 1)[-1],)].append(file_path)
+        deleted_by_key[key].append(file_path)
+    
+    if not deleted_by_key:
+        return {}
+    
+    matched = set()
+    
+    def take(candidates):
+        # 同一个旧路径同时存在于两个索引中，已配对的跳过
+        while candidates:
+            old_path = candidates.popleft()
+            if old_path not in matched:
+                matched.add(old_path)
+                return old_path
+        return None
+    
+    added = sorted(file_path for file_path in new_files
+                   if file_path not in old_files
+                   and (new_files[file_path]['crc'], new_files[file_path]['size']) in deleted_by_key)
+    moves = {}
+    # 第一轮只配对同名文件，第二轮再按内容配对剩下的文件
+    for same_name in (True, False):
+        for file_path in added:
+            if file_path in moves:
+                continue
+            info = new_files[file_path]
+            key = (info['crc'], info['size'])
+            if same_name:
+                old_path = take(deleted_by_name.get(key + (file_path.rsplit('/', 1)[-1],)))
+            else:
+                old_path = take(deleted_by_key[key])
+            if old_path is not None:
+                moves[file_path] = old_path
+    return moves
+
+def format_change(change, status):
+    """格式化大小变化量"""
+    if change > 0:
+        return f"+{format_size(change)}"
+    elif change < 0:
+        return f"-{format_size(abs(change))}"
+    elif status == STATUS_CONTENT_CHANGED:
+        return "大小不变"
+    else:
+        return "无变化"
+
+def shorten_display_path(file_path):
+    """截断过长的文件路径用于报告展示，特别处理Framework路径"""
+    display_path = file_path
+    if 'Framework' in display_path and len(display_path) > 40:
+        # 对于Framework路径，只显示framework名称和文件名
+        if '.framework/' in display_path:
+            parts = display_path.split('.framework/')
+            if len(parts) == 2:
+                framework_part = parts[0].split('/')[-1] + '.framework'
+                file_part = parts[1]
+                # 如果文件路径仍然太长，截断文件路径部分
+                if len(file_part) > 25:
+                    file_part = "..." + file_part[-22:]
+                display_path = f"{framework_part}/{file_part}"
+    elif len(display_path) > 50:
+        display_path = "..." + display_path[-47:]
+    return display_path
+
+class _HeapEntry:
+    """TopKSelector堆中的元素：按 (排序键, 序号) 反向比较，堆顶即当前保留元素中最差的一个
+    
+    排序键可以包含字符串（如以路径作为最后的比较项），不需要对键取反
+    """
+    __slots__ = ('rank', 'item')
+    
+    def __init__(self, rank, item):
+        self.rank = rank
+        self.item = item
+    
+    def __lt__(self, other):
+        return other.rank < self.rank
+
+class TopKSelector:
+    """保留排序键最小的前K个元素的有界堆
+    
+    内部是大小为K的最大堆，堆顶为当前保留元素中最差的一个；
+    每次插入 O(log K)，总体 O(N log K)，内存 O(K)，只对最终保留的K个元素排序。
+    排序键相同时保持插入顺序，结果与 sorted(...)[:K] 一致；需要与插入顺序无关时把路径等唯一值放在键的最后。
+    """
+    
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+        self._seq = 0
+    
+    def push(self, key, item):
+        if self.k <= 0:
+            return
+        # 序号保证键相同时先插入的更优，且不比较item
+        rank = (tuple(key), self._seq)
+        self._seq += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, _HeapEntry(rank, item))
+        elif rank < self._heap[0].rank:
+            heapq.heapreplace(self._heap, _HeapEntry(rank, item))
+    
+    def results(self):
+        """按排序键从小到大返回保留的元素"""
+        return [entry.item for entry in sorted(self._heap, key=lambda entry: entry.rank)]
+
+class DiffModel:
+    """一次IPA对比的差异模型
+    
+    在 compare_ipa_files 中只计算一次：各类型的压缩前后大小、增大/减少的类型列表、
+    每个类型需要展示的前K个文件。Markdown、HTML等所有输出格式共用这一份结果。
+    
+    Args:
+        max_files_per_type: 每个类型最多展示的文件数
+        significant_change: 小于该变化量（字节）的修改不展示
+    """
+    
+    def __init__(self, old_ipa_path, new_ipa_path, old_entries, new_entries,
+                 max_files_per_type=20, significant_change=1024):
+        self.max_files_per_type = max_files_per_type
+        self.significant_change = significant_change
+        self.old_ipa_path = old_ipa_path
+        self.new_ipa_path = new_ipa_path
+        # 条目表供内容级分析使用（按路径查CRC32/大小）
+        self.old_entries = old_entries
+        self.new_entries = new_entries
+        # 内容级分析追加的报告表格（ReportSection）
+        self.sections = []
+        
+        # IPA文件本身大小及变化
+        self.old_file_size = get_file_size(old_ipa_path, old_entries)
+        self.new_file_size = get_file_size(new_ipa_path, new_entries)
+        self.file_size_diff = self.new_file_size - self.old_file_size
+        
+        # 解压后内容总大小及变化
+        self.old_total_size = old_entries.total_size
+        self.new_total_size = new_entries.total_size
+        self.size_diff = self.new_total_size - self.old_total_size
+        
+        # 按类型分组统计（使用压缩后大小，更准确反映IPA包的实际贡献）- 使用汇总数据
+        self.old_by_type_compressed, self.old_by_type_uncompressed = old_entries.type_totals(aggregate_mode=True)
+        self.new_by_type_compressed, self.new_by_type_uncompressed = new_entries.type_totals(aggregate_mode=True)
+        
+        self._compute_type_changes()
+        # 使用详细数据来生成文件列表
+        self._compute_files_by_type(old_entries.view(aggregate_mode=False), new_entries.view(aggregate_mode=False))
+    
+    def _compute_type_changes(self):
+        """计算各类型的变化，并分离出增大和减少的类型"""
+        all_types = set(self.old_by_type_compressed.keys()) | set(self.new_by_type_compressed.keys())
+        
+        # (类型, 变化量, 旧大小, 新大小)
+        self.type_changes = []
+        for file_type in all_types:
+            old_size = self.old_by_type_compressed.get(file_type, 0)
+            new_size = self.new_by_type_compressed.get(file_type, 0)
+            type_diff = new_size - old_size
+            if type_diff != 0:
+                self.type_changes.append((file_type, type_diff, old_size, new_size))
+        
+        # 验证总和；与IPA文件实际变化的差异来自ZIP头、元数据等
+        self.total_compressed_diff = sum([x[1] for x in self.type_changes])
+        self.metadata_diff = self.file_size_diff - self.total_compressed_diff
+        
+        # 分离增大和减少的资源，按大小排序（由大到小）
+        self.increased_types = [x for x in self.type_changes if x[1] > 0]
+        self.decreased_types = [x for x in self.type_changes if x[1] < 0]
+        # 变化量相同的类型按名称排列，顺序不受字符串哈希随机化影响
+        self.increased_types.sort(key=lambda x: (-x[1], x[0]))
+        self.decreased_types.sort(key=lambda x: (-abs(x[1]), x[0]))
+    
+    def _compute_files_by_type(self, old_files, new_files):
+        """按类型选出需要展示的文件
+        
+        只有变化足够大（或新增/删除等必须展示的状态）的文件参与排序，
+        每个类型用有界堆按 状态优先级、变化大小、路径 选出前K个，不对全部文件排序；
+        路径作为最后的比较项，排序键相同的文件（如大小不变的内容修改）按路径排列，每次运行结果一致
+        """
+        all_files = set(old_files.keys()) | set(new_files.keys())
+        selectors = {}
+        file_counts_by_type = defaultdict(int)
+        significant_counts_by_type = defaultdict(int)
+        moves = detect_moves(old_files, new_files)
+        moved_sources = set(moves.values())
+        
+        for file_path in all_files:
+            old_info = old_files.get(file_path, {})
+            new_info = new_files.get(file_path, {})
+            file_type = new_info.get('type') or old_info.get('type', '其他文件')
+            file_counts_by_type[file_type] += 1
+            
+            # 已配对为移动的旧路径，在新路径上统一展示
+            if file_path in moved_sources:
+                continue
+            moved_from = moves.get(file_path)
+            if moved_from is not None:
+                old_info = old_files[moved_from]
+                status = STATUS_MOVED
+            else:
+                # 确定状态（大小和CRC32都相同的文件直接跳过）
+                status = classify_change(old_info, new_info)
+                if status is None:
+                    continue
+            status_priority = STATUS_PRIORITY[status]
+            
+            old_size = old_info.get('size', 0)
+            new_size = new_info.get('size', 0)
+            change = new_size - old_size
+            
+            # 过滤掉变化很小的文件（默认小于1KB的变化）
+            if abs(change) < self.significant_change and status not in ALWAYS_SHOWN_STATUSES:
+                continue
+            significant_counts_by_type[file_type] += 1
+            
+            selector = selectors.get(file_type)
+            if selector is None:
+                selector = selectors[file_type] = TopKSelector(self.max_files_per_type)
+            # 按状态排序：新增(1) -> 修改(2) -> 删除(3) -> 内容修改(4) -> 移动(5)，然后按变化大小、路径排序
+            selector.push((status_priority, -abs(change), file_path), {
+                'path': file_path,
+                'old_size': old_size,
+                'new_size': new_size,
+                'change': change,
+                'status': status,
+                'status_priority': status_priority,
+                'moved_from': moved_from
+            })
+        
+        self.top_files_by_type = {file_type: selector.results() for file_type, selector in selectors.items()}
+        self.file_counts_by_type = file_counts_by_type
+        self.significant_counts_by_type = significant_counts_by_type
+    
+    def real_diff(self, file_type):
+        """类型的真实大小变化（解压后）"""
+        return self.new_by_type_uncompressed.get(file_type, 0) - self.old_by_type_uncompressed.get(file_type, 0)
+    
+    def significant_files(self, file_type):
+        """类型中需要展示的文件（已排好序，最多 max_files_per_type 个）"""
+        return self.top_files_by_type.get(file_type, [])
+    
+    def total_files(self, file_type):
+        """类型下的文件总数（包括未变化的文件）"""
+        return self.file_counts_by_type[file_type]
+    
+    def significant_file_count(self, file_type):
+        """类型下变化足够大的文件数（包括因数量限制未展示的文件）"""
+        return self.significant_counts_by_type[file_type]
+
+class ReportSection:
+    """内容级分析生成的报告表格，Markdown和HTML报告按同一份数据渲染
+    
+    rows中每一项为 (单元格列表, 变化量)，变化量用于HTML中的增减配色，可以为None
+    """
+    
+    def __init__(self, title, headers, description=None, note=None):
+        self.title = title
+        self.headers = headers
+        self.description = description
+        self.note = note
+        self.rows = []
+    
+    def add_row(self, cells, change=None):
+        self.rows.append((cells, change))
+
+class ContentResultCache:
+    """按文件内容缓存的单文件分析结果
+    
+    以中央目录中的 (CRC32, 大小) 为键，同一份内容（如基线包里未变的framework）只分析一次；
+    结果为None（如不是Mach-O）同样会被缓存。指定cache_dir时按分析器保存到磁盘。
+    
+    每个条目记录最近一次使用的时间和序列化后的大小；指定max_bytes时，写回磁盘前按最近使用时间(LRU)
+    淘汰所有分析器中最久未用的条目，保证 content/ 的总大小不超过上限
+    """
+    
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = Path(cache_dir) / 'content' if cache_dir else None
+        self.max_bytes = max_bytes
+        self._now = time.time()
+        # {分析器: {(crc, size): [结果, 最近使用时间, 序列化后字节数]}}
+        self._results = {}
+        self._dirty = set()
+    
+    def _cache_file(self, analyzer):
+        return self.cache_dir / f"{analyzer}.results"
+    
+    def _results_for(self, analyzer):
+        results = self._results.get(analyzer)
+        if results is None:
+            results = {}
+            if self.cache_dir is not None:
+                cache_file = self._cache_file(analyzer)
+                try:
+                    with open(cache_file, 'rb') as f:
+                        data = pickle.load(f)
+                    if isinstance(data, dict) and data.get('format') == CONTENT_CACHE_FORMAT:
+                        results = data['entries']
+                    else:
+                        # 旧格式的缓存没有使用时间，无法参与淘汰，下次写回时整体替换
+                        self._dirty.add(analyzer)
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    print(f"⚠️  内容分析缓存损坏，已忽略: {cache_file} ({e})")
+                    results = {}
+                    self._dirty.add(analyzer)
+            self._results[analyzer] = results
+        return results
+    
+    def lookup(self, analyzer, crc, size):
+        """返回 (是否命中, 结果)，命中时刷新条目的最近使用时间"""
+        entry = self._results_for(analyzer).get((crc, size))
+        if entry is None:
+            return False, None
+        if entry[1] != self._now:
+            entry[1] = self._now
+            self._dirty.add(analyzer)
+        return True, entry[0]
+    
+    def put(self, analyzer, crc, size, value):
+        nbytes = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        self._results_for(analyzer)[(crc, size)] = [value, self._now, nbytes]
+        self._dirty.add(analyzer)
+    
+    def evict(self):
+        """按最近使用时间淘汰所有分析器中的旧条目，直到总大小不超过 max_bytes"""
+        if self.cache_dir is None or self.max_bytes is None:
+            return
+        # 没有在本次运行中用到的分析器也要参与淘汰
+        for cache_file in sorted(self.cache_dir.glob('*.results')):
+            self._results_for(cache_file.name[:-len('.results')])
+        
+        entries = []
+        for analyzer, results in self._results.items():
+            for key, (_, last_used, nbytes) in results.items():
+                entries.append((last_used, analyzer, key, nbytes))
+        total_size = sum(entry[3] for entry in entries)
+        if total_size <= self.max_bytes:
+            return
+        entries.sort()
+        for last_used, analyzer, key, nbytes in entries:
+            if total_size <= self.max_bytes:
+                break
+            del self._results[analyzer][key]
+            self._dirty.add(analyzer)
+            total_size -= nbytes
+    
+    def save(self):
+        """淘汰超出容量的旧条目后，将有更新的分析结果写回磁盘"""
+        if self.cache_dir is None or not self._dirty:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            print(f"⚠️  写入内容分析缓存失败: {e}")
+            return
+        self.evict()
+        for analyzer in sorted(self._dirty):
+            cache_file = self._cache_file(analyzer)
+            results = self._results[analyzer]
+            if not results:
+                AnalysisCache._remove(cache_file)
+                continue
+            tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+            try:
+                with open(tmp_file, 'wb') as f:
+                    pickle.dump({'format': CONTENT_CACHE_FORMAT, 'entries': results}, f,
+                                protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_file, cache_file)
+            except OSError as e:
+                print(f"⚠️  写入内容分析缓存失败: {e}")
+                AnalysisCache._remove(tmp_file)
+        self._dirty.clear()
+
+def changed_entry_pairs(model, predicate):
+    """按路径排序，列出新旧IPA中满足predicate且内容有变化的文件
+    
+    CRC32和大小都相同的文件直接跳过，不需要解压分析
+    
+    Yields:
+        (file_path, old_row, new_row)，某一侧不存在时对应的行号为None
+    """
+    old_table = model.old_entries
+    new_table = model.new_entries
+    file_paths = {file_path for file_path in old_table.index if predicate(file_path)}
+    file_paths.update(file_path for file_path in new_table.index if predicate(file_path))
+    
+    for file_path in sorted(file_paths):
+        old_row = old_table.index.get(file_path)
+        new_row = new_table.index.get(file_path)
+        if (old_row is not None and new_row is not None
+                and old_table.crcs[old_row] == new_table.crcs[new_row]
+                and old_table.sizes[old_row] == new_table.sizes[new_row]):
+            continue
+        yield file_path, old_row, new_row
+
+# 当前进程中已打开的IPA：{ipa_path: ((pid, 大小, mtime), ZipFile)}
+_open_archives = {}
+
+def open_archive(ipa_path):
+    """返回当前进程中该IPA的ZipFile句柄
+    
+    同一进程内复用，避免每个任务重新解析中央目录；
+    fork出的子进程不复用父进程的句柄（共享文件偏移），IPA文件变化后重新打开
+    """
+    if is_remote_url(ipa_path):
+        key = (os.getpid(),) + remote_info(ipa_path)
+    elif is_directory_input(ipa_path):
+        key = (os.getpid(), 'dir')
+    else:
+        stat = os.stat(ipa_path)
+        key = (os.getpid(), stat.st_size, stat.st_mtime_ns)
+    cached = _open_archives.get(ipa_path)
+    if cached is not None:
+        if cached[0] == key:
+            return cached[1]
+        cached[1].close()
+    zip_file = open_ipa_zip(ipa_path)
+    _open_archives[ipa_path] = (key, zip_file)
+    return zip_file
+
+def close_archives():
+    """关闭当前进程中缓存的ZipFile句柄"""
+    for _, zip_file in _open_archives.values():
+        zip_file.close()
+    _open_archives.clear()
+
+def extract_batch(ipa_path, tasks):
+    """在当前进程中依次解压并分析一批文件（可在子进程中执行）
+    
+    每个文件以流的方式交给分析器，只解压分析器实际读取的部分
+    
+    Args:
+        tasks: [(file_path, 分析器名称)]，分析器见 STREAM_ANALYZERS
+    
+    Returns:
+        [(file_path, 分析器名称, 结果)]，分析失败时结果为None
+    """
+    zip_file = open_archive(ipa_path)
+    nested_archives = {}
+    results = []
+    for file_path, analyzer in tasks:
+        try:
+            stream, info = open_member(zip_file, file_path, nested_archives)
+            with stream:
+                result = STREAM_ANALYZERS[analyzer](stream, info)
+        except Exception as e:
+            print(f"⚠️  分析文件失败: {file_path} ({analyzer}: {e})")
+            result = None
+        results.append((file_path, analyzer, result))
+    return results
+
+class ExtractionScheduler:
+    """内容级分析共用的并行解压调度器
+    
+    按IPA分组、分批提交解压任务，每个进程持有自己的ZipFile句柄；
+    在途任务的解压字节数不超过 max_inflight_bytes（单个超大文件单独执行），
+    没有进程池时在当前进程串行执行
+    """
+    
+    def __init__(self, executor, max_inflight_bytes=EXTRACT_INFLIGHT_BYTES):
+        self.executor = executor
+        self.max_inflight_bytes = max_inflight_bytes
+    
+    def run(self, requests):
+        """执行一组分析请求
+        
+        Args:
+            requests: [(ipa_path, file_path, 分析器名称, 解压后大小)]，同一IPA内保持给定顺序
+        
+        Returns:
+            {(ipa_path, file_path, 分析器名称): 结果}
+        """
+        results = {}
+        batches = self._make_batches(requests)
+        if self.executor is None:
+            for ipa_path, tasks, _ in batches:
+                self._collect(results, ipa_path, extract_batch(ipa_path, tasks))
+            return results
+        
+        queue = deque(batches)
+        pending = {}  # {future: (ipa_path, 字节数)}
+        inflight_bytes = 0
+        while queue or pending:
+            # 预算内尽量多提交；没有在途任务时，超出预算的单个任务也要提交
+            while queue and (not pending or inflight_bytes + queue[0][2] <= self.max_inflight_bytes):
+                ipa_path, tasks, batch_bytes = queue.popleft()
+                pending[self.executor.submit(extract_batch, ipa_path, tasks)] = (ipa_path, batch_bytes)
+                inflight_bytes += batch_bytes
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                ipa_path, batch_bytes = pending.pop(future)
+                inflight_bytes -= batch_bytes
+                self._collect(results, ipa_path, future.result())
+        return results
+    
+    @staticmethod
+    def _make_batches(requests):
+        """按IPA分批，不同IPA的批次交替排列，使新旧IPA同时推进"""
+        by_archive = {}
+        for ipa_path, file_path, analyzer, size in requests:
+            by_archive.setdefault(ipa_path, []).append((file_path, analyzer, size))
+        
+        archive_batches = []
+        for ipa_path, items in by_archive.items():
+            batches = []
+            tasks = []
+            batch_bytes = 0
+            for file_path, analyzer, size in items:
+                tasks.append((file_path, analyzer))
+                batch_bytes += size
+                if batch_bytes >= EXTRACT_BATCH_BYTES or len(tasks) >= EXTRACT_BATCH_FILES:
+                    batches.append((ipa_path, tasks, batch_bytes))
+                    tasks = []
+                    batch_bytes = 0
+            if tasks:
+                batches.append((ipa_path, tasks, batch_bytes))
+            archive_batches.append(batches)
+        return [batch for group in zip_longest(*archive_batches) for batch in group if batch is not None]
+    
+    @staticmethod
+    def _collect(results, ipa_path, batch_results):
+        for file_path, analyzer, result in batch_results:
+            results[(ipa_path, file_path, analyzer)] = result
+
+def run_content_analyzer(model, scheduler, content_cache, analyzer, pairs):
+    """对文件执行单文件分析，结果按内容缓存
+    
+    缓存未命中的文件交给调度器并行解压分析，同一份内容只分析一次；
+    pairs中某一侧行号为None时该侧不分析
+    
+    Returns:
+        (old_results, new_results)：{行号: 结果}
+    """
+    tables = (model.old_entries, model.new_entries)
+    ipa_paths = (model.old_ipa_path, model.new_ipa_path)
+    results = ({}, {})
+    pending = []  # [(side, file_path, (crc, size))]
+    requested = set()
+    
+    for file_path, old_row, new_row in pairs:
+        for side, row in enumerate((old_row, new_row)):
+            if row is None:
+                continue
+            key = (tables[side].crcs[row], tables[side].sizes[row])
+            if key in requested:
+                continue
+            requested.add(key)
+            hit, value = content_cache.lookup(analyzer, *key)
+            if not hit:
+                pending.append((side, file_path, key))
+    
+    if pending:
+        analyzed = scheduler.run([(ipa_paths[side], file_path, analyzer, key[1])
+                                  for side, file_path, key in pending])
+        for side, file_path, key in pending:
+            content_cache.put(analyzer, *key, analyzed[(ipa_paths[side], file_path, analyzer)])
+    
+    for file_path, old_row, new_row in pairs:
+        for side, row in enumerate((old_row, new_row)):
+            if row is not None:
+                results[side][row] = content_cache.lookup(
+                    analyzer, tables[side].crcs[row], tables[side].sizes[row])[1]
+    return results
+
+# Mach-O 分析器名称，解析结果的结构变化时需要递增版本
+MACHO_ANALYZER = 'macho-1'
+# 汇总表最多展示的段/节数
+MACHO_SUMMARY_ROWS = 30
+# 最多单独展示的二进制数，以及每个二进制展示的段/节数
+MACHO_MAX_BINARIES = 10
+MACHO_BINARY_ROWS = 15
+
+def is_macho_candidate(file_path):
+    """可能是Mach-O的文件：无扩展名的可执行文件或.dylib（签名目录除外）"""
+    if '_CodeSignature/' in file_path or file_path.startswith('Symbols/'):
+        return False
+    file_name = file_path.rsplit('/', 1)[-1]
+    return '.' not in file_name or file_name.endswith('.dylib')
+
+def read_macho_layout(stream, info):
+    """解析Mach-O的段/节布局，只解压文件头和load commands，压缩流中只向前seek
+    
+    Returns:
+        {(架构, 段, 节): 大小}，不是Mach-O时为None
+    """
+    if not is_macho_prefix(stream.read(4)):
+        return None
+    stream.seek(0)
+    return section_sizes(parse_macho(stream, info.file_size))
+
+def format_macho_key(key):
+    arch, segment, section = key
+    return [arch, segment, section or "-"]
+
+def format_size_change(change):
+    return f"+{format_size(change)}" if change > 0 else f"-{format_size(abs(change))}"
+
+def analyze_macho_changes(model, scheduler, content_cache):
+    """按架构/段/节统计变化的Mach-O二进制，结果追加到 model.sections"""
+    pairs = list(changed_entry_pairs(model, is_macho_candidate))
+    if not pairs:
+        return
+    old_layouts, new_layouts = run_content_analyzer(model, scheduler, content_cache, MACHO_ANALYZER, pairs)
+    
+    old_totals = defaultdict(int)
+    new_totals = defaultdict(int)
+    binaries = []
+    for file_path, old_row, new_row in pairs:
+        old_layout = old_layouts.get(old_row) if old_row is not None else None
+        new_layout = new_layouts.get(new_row) if new_row is not None else None
+        if old_layout is None and new_layout is None:
+            continue
+        old_layout = old_layout or {}
+        new_layout = new_layout or {}
+        for key, size in old_layout.items():
+            old_totals[key] += size
+        for key, size in new_layout.items():
+            new_totals[key] += size
+        deltas = {key: new_layout.get(key, 0) - old_layout.get(key, 0)
+                  for key in set(old_layout) | set(new_layout)}
+        binaries.append((file_path, old_layout, new_layout, deltas))
+    if not binaries:
+        return
+    
+    summary = ReportSection(
+        "🧩 Mach-O 段/节变化汇总",
+        ["架构", "段", "节", "旧版本大小", "新版本大小", "变化"],
+        description=f"共 {len(binaries)} 个Mach-O二进制发生变化，按架构/段/节汇总（节大小为解压后大小）")
+    append_macho_rows(summary, old_totals, new_totals, MACHO_SUMMARY_ROWS)
+    model.sections.append(summary)
+    
+    # 按段/节变化量绝对值之和排序，只单独展示变化最大的几个二进制
+    binaries.sort(key=lambda item: (-sum(abs(delta) for delta in item[3].values()), item[0]))
+    for file_path, old_layout, new_layout, deltas in binaries[:MACHO_MAX_BINARIES]:
+        if not any(deltas.values()):
+            continue
+        section = ReportSection(
+            f"🧩 Mach-O: {shorten_display_path(file_path)}",
+            ["架构", "段", "节", "旧版本大小", "新版本大小", "变化"])
+        append_macho_rows(section, old_layout, new_layout, MACHO_BINARY_ROWS)
+        model.sections.append(section)
+    if len(binaries) > MACHO_MAX_BINARIES:
+        note = f"仅单独列出变化最大的 {MACHO_MAX_BINARIES} 个二进制"
+        summary.note = f"{summary.note}；{note}" if summary.note else note
+
+def append_macho_rows(section, old_sizes, new_sizes, limit):
+    """按变化量绝对值选出前limit个段/节，追加到表格"""
+    selector = TopKSelector(limit)
+    changed = 0
+    for key in sorted(set(old_sizes) | set(new_sizes)):
+        old_size = old_sizes.get(key, 0)
+        new_size = new_sizes.get(key, 0)
+        change = new_size - old_size
+        if change == 0:
+            continue
+        changed += 1
+        selector.push((-abs(change),), (key, old_size, new_size, change))
+    for key, old_size, new_size, change in selector.results():
+        section.add_row(format_macho_key(key) + [
+            format_size(old_size) if old_size else "-",
+            format_size(new_size) if new_size else "-",
+            format_size_change(change),
+        ], change)
+    if changed > limit:
+        note = f"共有 {changed} 个段/节发生变化，仅显示变化最大的 {limit} 个"
+        section.note = f"{section.note}；{note}" if section.note else note
+
+# Framework版本分析器名称：Info.plist和二进制扫描的结果分别缓存
+VERSION_PLIST_ANALYZER = 'version-plist-1'
+VERSION_BINARY_ANALYZER = 'version-binary-1'
+
+# 版本状态
+VERSION_ADDED = "新增"
+VERSION_DELETED = "删除"
+VERSION_UPGRADED = "升级"
+VERSION_DOWNGRADED = "降级"
+VERSION_CHANGED = "变化"
+VERSION_UNCHANGED = "未变"
+VERSION_STATUS_PRIORITY = {
+    VERSION_UPGRADED: 1,
+    VERSION_DOWNGRADED: 2,
+    VERSION_CHANGED: 3,
+    VERSION_ADDED: 4,
+    VERSION_DELETED: 5,
+    VERSION_UNCHANGED: 6,
+}
+
+def read_plist_version(stream, info):
+    """读取Info.plist中的版本号"""
+    return plist_version(stream.read())
+
+def read_binary_versions(stream, info):
+    """分块扫描framework二进制中的版本号字符串，返回候选版本号列表"""
+    return scan_binary_versions(stream, info.filename.rsplit('/', 1)[-1])
+
+def find_frameworks(table):
+    """找出条目表中的framework及其Info.plist、二进制所在的行
+    
+    Returns:
+        {framework目录（不含.framework后缀）: (plist行号或None, 二进制行号或None)}
+    """
+    frameworks = {}
+    for file_path, row in table.index.items():
+        framework_dir, sep, rest = file_path.rpartition('.framework/')
+        if not sep or '/' in rest:
+            continue
+        plist_row, binary_row = frameworks.get(framework_dir, (None, None))
+        if rest == 'Info.plist':
+            plist_row = row
+        elif rest == framework_dir.rsplit('/', 1)[-1]:
+            binary_row = row
+        else:
+            continue
+        frameworks[framework_dir] = (plist_row, binary_row)
+    return frameworks
+
+def framework_display_name(framework_dir):
+    """主App下的framework只显示名称，扩展等其他位置的保留相对路径"""
+    parts = framework_dir.split('/')
+    if len(parts) > 2 and parts[0] == 'Payload':
+        parts = parts[2:]
+    if parts[0] == 'Frameworks':
+        parts = parts[1:]
+    return '/'.join(parts) + '.framework'
+
+def compare_versions(old_version, new_version, old_exists, new_exists):
+    """比较新旧版本号，返回版本状态"""
+    if not old_exists:
+        return VERSION_ADDED
+    if not new_exists:
+        return VERSION_DELETED
+    if old_version == new_version:
+        return VERSION_UNCHANGED
+    old_key = version_key(old_version)
+    new_key = version_key(new_version)
+    if old_key is None or new_key is None:
+        return VERSION_CHANGED
+    return VERSION_UPGRADED if new_key > old_key else VERSION_DOWNGRADED
+
+def analyze_framework_versions(model, scheduler, content_cache):
+    """提取新旧IPA中所有framework的版本号，结果追加到 model.sections
+    
+    优先读取Info.plist的CFBundleShortVersionString，没有时扫描二进制中的版本号字符串
+    """
+    old_frameworks = find_frameworks(model.old_entries)
+    new_frameworks = find_frameworks(model.new_entries)
+    framework_dirs = sorted(set(old_frameworks) | set(new_frameworks))
+    if not framework_dirs:
+        return
+    
+    # 第一步：读取Info.plist（内容未变的plist只读取一次）
+    plist_pairs = []
+    for framework_dir in framework_dirs:
+        old_plist = old_frameworks.get(framework_dir, (None, None))[0]
+        new_plist = new_frameworks.get(framework_dir, (None, None))[0]
+        if old_plist is not None or new_plist is not None:
+            plist_pairs.append((f"{framework_dir}.framework/Info.plist", old_plist, new_plist))
+    old_plist_versions, new_plist_versions = run_content_analyzer(
+        model, scheduler, content_cache, VERSION_PLIST_ANALYZER, plist_pairs)
+    
+    # 第二步：plist中没有版本号的一侧扫描二进制
+    plist_versions = (old_plist_versions, new_plist_versions)
+    binary_pairs = []
+    for framework_dir in framework_dirs:
+        rows = []
+        for side, frameworks in enumerate((old_frameworks, new_frameworks)):
+            plist_row, binary_row = frameworks.get(framework_dir, (None, None))
+            if plist_row is not None and plist_versions[side].get(plist_row):
+                binary_row = None
+            rows.append(binary_row)
+        if rows[0] is not None or rows[1] is not None:
+            binary_name = framework_dir.rsplit('/', 1)[-1]
+            binary_pairs.append((f"{framework_dir}.framework/{binary_name}", rows[0], rows[1]))
+    old_binary_versions, new_binary_versions = run_content_analyzer(
+        model, scheduler, content_cache, VERSION_BINARY_ANALYZER, binary_pairs)
+    binary_versions = (old_binary_versions, new_binary_versions)
+    
+    def framework_version(side, frameworks, framework_dir):
+        """返回 (版本号, 展示文本)"""
+        plist_row, binary_row = frameworks[framework_dir]
+        version = plist_versions[side].get(plist_row) if plist_row is not None else None
+        if version:
+            return version, version
+        candidates = binary_versions[side].get(binary_row) if binary_row is not None else None
+        if candidates:
+            return candidates[0], f"{candidates[0]} (二进制)"
+        return None, "未知"
+    
+    rows = []
+    for framework_dir in framework_dirs:
+        old_exists = framework_dir in old_frameworks
+        new_exists = framework_dir in new_frameworks
+        old_version, old_text = framework_version(0, old_frameworks, framework_dir) if old_exists else (None, "-")
+        new_version, new_text = framework_version(1, new_frameworks, framework_dir) if new_exists else (None, "-")
+        status = compare_versions(old_version, new_version, old_exists, new_exists)
+        rows.append((VERSION_STATUS_PRIORITY[status], framework_display_name(framework_dir), old_text, new_text, status))
+    rows.sort(key=lambda row: (row[0], row[1].lower()))
+    
+    changed = sum(1 for row in rows if row[4] != VERSION_UNCHANGED)
+    section = ReportSection(
+        "🏷️ Framework 版本",
+        ["Framework", "旧版本", "新版本", "状态"],
+        description=f"共 {len(rows)} 个framework，其中 {changed} 个新增、删除或版本变化"
+                    f"（版本号来自Info.plist，标注“二进制”的来自二进制中的字符串）")
+    for _, display_name, old_text, new_text, status in rows:
+        section.add_row([display_name, old_text, new_text, status])
+    model.sections.append(section)
+
+# 重复检测：确认哈希的分析器名称（哈希结果不按 (CRC32, 大小) 缓存，正是要在这些键相同的文件中确认）
+DUPLICATE_HASH_ANALYZER = 'sha1'
+# 小于该大小的文件不参与重复检测（空文件、占位文件等）
+DUPLICATE_MIN_SIZE = 1
+# 最多展示的重复组数和位置数
+DUPLICATE_MAX_SETS = 20
+DUPLICATE_MAX_LOCATIONS = 20
+# 每个重复组最多列出的路径数
+DUPLICATE_SAMPLE_PATHS = 3
+
+def hash_stream(stream, info):
+    """流式计算文件内容的SHA-1"""
+    digest = hashlib.sha1()
+    for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def find_duplicate_sets(table, ipa_path, scheduler):
+    """找出IPA中内容完全相同的文件组
+    
+    先按中央目录中的 (大小, CRC32) 分组（不需要解压），
+    只对有碰撞的组流式计算哈希确认，开销与碰撞的文件数成正比
+    
+    Returns:
+        [[行号, ...], ...]，每组按路径排序
+    """
+    groups = defaultdict(list)
+    for row in table.unique_rows():
+        size = table.sizes[row]
+        if size >= DUPLICATE_MIN_SIZE:
+            groups[(size, table.crcs[row])].append(row)
+    candidates = [rows for rows in groups.values() if len(rows) > 1]
+    if not candidates:
+        return []
+    
+    digests = scheduler.run([(ipa_path, table.paths[row], DUPLICATE_HASH_ANALYZER, table.sizes[row])
+                             for rows in candidates for row in rows])
+    duplicate_sets = []
+    for rows in candidates:
+        by_digest = defaultdict(list)
+        for row in rows:
+            digest = digests[(ipa_path, table.paths[row], DUPLICATE_HASH_ANALYZER)]
+            if digest is not None:
+                by_digest[digest].append(row)
+        for same_rows in by_digest.values():
+            if len(same_rows) > 1:
+                duplicate_sets.append(sorted(same_rows, key=lambda row: table.paths[row]))
+    return duplicate_sets
+
+def bundle_location(file_path):
+    """文件所在的framework或扩展，用于按位置汇总"""
+    framework_dir, sep, _ = file_path.rpartition('.framework/')
+    if sep:
+        return framework_display_name(framework_dir)
+    appex_dir, sep, _ = file_path.rpartition('.appex/')
+    if sep:
+        return appex_dir.rsplit('/', 1)[-1] + '.appex'
+    return "主App"
+
+def duplicate_waste(table, duplicate_sets):
+    """统计重复组浪费的体积：每组保留路径排序最靠前的一份，其余都算浪费
+    
+    Returns:
+        (浪费的压缩后大小, 浪费的解压后大小, 多余的文件数)
+    """
+    wasted_compressed = 0
+    wasted_size = 0
+    redundant_files = 0
+    for rows in duplicate_sets:
+        for row in rows[1:]:
+            wasted_compressed += table.compressed_sizes[row]
+            wasted_size += table.sizes[row]
+            redundant_files += 1
+    return wasted_compressed, wasted_size, redundant_files
+
+def analyze_duplicates(model, scheduler, content_cache):
+    """检测新版本IPA中的重复资源，按重复组和所在位置汇总浪费的体积"""
+    old_table = model.old_entries
+    new_table = model.new_entries
+    old_sets = find_duplicate_sets(old_table, model.old_ipa_path, scheduler)
+    new_sets = find_duplicate_sets(new_table, model.new_ipa_path, scheduler)
+    
+    old_wasted, _, _ = duplicate_waste(old_table, old_sets)
+    new_wasted, new_wasted_size, redundant_files = duplicate_waste(new_table, new_sets)
+    change = new_wasted - old_wasted
+    change_text = f"，较旧版本{'增加' if change > 0 else '减少'} {format_size(abs(change))}" if change else ""
+    
+    sets_section = ReportSection(
+        "♻️ 重复资源",
+        ["文件", "单份大小", "份数", "浪费(解压后)", "浪费(IPA)"],
+        description=f"新版本中共 {len(new_sets)} 组内容完全相同的文件，多余 {redundant_files} 个，"
+                    f"浪费IPA体积 {format_size(new_wasted)}（解压后 {format_size(new_wasted_size)}）{change_text}")
+    set_selector = TopKSelector(DUPLICATE_MAX_SETS)
+    location_wasted = defaultdict(lambda: [0, 0, 0])  # 位置 -> [文件数, 解压后, 压缩后]
+    for rows in new_sets:
+        wasted_compressed = sum(new_table.compressed_sizes[row] for row in rows[1:])
+        set_selector.push((-wasted_compressed,), rows)
+        for row in rows[1:]:
+            totals = location_wasted[bundle_location(new_table.paths[row])]
+            totals[0] += 1
+            totals[1] += new_table.sizes[row]
+            totals[2] += new_table.compressed_sizes[row]
+    
+    for rows in set_selector.results():
+        sample = "、".join(shorten_display_path(new_table.paths[row]) for row in rows[:DUPLICATE_SAMPLE_PATHS])
+        if len(rows) > DUPLICATE_SAMPLE_PATHS:
+            sample += f" 等共{len(rows)}个"
+        wasted_compressed = sum(new_table.compressed_sizes[row] for row in rows[1:])
+        sets_section.add_row([
+            sample,
+            format_size(new_table.sizes[rows[0]]),
+            str(len(rows)),
+            format_size(new_table.sizes[rows[0]] * (len(rows) - 1)),
+            format_size(wasted_compressed),
+        ], wasted_compressed)
+    if len(new_sets) > DUPLICATE_MAX_SETS:
+        sets_section.note = f"仅显示浪费最多的 {DUPLICATE_MAX_SETS} 组"
+    model.sections.append(sets_section)
+    
+    if location_wasted:
+        locations_section = ReportSection(
+            "♻️ 重复资源 - 按位置汇总",
+            ["位置", "多余文件数", "浪费(解压后)", "浪费(IPA)"],
+            description="每组重复文件保留路径排序最靠前的一份，其余副本按所在的framework/扩展汇总")
+        locations = sorted(location_wasted.items(), key=lambda item: (-item[1][2], item[0]))
+        for location, (file_count, wasted_size, wasted_compressed) in locations[:DUPLICATE_MAX_LOCATIONS]:
+            locations_section.add_row([location, str(file_count), format_size(wasted_size),
+                                       format_size(wasted_compressed)], wasted_compressed)
+        if len(locations) > DUPLICATE_MAX_LOCATIONS:
+            locations_section.note = f"仅显示浪费最多的 {DUPLICATE_MAX_LOCATIONS} 个位置"
+        model.sections.append(locations_section)
+
+# 图片分析器名称：是否估算重新压缩的结果不同，分开缓存
+IMAGE_ANALYZER = 'image-2-pillow' if PILLOW_AVAILABLE else 'image-1'
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+# 最多展示的超大图片数和可重新压缩的图片数
+IMAGE_MAX_OVERSIZED = 20
+IMAGE_MAX_RECOMPRESS = 20
+# 重新压缩节省小于该值的图片不展示
+IMAGE_MIN_SAVINGS = 1024
+
+def is_image_file(file_path):
+    return file_path.lower().endswith(IMAGE_EXTENSIONS)
+
+def read_image_info(stream, info):
+    """读取图片文件头；安装了Pillow时对PNG估算无损重新压缩后的大小
+    
+    Returns:
+        文件头信息，附加 'recompressed_size'（未估算时为None）；不是支持的图片时返回None
+    """
+    header = read_image_header(stream)
+    if header is None:
+        return None
+    header['recompressed_size'] = None
+    if PILLOW_AVAILABLE and header['format'] == 'PNG' and not header['crushed']:
+        # 估算需要完整的文件内容
+        stream.seek(0)
+        header['recompressed_size'] = png_recompressed_size(stream.read())
+    return header
+
+def format_image_header(header):
+    """尺寸、位深和透明通道，如：1242×2688 8位 透明"""
+    alpha = " 透明" if header['alpha'] else ""
+    return f"{header['width']}×{header['height']} {header['bit_depth']}位{alpha}"
+
+def analyze_images(model, scheduler, content_cache):
+    """检查新版本IPA中的图片：统计格式、标出尺寸过大的图片，并估算无损重新压缩可节省的体积"""
+    table = model.new_entries
+    pairs = [(file_path, None, row) for file_path, row in sorted(table.index.items()) if is_image_file(file_path)]
+    if not pairs:
+        return
+    _, headers = run_content_analyzer(model, scheduler, content_cache, IMAGE_ANALYZER, pairs)
+    
+    format_counts = defaultdict(int)
+    oversized = TopKSelector(IMAGE_MAX_OVERSIZED)
+    oversized_count = 0
+    oversized_bytes = 0
+    recompress = TopKSelector(IMAGE_MAX_RECOMPRESS)
+    recompress_count = 0
+    total_savings = 0
+    for file_path, _, row in pairs:
+        header = headers.get(row)
+        if header is None:
+            continue
+        format_counts[header['format']] += 1
+        size = table.sizes[row]
+        scale = image_scale(file_path)
+        if is_oversized(header, scale):
+            oversized_count += 1
+            oversized_bytes += table.compressed_sizes[row]
+            oversized.push((-size,), (file_path, header, scale, size))
+        recompressed_size = header['recompressed_size']
+        if recompressed_size is not None and size - recompressed_size >= IMAGE_MIN_SAVINGS:
+            savings = size - recompressed_size
+            recompress_count += 1
+            total_savings += savings
+            recompress.push((-savings,), (file_path, header, size, recompressed_size))
+    if not format_counts:
+        return
+    
+    formats = " / ".join(f"{image_format} {count} 个" for image_format, count in sorted(format_counts.items()))
+    oversized_section = ReportSection(
+        "🖼️ 图片资源检查",
+        ["文件", "尺寸", "倍率", "逻辑尺寸(点)", "大小"],
+        description=f"新版本共 {sum(format_counts.values())} 张图片（{formats}），"
+                    f"其中 {oversized_count} 张按倍率换算后仍大于最大的iOS屏幕"
+                    f"（{MAX_SCREEN_POINTS[0]}×{MAX_SCREEN_POINTS[1]}点），占IPA体积 {format_size(oversized_bytes)}")
+    for file_path, header, scale, size in oversized.results():
+        width, height = logical_size(header, scale)
+        oversized_section.add_row([shorten_display_path(file_path), format_image_header(header),
+                                   f"@{scale:g}x", f"{width:g}×{height:g}", format_size(size)])
+    if oversized_count > IMAGE_MAX_OVERSIZED:
+        oversized_section.note = f"共 {oversized_count} 张尺寸过大的图片，仅显示最大的 {IMAGE_MAX_OVERSIZED} 张"
+    model.sections.append(oversized_section)
+    
+    if not PILLOW_AVAILABLE:
+        oversized_section.note = "；".join(filter(None, [oversized_section.note, "未安装Pillow，未估算PNG重新压缩可节省的体积"]))
+        return
+    recompress_section = ReportSection(
+        "🖼️ PNG 无损重新压缩",
+        ["文件", "尺寸", "当前大小", "重新压缩后", "可节省"],
+        description=f"{recompress_count} 张PNG以最高压缩级别无损重新编码后可节省 {format_size(total_savings)}（解压后大小）；"
+                    "16位、带透明色的调色板PNG等无法原样重新编码的图片不参与估算")
+    for file_path, header, size, recompressed_size in recompress.results():
+        savings = size - recompressed_size
+        recompress_section.add_row([shorten_display_path(file_path), format_image_header(header), format_size(size),
+                                    format_size(recompressed_size), f"-{format_size(savings)}"], -savings)
+    if recompress_count > IMAGE_MAX_RECOMPRESS:
+        recompress_section.note = f"仅显示可节省最多的 {IMAGE_MAX_RECOMPRESS} 张"
+    model.sections.append(recompress_section)
+
+# Assets.car 分析器名称
+CAR_ANALYZER = 'car-1'
+# 不超过该大小的Assets.car直接读入内存解析，更大的解压到临时文件后mmap
+CAR_MEMORY_LIMIT = 16 * 1024 * 1024
+# 每个Assets.car最多展示的渲染资源变化数
+CAR_MAX_ROWS = 30
+
+def read_car_renditions(stream, info):
+    """解析Assets.car中的渲染资源列表（见 car_parser.parse_car）"""
+    if info.file_size <= CAR_MEMORY_LIMIT:
+        return parse_car(stream.read())
+    # 大文件解压到临时文件再mmap，解析时按偏移读取，不在内存中保留整个文件
+    with tempfile.TemporaryFile() as tmp_file:
+        shutil.copyfileobj(stream, tmp_file, 1024 * 1024)
+        tmp_file.flush()
+        with mmap.mmap(tmp_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return parse_car(mapped)
+
+def rendition_totals(renditions):
+    """按 (资源名称, CSI文件名, 属性键) 汇总渲染资源大小
+    
+    Returns:
+        {键: [大小, 渲染资源描述]}
+    """
+    totals = {}
+    for name, csi_name, scale, idiom, pixel_format, width, height, size, attribute_key in renditions or ():
+        key = (name, csi_name, attribute_key)
+        total = totals.get(key)
+        if total is None:
+            description = " ".join(filter(None, [
+                csi_name if csi_name != name else "",
+                f"@{scale:g}x" if scale else "",
+                idiom,
+                pixel_format,
+                f"{width}×{height}" if width and height else "",
+            ]))
+            totals[key] = [size, description]
+        else:
+            total[0] += size
+    return totals
+
+def analyze_asset_catalogs(model, scheduler, content_cache):
+    """解析变化的Assets.car，按渲染资源（名称/倍率/设备等）对比大小变化"""
+    pairs = list(changed_entry_pairs(model, lambda file_path: file_path.endswith('.car')))
+    if not pairs:
+        return
+    old_results, new_results = run_content_analyzer(model, scheduler, content_cache, CAR_ANALYZER, pairs)
+    
+    for file_path, old_row, new_row in pairs:
+        old_renditions = old_results.get(old_row) if old_row is not None else None
+        new_renditions = new_results.get(new_row) if new_row is not None else None
+        if old_renditions is None and new_renditions is None:
+            continue
+        old_totals = rendition_totals(old_renditions)
+        new_totals = rendition_totals(new_renditions)
+        
+        selector = TopKSelector(CAR_MAX_ROWS)
+        changed = 0
+        for key in sorted(set(old_totals) | set(new_totals)):
+            old_size, old_description = old_totals.get(key, (0, None))
+            new_size, new_description = new_totals.get(key, (0, None))
+            if key not in old_totals:
+                status = STATUS_ADDED
+            elif key not in new_totals:
+                status = STATUS_DELETED
+            elif old_size != new_size:
+                status = STATUS_MODIFIED
+            else:
+                continue
+            changed += 1
+            selector.push((STATUS_PRIORITY[status], -abs(new_size - old_size)),
+                          (key[0], new_description or old_description, old_size, new_size, status))
+        
+        old_count = len(old_renditions or ())
+        new_count = len(new_renditions or ())
+        section = ReportSection(
+            f"🎨 Assets.car: {shorten_display_path(file_path)}",
+            ["资源", "规格", "旧版本大小", "新版本大小", "状态", "变化"],
+            description=f"渲染资源 {old_count} → {new_count} 个，"
+                        f"合计 {format_size(sum(total[0] for total in old_totals.values()))} → "
+                        f"{format_size(sum(total[0] for total in new_totals.values()))}（未压缩的CSI数据）")
+        for name, description, old_size, new_size, status in selector.results():
+            change = new_size - old_size
+            section.add_row([name, description,
+                             format_size(old_size) if status != STATUS_ADDED else "-",
+                             format_size(new_size) if status != STATUS_DELETED else "-",
+                             status, format_change(change, status)], change)
+        if changed > CAR_MAX_ROWS:
+            section.note = f"共有 {changed} 个渲染资源发生变化，仅显示变化最大的 {CAR_MAX_ROWS} 个"
+        model.sections.append(section)
+
+# Flutter AOT快照分析器名称
+FLUTTER_SNAPSHOT_ANALYZER = 'flutter-snapshot-1'
+# flutter_assets 按包展示的最大行数
+FLUTTER_MAX_ASSET_GROUPS = 30
+
+def is_flutter_app_binary(file_path):
+    return file_path.endswith('App.framework/App')
+
+def read_snapshot_layout(stream, info):
+    """按快照符号拆分App二进制（见 flutter_analyzer.snapshot_layout）"""
+    if not is_macho_prefix(stream.read(4)):
+        return None
+    stream.seek(0)
+    return snapshot_layout(stream, info.file_size)
+
+def flutter_asset_totals(table):
+    """按Dart包汇总flutter_assets：{归属: [文件数, 解压后大小, 压缩后大小]}"""
+    totals = defaultdict(lambda: [0, 0, 0])
+    for row in table.unique_rows():
+        group = flutter_assets_group(table.paths[row])
+        if group is None:
+            continue
+        total = totals[group]
+        total[0] += 1
+        total[1] += table.sizes[row]
+        total[2] += table.compressed_sizes[row]
+    return totals
+
+def analyze_flutter(model, scheduler, content_cache):
+    """拆分Flutter AOT快照的各部分，并按Dart包对比flutter_assets
+    
+    快照只在App二进制的CRC32变化时解析，结果按内容缓存
+    """
+    pairs = list(changed_entry_pairs(model, is_flutter_app_binary))
+    if pairs:
+        old_layouts, new_layouts = run_content_analyzer(
+            model, scheduler, content_cache, FLUTTER_SNAPSHOT_ANALYZER, pairs)
+        for file_path, old_row, new_row in pairs:
+            old_layout = (old_layouts.get(old_row) if old_row is not None else None) or {}
+            new_layout = (new_layouts.get(new_row) if new_row is not None else None) or {}
+            if not old_layout and not new_layout:
+                continue
+            section = ReportSection(
+                f"🐦 Flutter AOT快照: {shorten_display_path(file_path)}",
+                ["部分", "旧版本大小", "新版本大小", "变化"],
+                description="按Dart快照的导出符号拆分App二进制（解压后大小）")
+            for part in dict.fromkeys(list(old_layout) + list(new_layout)):
+                old_size = old_layout.get(part, 0)
+                new_size = new_layout.get(part, 0)
+                change = new_size - old_size
+                section.add_row([part, format_size(old_size) if old_layout else "-",
+                                 format_size(new_size) if new_layout else "-",
+                                 format_change(change, STATUS_MODIFIED)], change)
+            model.sections.append(section)
+    
+    old_totals = flutter_asset_totals(model.old_entries)
+    new_totals = flutter_asset_totals(model.new_entries)
+    if not old_totals and not new_totals:
+        return
+    selector = TopKSelector(FLUTTER_MAX_ASSET_GROUPS)
+    changed = 0
+    for group in sorted(set(old_totals) | set(new_totals)):
+        old_count, old_size, old_compressed = old_totals.get(group, (0, 0, 0))
+        new_count, new_size, new_compressed = new_totals.get(group, (0, 0, 0))
+        if (old_count, old_size) == (new_count, new_size):
+            continue
+        changed += 1
+        selector.push((-abs(new_size - old_size),), (group, old_count, new_count, old_size, new_size))
+    if not changed:
+        return
+    
+    ipa_change = (sum(total[2] for total in new_totals.values())
+                  - sum(total[2] for total in old_totals.values()))
+    section = ReportSection(
+        "🐦 flutter_assets 按Dart包",
+        ["包/目录", "文件数", "旧版本大小", "新版本大小", "变化"],
+        description=f"flutter_assets 在IPA中{'增大' if ipa_change >= 0 else '减少'} {format_size(abs(ipa_change))}，"
+                    f"packages/下的文件按Dart包归类，其余按目录归类（解压后大小）")
+    for group, old_count, new_count, old_size, new_size in selector.results():
+        change = new_size - old_size
+        section.add_row([group, f"{old_count} → {new_count}",
+                         format_size(old_size) if old_count else "-",
+                         format_size(new_size) if new_count else "-",
+                         format_change(change, STATUS_MODIFIED)], change)
+    if changed > FLUTTER_MAX_ASSET_GROUPS:
+        section.note = f"共有 {changed} 个包/目录发生变化，仅显示变化最大的 {FLUTTER_MAX_ASSET_GROUPS} 个"
+    model.sections.append(section)
+
+# 最多展示的压缩方式可优化的文件数
+COMPRESSION_MAX_FILES = 30
+# 小于该大小的文件不检查压缩方式
+COMPRESSION_MIN_FILE_SIZE = 4 * 1024
+
+def compression_ratio_text(compressed_size, size):
+    """压缩后大小占解压后大小的比例，越小压缩效果越好"""
+    return f"{compressed_size / size:.0%}" if size else "-"
+
+def method_summary(method_sizes):
+    """按解压后大小汇总一个分类使用的压缩方式，如 "deflate 92% / stored 8%" """
+    total = sum(method_sizes.values())
+    if not total:
+        return "-"
+    if len(method_sizes) == 1:
+        return method_name(next(iter(method_sizes)))
+    ordered = sorted(method_sizes.items(), key=lambda item: (-item[1], item[0]))
+    return " / ".join(f"{method_name(method)} {size / total:.0%}" for method, size in ordered)
+
+def compression_totals(table):
+    """按汇总分类统计 [解压后大小, 压缩后大小, {压缩方式: 解压后大小}]"""
+    totals = defaultdict(lambda: [0, 0, defaultdict(int)])
+    for row in table.unique_rows():
+        total = totals[table.categories[table.agg_codes[row]]]
+        total[0] += table.sizes[row]
+        total[1] += table.compressed_sizes[row]
+        total[2][table.methods[row]] += table.sizes[row]
+    return totals
+
+def deflate_ratios(table):
+    """IPA中各扩展名deflate压缩后的平均压缩率，用于估算未压缩文件改用deflate后的大小"""
+    sizes = defaultdict(lambda: [0, 0])
+    for row in table.unique_rows():
+        if table.methods[row] != zipfile.ZIP_DEFLATED or table.sizes[row] < COMPRESSION_MIN_FILE_SIZE:
+            continue
+        total = sizes[file_extension(table.paths[row])]
+        total[0] += table.sizes[row]
+        total[1] += table.compressed_sizes[row]
+    return {extension: compressed / size for extension, (size, compressed) in sizes.items() if size}
+
+def find_compression_issues(table):
+    """查找压缩方式不合适的条目
+    
+    已压缩格式（PNG/JPEG/视频等）使用deflate但几乎没有收益；可压缩的文件以stored方式存储
     
-    return name + '.framework'
+    Returns:
+        [(行号, 问题, 预计节省的IPA大小)]
+    """
+    ratios = deflate_ratios(table)
+    issues = []
+    for row in table.unique_rows():
+        size = table.sizes[row]
+        if size < COMPRESSION_MIN_FILE_SIZE:
+            continue
+        file_path = table.paths[row]
+        compressed_size = table.compressed_sizes[row]
+        method = table.methods[row]
+        if method != zipfile.ZIP_STORED and is_precompressed(file_path) and compressed_size >= size * INEFFECTIVE_RATIO:
+            issues.append((row, "已压缩格式仍使用deflate，几乎没有收益", max(0, compressed_size - size)))
+        elif method == zipfile.ZIP_STORED and is_compressible(file_path):
+            ratio = ratios.get(file_extension(file_path), DEFAULT_DEFLATE_RATIO)
+            saving = size - int(size * ratio)
+            if saving > 0:
+                issues.append((row, f"可压缩文件未压缩存储（按压缩率{ratio:.0%}估算）", saving))
+    return issues
 
-def analyze_ipa_content(ipa_path, aggregate_mode=True):
-    """分析IPA文件内容
+def thinning_estimate(table, car_results):
+    """App Thinning 估算：只计Assets.car中被移除的渲染资源（见 compression_stats.thinning_removals）
     
-    Args:
-        ipa_path: IPA文件路径
-        aggregate_mode: 是否使用汇总模式。True时将子组件汇总到主framework
-    """
-    file_info = {}
-    total_uncompressed_size = 0
-    total_compressed_size = 0
+    移除的大小按所在Assets.car在IPA中的压缩率折算为压缩后大小
     
-    try:
-        with zipfile.ZipFile(ipa_path, 'r') as zip_file:
-            for file_info_obj in zip_file.filelist:
-                if not file_info_obj.is_dir():
-                    file_path = file_info_obj.filename
-                    file_size = file_info_obj.file_size
-                    compressed_size = file_info_obj.compress_size
-                    
-                    # 分类文件类型
-                    file_type = categorize_file(file_path, aggregate_mode)
-                    
-                    file_info[file_path] = {
-                        'size': file_size,
-                        'type': file_type,
-                        'compressed_size': compressed_size
-                    }
-                    total_uncompressed_size += file_size
-                    total_compressed_size += compressed_size
-    except Exception as e:
-        print(f"解析IPA文件时出错: {e}")
-        return {}, 0, 0
+    Args:
+        car_results: {行号: 渲染资源列表}
     
-    return file_info, total_uncompressed_size, total_compressed_size
+    Returns:
+        (移除的渲染资源数, 移除的解压后大小, 移除的压缩后大小)
+    """
+    removed_count = removed_size = removed_compressed = 0
+    for row, renditions in car_results.items():
+        count, size = thinning_removals(renditions)
+        removed_count += count
+        removed_size += size
+        if table.sizes[row]:
+            removed_compressed += size * table.compressed_sizes[row] // table.sizes[row]
+    return removed_count, removed_size, removed_compressed
 
-def categorize_file(file_path, aggregate_mode=True):
-    """根据文件路径和扩展名分类文件
+def analyze_compression(model, scheduler, content_cache):
+    """按分类和文件统计压缩率、压缩方式，并估算瘦身和调整压缩方式后的下载/安装大小
     
-    Args:
-        file_path: 文件路径
-        aggregate_mode: 是否使用汇总模式。True时将子组件汇总到主framework，False时显示详细分类
+    压缩率只使用中央目录中的数据；瘦身估算需要解析新旧版本中所有的Assets.car（与assets分析共用结果缓存）
     """
-    path_lower = file_path.lower()
-    
-    # Framework文件 - 提取具体的framework名称和子组件
-    if '.framework/' in path_lower:
-        # 提取framework名称，例如从 "Frameworks/App.framework/App" 提取 "App.framework"
-        framework_match = file_path.split('.framework/')[0]
-        framework_name = framework_match.split('/')[-1] + '.framework'
-        short_framework_name = shorten_framework_name(framework_name)
-        
-        if aggregate_mode:
-            # 汇总模式：所有framework内的文件都归类到主framework
-            return f'Framework - {short_framework_name}'
-        else:
-            # 详细模式：显示子组件分类
-            remaining_path = file_path.split('.framework/', 1)[1]
-            
-            # 检查是否包含bundle
-            if '.bundle/' in remaining_path:
-                bundle_match = remaining_path.split('.bundle/')[0]
-                bundle_name = bundle_match.split('/')[-1] + '.bundle'
-                return f'Framework - {short_framework_name} → {bundle_name}'
-            
-            # 检查是否包含其他特殊目录结构
-            if 'flutter_assets/' in remaining_path:
-                # 进一步分析flutter_assets的子目录
-                assets_path = remaining_path.split('flutter_assets/', 1)[1]
-                if assets_path.startswith('packages/'):
-                    package_path = assets_path.split('packages/', 1)[1]
-                    package_name = package_path.split('/')[0]
-                    return f'Framework - {short_framework_name} → flutter_assets → {package_name}'
-                elif assets_path.startswith('shaders/'):
-                    return f'Framework - {short_framework_name} → flutter_assets → shaders'
-                elif assets_path.startswith('fonts/'):
-                    return f'Framework - {short_framework_name} → flutter_assets → fonts'
-                elif assets_path.startswith('assets/'):
-                    return f'Framework - {short_framework_name} → flutter_assets → assets'
-                else:
-                    return f'Framework - {short_framework_name} → flutter_assets'
-            
-            # 普通framework文件
-            return f'Framework - {short_framework_name}'
-    elif file_path.endswith('.framework'):
-        framework_name = Path(file_path).name
-        short_name = shorten_framework_name(framework_name)
-        return f'Framework - {short_name}'
-    
-    # 图片文件
-    if any(ext in path_lower for ext in ['.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg', '.ico']):
-        return '图片资源'
-    
-    # 视频文件
-    if any(ext in path_lower for ext in ['.mp4', '.mov', '.avi', '.m4v', '.3gp']):
-        return '视频资源'
-    
-    # 音频文件
-    if any(ext in path_lower for ext in ['.mp3', '.wav', '.aac', '.m4a', '.caf']):
-        return '音频资源'
-    
-    # 字体文件
-    if any(ext in path_lower for ext in ['.ttf', '.otf', '.woff']):
-        return '字体资源'
-    
-    # NIB/Storyboard文件
-    if any(ext in path_lower for ext in ['.nib', '.storyboard', '.xib']):
-        return 'Interface文件'
-    
-    # 可执行文件
-    if '/payload/' in path_lower and not '.' in Path(file_path).name:
-        return '可执行文件'
-    
-    # 配置文件
-    if any(ext in path_lower for ext in ['.plist', '.json', '.xml', '.strings']):
-        return '配置文件'
-    
-    # 数据库文件
-    if any(ext in path_lower for ext in ['.db', '.sqlite', '.realm']):
-        return '数据库文件'
-    
-    # 其他文件
-    return '其他文件'
-
-def compare_ipa_files(old_ipa_path, new_ipa_path):
-    """比较两个IPA文件"""
-    print("正在分析旧版本IPA文件...")
-    # 汇总模式分析：用于生成类型总览
-    old_files_agg, old_total_size, old_compressed_total = analyze_ipa_content(old_ipa_path, aggregate_mode=True)
-    # 详细模式分析：用于展示具体文件列表
-    old_files_detail, _, _ = analyze_ipa_content(old_ipa_path, aggregate_mode=False)
-    old_file_size = get_file_size(old_ipa_path)  # IPA文件本身大小
-    
-    print("正在分析新版本IPA文件...")
-    # 汇总模式分析：用于生成类型总览
-    new_files_agg, new_total_size, new_compressed_total = analyze_ipa_content(new_ipa_path, aggregate_mode=True)
-    # 详细模式分析：用于展示具体文件列表
-    new_files_detail, _, _ = analyze_ipa_content(new_ipa_path, aggregate_mode=False)
-    new_file_size = get_file_size(new_ipa_path)  # IPA文件本身大小
-    
-    # 计算总体积变化（解压后内容）
-    size_diff = new_total_size - old_total_size
-    # 计算IPA文件本身大小变化
-    file_size_diff = new_file_size - old_file_size
-    
-    # 按类型分组统计（使用压缩后大小，更准确反映IPA包的实际贡献）- 使用汇总数据
-    old_by_type_compressed = defaultdict(int)
-    new_by_type_compressed = defaultdict(int)
-    old_by_type_uncompressed = defaultdict(int)
-    new_by_type_uncompressed = defaultdict(int)
-    
-    for file_path, info in old_files_agg.items():
-        old_by_type_compressed[info['type']] += info['compressed_size']
-        old_by_type_uncompressed[info['type']] += info['size']
-    
-    for file_path, info in new_files_agg.items():
-        new_by_type_compressed[info['type']] += info['compressed_size']
-        new_by_type_uncompressed[info['type']] += info['size']
+    old_table = model.old_entries
+    new_table = model.new_entries
+    old_totals = compression_totals(old_table)
+    new_totals = compression_totals(new_table)
+    
+    categories_section = ReportSection(
+        "🗜️ 压缩效率 - 按分类",
+        ["分类", "压缩方式", "旧版本压缩率", "新版本压缩率", "新版本解压后", "新版本IPA", "IPA变化"],
+        description="压缩率 = IPA中压缩后大小 / 解压后大小，越小压缩效果越好；压缩方式按解压后大小占比汇总")
+    empty = (0, 0, {})
+    for category in sorted(set(old_totals) | set(new_totals),
+                           key=lambda category: (-new_totals.get(category, empty)[1], category)):
+        old_size, old_compressed, _ = old_totals.get(category, empty)
+        new_size, new_compressed, new_methods = new_totals.get(category, empty)
+        change = new_compressed - old_compressed
+        categories_section.add_row([
+            category,
+            method_summary(new_methods),
+            compression_ratio_text(old_compressed, old_size),
+            compression_ratio_text(new_compressed, new_size),
+            format_size(new_size),
+            format_size(new_compressed),
+            format_change(change, STATUS_MODIFIED),
+        ], change)
+    model.sections.append(categories_section)
+    
+    issues = find_compression_issues(new_table)
+    issues_saving = sum(saving for _, _, saving in issues)
+    if issues:
+        issues_section = ReportSection(
+            "🗜️ 压缩方式可优化的文件",
+            ["文件", "解压后大小", "IPA大小", "压缩方式", "压缩率", "问题", "预计节省(IPA)"],
+            description=f"新版本中共 {len(issues)} 个文件的压缩方式不合适，预计可节省IPA体积 {format_size(issues_saving)}")
+        selector = TopKSelector(COMPRESSION_MAX_FILES)
+        for row, issue, saving in issues:
+            selector.push((-saving, -new_table.sizes[row]), (row, issue, saving))
+        for row, issue, saving in selector.results():
+            issues_section.add_row([
+                shorten_display_path(new_table.paths[row]),
+                format_size(new_table.sizes[row]),
+                format_size(new_table.compressed_sizes[row]),
+                method_name(new_table.methods[row]),
+                compression_ratio_text(new_table.compressed_sizes[row], new_table.sizes[row]),
+                issue,
+                format_size(saving) if saving else "-",
+            ], -saving)
+        if len(issues) > COMPRESSION_MAX_FILES:
+            issues_section.note = f"仅显示预计节省最多的 {COMPRESSION_MAX_FILES} 个文件"
+        model.sections.append(issues_section)
+    
+    car_paths = sorted({file_path for table in (old_table, new_table) for file_path in table.index
+                        if file_path.endswith('.car')})
+    car_pairs = [(file_path, old_table.index.get(file_path), new_table.index.get(file_path))
+                 for file_path in car_paths]
+    old_cars, new_cars = ({}, {})
+    if car_pairs:
+        old_cars, new_cars = run_content_analyzer(model, scheduler, content_cache, CAR_ANALYZER, car_pairs)
+    old_thinning = thinning_estimate(old_table, old_cars)
+    new_thinning = thinning_estimate(new_table, new_cars)
+    old_issues_saving = sum(saving for _, _, saving in find_compression_issues(old_table))
+    estimate_section = ReportSection(
+        "📦 App Store 瘦身估算（iPhone @3x 设备）",
+        ["项目", "旧版本", "新版本", "变化"],
+        description="App Thinning 只对Asset Catalog（Assets.car）中的渲染资源按设备和倍率筛选；"
+                    "下载大小按压缩后大小、安装大小按解压后大小估算",
+        note="bundle中单独存放的 @2x/@3x、~ipad 图片会下发到所有设备，不会被移除；"
+             "Mach-O的多架构切片未计入")
+    rows = [
+        ("IPA条目压缩后大小", old_table.total_compressed_size, new_table.total_compressed_size),
+        (f"瘦身移除的Assets.car渲染资源（旧版本 {old_thinning[0]} 个 / 新版本 {new_thinning[0]} 个，"
+         f"按所在Assets.car的压缩率折算）",
+         old_thinning[2], new_thinning[2]),
+        ("预计下载大小", old_table.total_compressed_size - old_thinning[2],
+         new_table.total_compressed_size - new_thinning[2]),
+        ("调整压缩方式后的预计下载大小", old_table.total_compressed_size - old_thinning[2] - old_issues_saving,
+         new_table.total_compressed_size - new_thinning[2] - issues_saving),
+        ("预计安装大小（解压后）", old_table.total_size - old_thinning[1], new_table.total_size - new_thinning[1]),
+    ]
+    for label, old_size, new_size in rows:
+        change = new_size - old_size
+        estimate_section.add_row([label, format_size(old_size), format_size(new_size),
+                                  format_change(change, STATUS_MODIFIED)], change)
+    model.sections.append(estimate_section)
+
+# 本地化文件键解析器名称
+STRINGS_ANALYZER = 'strings-keys-1'
+# 最多展示的键变化文件数，以及每个文件展示的示例键数
+LOCALIZATION_MAX_FILES = 30
+LOCALIZATION_SAMPLE_KEYS = 5
+
+def read_strings_keys(stream, info):
+    """提取 .strings/.stringsdict 中的键（见 strings_parser.parse_strings_keys）"""
+    return parse_strings_keys(stream.read())
+
+def locale_totals(table):
+    """按 .lproj 语言汇总：{语言: [文件数, 解压后大小, 压缩后大小]}"""
+    totals = defaultdict(lambda: [0, 0, 0])
+    for row in table.unique_rows():
+        locale = lproj_locale(table.paths[row])
+        if locale is None:
+            continue
+        total = totals[locale]
+        total[0] += 1
+        total[1] += table.sizes[row]
+        total[2] += table.compressed_sizes[row]
+    return totals
+
+def sample_keys(keys):
+    """展示前几个键，其余以数量表示"""
+    if not keys:
+        return "-"
+    text = "、".join(keys[:LOCALIZATION_SAMPLE_KEYS])
+    if len(keys) > LOCALIZATION_SAMPLE_KEYS:
+        text += f" 等{len(keys)}个"
+    return text
+
+def analyze_localization(model, scheduler, content_cache):
+    """按 .lproj 语言对比本地化资源的大小和 .strings/.stringsdict 的键
     
-    # 生成报告 - 使用详细数据来展示文件列表
-    report = generate_report(old_ipa_path, new_ipa_path, old_file_size, new_file_size, file_size_diff,
-                           old_total_size, new_total_size, size_diff, old_files_detail, new_files_detail, 
-                           old_by_type_compressed, new_by_type_compressed, old_by_type_uncompressed, new_by_type_uncompressed)
+    只解析CRC32或大小变化的本地化文件，键数变化由变化的文件累计得到
+    """
+    old_totals = locale_totals(model.old_entries)
+    new_totals = locale_totals(model.new_entries)
+    if not old_totals and not new_totals:
+        return
     
-    return report
+    pairs = list(changed_entry_pairs(model, is_strings_file))
+    old_keys, new_keys = run_content_analyzer(model, scheduler, content_cache, STRINGS_ANALYZER, pairs)
+    # 语言 -> [新增键数, 删除键数]
+    key_changes = defaultdict(lambda: [0, 0])
+    file_changes = []
+    unparsed_count = 0
+    for file_path, old_row, new_row in pairs:
+        # 某一侧没有该文件时键集合为空；解析失败时结果为None，无法判断键的变化，不计入键数
+        old_result = old_keys.get(old_row) if old_row is not None else ()
+        new_result = new_keys.get(new_row) if new_row is not None else ()
+        if old_result is None or new_result is None:
+            unparsed_count += 1
+            file_changes.append((file_path, lproj_locale(file_path), None, None,
+                                 None if old_result is None else len(set(old_result)),
+                                 None if new_result is None else len(set(new_result))))
+            continue
+        old_set = set(old_result)
+        new_set = set(new_result)
+        added = sorted(new_set - old_set)
+        removed = sorted(old_set - new_set)
+        if not added and not removed:
+            continue
+        locale = lproj_locale(file_path)
+        key_changes[locale][0] += len(added)
+        key_changes[locale][1] += len(removed)
+        file_changes.append((file_path, locale, added, removed, len(old_set), len(new_set)))
+    
+    locales = []
+    for locale in sorted(set(old_totals) | set(new_totals)):
+        old_count, old_size, old_compressed = old_totals.get(locale, (0, 0, 0))
+        new_count, new_size, new_compressed = new_totals.get(locale, (0, 0, 0))
+        added_keys, removed_keys = key_changes.get(locale, (0, 0))
+        if (old_count, old_size, old_compressed) == (new_count, new_size, new_compressed) \
+                and not added_keys and not removed_keys:
+            continue
+        locales.append((locale, old_count, new_count, old_size, new_size, new_compressed - old_compressed,
+                        added_keys, removed_keys))
+    # 按IPA变化量排序，相同时按语言名称
+    locales.sort(key=lambda item: -abs(item[5]))
+    if locales:
+        total_change = (sum(total[2] for total in new_totals.values())
+                        - sum(total[2] for total in old_totals.values()))
+        locales_section = ReportSection(
+            "🌐 本地化 - 按语言",
+            ["语言", "文件数", "旧版本大小", "新版本大小", "新增键", "删除键", "IPA变化"],
+            description=f"新版本共 {len(new_totals)} 种语言（旧版本 {len(old_totals)} 种），"
+                        f".lproj 目录在IPA中{'增大' if total_change >= 0 else '减少'} {format_size(abs(total_change))}；"
+                        f"大小为解压后大小，仅列出有变化的语言"
+                        + (f"；{unparsed_count} 个本地化文件无法解析，其键变化未计入" if unparsed_count else ""))
+        for locale, old_count, new_count, old_size, new_size, change, added_keys, removed_keys in locales:
+            locales_section.add_row([
+                locale,
+                f"{old_count} → {new_count}",
+                format_size(old_size) if old_count else "-",
+                format_size(new_size) if new_count else "-",
+                f"+{added_keys}" if added_keys else "-",
+                f"-{removed_keys}" if removed_keys else "-",
+                format_change(change, STATUS_MODIFIED),
+            ], change)
+        model.sections.append(locales_section)
+    
+    if file_changes:
+        keys_section = ReportSection(
+            "🌐 本地化 - 键变化明细",
+            ["文件", "语言", "键数", "新增键", "删除键"],
+            description=f"共 {len(file_changes) - unparsed_count} 个本地化文件的键发生变化"
+                        + (f"，{unparsed_count} 个文件无法解析" if unparsed_count else ""))
+        # 无法解析的文件排在最前，其余按键变化数排序
+        file_changes.sort(key=lambda item: (item[2] is not None,
+                                            -(len(item[2] or ()) + len(item[3] or ())), item[0]))
+        for file_path, locale, added, removed, old_count, new_count in file_changes[:LOCALIZATION_MAX_FILES]:
+            if added is None:
+                keys_section.add_row([
+                    shorten_display_path(file_path),
+                    locale,
+                    f"{'无法解析' if old_count is None else old_count} → {'无法解析' if new_count is None else new_count}",
+                    "无法解析",
+                    "无法解析",
+                ])
+                continue
+            keys_section.add_row([
+                shorten_display_path(file_path),
+                locale,
+                f"{old_count} → {new_count}",
+                sample_keys(added),
+                sample_keys(removed),
+            ])
+        if len(file_changes) > LOCALIZATION_MAX_FILES:
+            keys_section.note = f"仅显示键变化最多的 {LOCALIZATION_MAX_FILES} 个文件"
+        model.sections.append(keys_section)
 
-def generate_report(old_ipa_path, new_ipa_path, old_file_size, new_file_size, file_size_diff,
-                   old_total_size, new_total_size, size_diff, old_files, new_files, 
-                   old_by_type_compressed, new_by_type_compressed, old_by_type_uncompressed, new_by_type_uncompressed):
-    """生成对比报告"""
-    report_lines = []
-    
+# 流式分析器：名称（同时作为内容缓存的键） -> func(stream, info)
+# stream 为 ZipFile.open 返回的流，info 为 ZipInfo；在解压任务所在的进程中执行
+STREAM_ANALYZERS = {
+    MACHO_ANALYZER: read_macho_layout,
+    VERSION_PLIST_ANALYZER: read_plist_version,
+    VERSION_BINARY_ANALYZER: read_binary_versions,
+    DUPLICATE_HASH_ANALYZER: hash_stream,
+    IMAGE_ANALYZER: read_image_info,
+    CAR_ANALYZER: read_car_renditions,
+    FLUTTER_SNAPSHOT_ANALYZER: read_snapshot_layout,
+    STRINGS_ANALYZER: read_strings_keys,
+}
+
+# 可选的内容级分析：名称 -> 分析函数 func(model, scheduler, content_cache)
+CONTENT_ANALYSES = {
+    'macho': analyze_macho_changes,
+    'versions': analyze_framework_versions,
+    'duplicates': analyze_duplicates,
+    'images': analyze_images,
+    'assets': analyze_asset_catalogs,
+    'flutter': analyze_flutter,
+    'compression': analyze_compression,
+    'localization': analyze_localization,
+}
+
+def iter_report_lines(model, html_file_path):
+    """逐行生成对比报告（Markdown），行之间以换行符连接"""
     # 标题
-    report_lines.append("# IPA文件大小对比报告\n")
+    yield "# IPA文件大小对比报告\n"
     
     # 基本信息
-    report_lines.append("## 基本信息")
+    yield "## 基本信息"
     # 使用文件夹名称作为版本名称
-    old_folder_name = Path(old_ipa_path).parent.name
-    new_folder_name = Path(new_ipa_path).parent.name
-    report_lines.append(f"- **{old_folder_name}版本IPA体积**: {format_size(old_file_size)}")
-    report_lines.append(f"- **{new_folder_name}版本IPA体积**: {format_size(new_file_size)}")
+    old_folder_name = Path(model.old_ipa_path).parent.name
+    new_folder_name = Path(model.new_ipa_path).parent.name
+    yield f"- **{old_folder_name}版本IPA体积**: {format_size(model.old_file_size)}"
+    yield f"- **{new_folder_name}版本IPA体积**: {format_size(model.new_file_size)}"
     
-    report_lines.append("")
+    yield ""
     
     # IPA包体积增减总信息
-    report_lines.append("## IPA包体积增减总信息")
-    report_lines.append("")
-    
-    all_types = set(old_by_type_compressed.keys()) | set(new_by_type_compressed.keys())
-    
-    # 计算所有变化
-    type_changes = []
-    for file_type in all_types:
-        old_size = old_by_type_compressed.get(file_type, 0)
-        new_size = new_by_type_compressed.get(file_type, 0)
-        type_diff = new_size - old_size
-        if type_diff != 0:
-            type_changes.append((file_type, type_diff, old_size, new_size))
-    
-    # 验证总和
-    total_compressed_diff = sum([x[1] for x in type_changes])
-    report_lines.append(f"**各类型变化总和**: {format_size(total_compressed_diff) if total_compressed_diff > 0 else format_size(abs(total_compressed_diff))}")
-    report_lines.append(f"**IPA文件实际变化**: {format_size(file_size_diff)}")
-    
-    # 计算差异（zip头、元数据等）
-    metadata_diff = file_size_diff - total_compressed_diff
-    if abs(metadata_diff) > 1000:  # 超过1KB才显示
-        report_lines.append(f"**差异（ZIP头/元数据等）**: {format_size(metadata_diff) if metadata_diff > 0 else format_size(abs(metadata_diff))}")
+    yield "## IPA包体积增减总信息"
+    yield ""
     
-    report_lines.append("")
+    total_compressed_diff = model.total_compressed_diff
+    yield f"**各类型变化总和**: {format_size(total_compressed_diff) if total_compressed_diff > 0 else format_size(abs(total_compressed_diff))}"
+    yield f"**IPA文件实际变化**: {format_size(model.file_size_diff)}"
     
-    # 生成HTML文件并添加链接
-    html_file_path = generate_html_report(old_ipa_path, new_ipa_path, old_file_size, new_file_size, file_size_diff,
-                                         old_total_size, new_total_size, size_diff, old_files, new_files, 
-                                         old_by_type_compressed, new_by_type_compressed, old_by_type_uncompressed, new_by_type_uncompressed)
+    # 差异（zip头、元数据等）
+    metadata_diff = model.metadata_diff
+    if abs(metadata_diff) > 1000:  # 超过1KB才显示
+        yield f"**差异（ZIP头/元数据等）**: {format_size(metadata_diff) if metadata_diff > 0 else format_size(abs(metadata_diff))}"
+    
+    yield ""
     
-    # 使用urllib来正确编码URL
+    # 添加HTML报告链接，使用urllib来正确编码URL
     import urllib.parse
     import urllib.request
     html_file_url = urllib.parse.urljoin('file:', urllib.request.pathname2url(html_file_path))
-    report_lines.append(f"**📊 Web版报告**: [点击在浏览器中查看详细报告]({html_file_url})")
-    report_lines.append(f"**📄 HTML文件路径**: {html_file_path}")
-    report_lines.append("")
-    report_lines.append("---")  # 分割线
-    report_lines.append("")
-    
-    # 分离增大和减少的资源
-    increased_types = [(file_type, type_diff, old_size, new_size) for file_type, type_diff, old_size, new_size in type_changes if type_diff > 0]
-    decreased_types = [(file_type, type_diff, old_size, new_size) for file_type, type_diff, old_size, new_size in type_changes if type_diff < 0]
-    
-    # 按大小排序（由大到小）
-    increased_types.sort(key=lambda x: x[1], reverse=True)
-    decreased_types.sort(key=lambda x: abs(x[1]), reverse=True)
-    
-    # 获取所有文件和类型
-    all_files = set(old_files.keys()) | set(new_files.keys())
-    files_by_type = defaultdict(list)
-    
-    for file_path in all_files:
-        old_info = old_files.get(file_path, {})
-        new_info = new_files.get(file_path, {})
-        file_type = new_info.get('type') or old_info.get('type', '其他文件')
-        
-        old_size = old_info.get('size', 0)
-        new_size = new_info.get('size', 0)
-        change = new_size - old_size
-        
-        # 确定状态
-        if old_size == 0:
-            status = "新增"
-            status_priority = 1  # 新增排在最前
-        elif new_size == 0:
-            status = "删除"
-            status_priority = 3  # 删除排在最后
-        else:
-            status = "修改"
-            status_priority = 2  # 修改排在中间
-        
-        files_by_type[file_type].append({
-            'path': file_path,
-            'old_size': old_size,
-            'new_size': new_size,
-            'change': change,
-            'status': status,
-            'status_priority': status_priority
-        })
+    yield f"**📊 Web版报告**: [点击在浏览器中查看详细报告]({html_file_url})"
+    yield f"**📄 HTML文件路径**: {html_file_path}"
+    yield ""
+    yield "---"  # 分割线
+    yield ""
     
     # 显示新增资源及其详细文件
-    if increased_types:
-        report_lines.append("## 📈 新增/增大的资源类型")
-        report_lines.append("")
-        report_lines.append("*按增大幅度由大到小排序：*")
-        report_lines.append("")
+    if model.increased_types:
+        yield "## 📈 新增/增大的资源类型"
+        yield ""
+        yield "*按增大幅度由大到小排序：*"
+        yield ""
         
-        for file_type, type_diff, old_size, new_size in increased_types:
-            # 计算真实大小变化（解压后）
-            real_old_size = old_by_type_uncompressed.get(file_type, 0)
-            real_new_size = new_by_type_uncompressed.get(file_type, 0)
-            real_diff = real_new_size - real_old_size
-            
-            report_lines.append(f"- **{file_type}**: IPA增大 {format_size(type_diff)}，真实增大 {format_size(real_diff)}")
+        for file_type, type_diff, old_size, new_size in model.increased_types:
+            yield f"- **{file_type}**: IPA增大 {format_size(type_diff)}，真实增大 {format_size(model.real_diff(file_type))}"
         
-        report_lines.append("")
+        yield ""
         
         # 为每个增大的资源类型生成详细表格
-        for file_type, type_diff, old_size, new_size in increased_types:
-            if file_type in files_by_type:
-                files = files_by_type[file_type]
-                
-                # 过滤掉变化很小的文件（小于1KB的变化）
-                significant_files = [f for f in files if abs(f['change']) >= 1024 or f['status'] in ['新增', '删除']]
-                
-                if significant_files:
-                    # 按状态排序：新增(1) -> 修改(2) -> 删除(3)，然后按变化大小排序
-                    significant_files.sort(key=lambda x: (x['status_priority'], -abs(x['change'])))
-                    
-                    # 限制每个类型最多显示20个文件
-                    if len(significant_files) > 20:
-                        significant_files = significant_files[:20]
-                    
-                    # 计算真实大小变化
-                    real_old_size = old_by_type_uncompressed.get(file_type, 0)
-                    real_new_size = new_by_type_uncompressed.get(file_type, 0)
-                    real_diff = real_new_size - real_old_size
-                    
-                    report_lines.append(f"### 📄 {file_type} - 详细文件列表 (IPA增大: {format_size(type_diff)}，真实增大: {format_size(real_diff)})")
-                    report_lines.append("")
-                    report_lines.append("| 文件路径 | 旧版本大小 | 新版本大小 | 变化 | 状态 |")
-                    report_lines.append("|---------|------------|------------|------|------|")
-                    
-                    for file_info in significant_files:
-                        file_path = file_info['path']
-                        old_size = file_info['old_size']
-                        new_size = file_info['new_size']
-                        change = file_info['change']
-                        status = file_info['status']
-                        
-                        # 格式化大小显示
-                        old_size_str = format_size(old_size) if old_size > 0 else "-"
-                        new_size_str = format_size(new_size) if new_size > 0 else "-"
-                        
-                        # 变化量
-                        if change > 0:
-                            change_str = f"+{format_size(change)}"
-                        elif change < 0:
-                            change_str = f"-{format_size(abs(change))}"
-                        else:
-                            change_str = "无变化"
-                        
-                        # 截断过长的文件路径，特别处理Framework路径
-                        display_path = file_path
-                        if 'Framework' in display_path and len(display_path) > 40:
-                            # 对于Framework路径，只显示framework名称和文件名
-                            if '.framework/' in display_path:
-                                parts = display_path.split('.framework/')
-                                if len(parts) == 2:
-                                    framework_part = parts[0].split('/')[-1] + '.framework'
-                                    file_part = parts[1]
-                                    # 如果文件路径仍然太长，截断文件路径部分
-                                    if len(file_part) > 25:
-                                        file_part = "..." + file_part[-22:]
-                                    display_path = f"{framework_part}/{file_part}"
-                        elif len(display_path) > 50:
-                            display_path = "..." + display_path[-47:]
-                        
-                        report_lines.append(f"| {display_path} | {old_size_str} | {new_size_str} | {change_str} | {status} |")
-                    
-                    if len(files) > len(significant_files):
-                        report_lines.append(f"\n*注: {file_type}类型共有 {len(files)} 个文件，仅显示变化较大的 {len(significant_files)} 个*")
-                    
-                    report_lines.append("")
-    
-    report_lines.append("---")  # 分割线
-    report_lines.append("")
+        for file_type, type_diff, old_size, new_size in model.increased_types:
+            yield from iter_markdown_file_table(
+                model, file_type,
+                f"### 📄 {file_type} - 详细文件列表 (IPA增大: {format_size(type_diff)}，真实增大: {format_size(model.real_diff(file_type))})")
+    
+    # 分割线只在两部分内容之间输出一次（基本信息之后已经有一条）
+    separator_needed = bool(model.increased_types)
     
     # 显示减少资源及其详细文件
-    if decreased_types:
-        report_lines.append("## 📉 减少的资源类型")
-        report_lines.append("")
-        report_lines.append("*按减少幅度由大到小排序：*")
-        report_lines.append("")
+    if model.decreased_types:
+        if separator_needed:
+            yield "---"  # 分割线
+            yield ""
+        separator_needed = True
+        yield "## 📉 减少的资源类型"
+        yield ""
+        yield "*按减少幅度由大到小排序：*"
+        yield ""
         
-        for file_type, type_diff, old_size, new_size in decreased_types:
-            # 计算真实大小变化（解压后）
-            real_old_size = old_by_type_uncompressed.get(file_type, 0)
-            real_new_size = new_by_type_uncompressed.get(file_type, 0)
-            real_diff = real_new_size - real_old_size
-            
-            report_lines.append(f"- **{file_type}**: IPA减少 {format_size(abs(type_diff))}，真实减少 {format_size(abs(real_diff))}")
+        for file_type, type_diff, old_size, new_size in model.decreased_types:
+            yield f"- **{file_type}**: IPA减少 {format_size(abs(type_diff))}，真实减少 {format_size(abs(model.real_diff(file_type)))}"
         
-        report_lines.append("")
+        yield ""
         
         # 为每个减少的资源类型生成详细表格
-        for file_type, type_diff, old_size, new_size in decreased_types:
-            if file_type in files_by_type:
-                files = files_by_type[file_type]
-                
-                # 过滤掉变化很小的文件（小于1KB的变化）
-                significant_files = [f for f in files if abs(f['change']) >= 1024 or f['status'] in ['新增', '删除']]
-                
-                if significant_files:
-                    # 按状态排序：新增(1) -> 修改(2) -> 删除(3)，然后按变化大小排序
-                    significant_files.sort(key=lambda x: (x['status_priority'], -abs(x['change'])))
-                    
-                    # 限制每个类型最多显示20个文件
-                    if len(significant_files) > 20:
-                        significant_files = significant_files[:20]
-                    
-                    # 计算真实大小变化
-                    real_old_size = old_by_type_uncompressed.get(file_type, 0)
-                    real_new_size = new_by_type_uncompressed.get(file_type, 0)
-                    real_diff = real_new_size - real_old_size
-                    
-                    report_lines.append(f"### 📄 {file_type} - 详细文件列表 (IPA减少: {format_size(abs(type_diff))}，真实减少: {format_size(abs(real_diff))})")
-                    report_lines.append("")
-                    report_lines.append("| 文件路径 | 旧版本大小 | 新版本大小 | 变化 | 状态 |")
-                    report_lines.append("|---------|------------|------------|------|------|")
-                    
-                    for file_info in significant_files:
-                        file_path = file_info['path']
-                        old_size = file_info['old_size']
-                        new_size = file_info['new_size']
-                        change = file_info['change']
-                        status = file_info['status']
-                        
-                        # 格式化大小显示
-                        old_size_str = format_size(old_size) if old_size > 0 else "-"
-                        new_size_str = format_size(new_size) if new_size > 0 else "-"
-                        
-                        # 变化量
-                        if change > 0:
-                            change_str = f"+{format_size(change)}"
-                        elif change < 0:
-                            change_str = f"-{format_size(abs(change))}"
-                        else:
-                            change_str = "无变化"
-                        
-                        # 截断过长的文件路径，特别处理Framework路径
-                        display_path = file_path
-                        if 'Framework' in display_path and len(display_path) > 40:
-                            # 对于Framework路径，只显示framework名称和文件名
-                            if '.framework/' in display_path:
-                                parts = display_path.split('.framework/')
-                                if len(parts) == 2:
-                                    framework_part = parts[0].split('/')[-1] + '.framework'
-                                    file_part = parts[1]
-                                    # 如果文件路径仍然太长，截断文件路径部分
-                                    if len(file_part) > 25:
-                                        file_part = "..." + file_part[-22:]
-                                    display_path = f"{framework_part}/{file_part}"
-                        elif len(display_path) > 50:
-                            display_path = "..." + display_path[-47:]
-                        
-                        report_lines.append(f"| {display_path} | {old_size_str} | {new_size_str} | {change_str} | {status} |")
-                    
-                    if len(files) > len(significant_files):
-                        report_lines.append(f"\n*注: {file_type}类型共有 {len(files)} 个文件，仅显示变化较大的 {len(significant_files)} 个*")
-                    
-                    report_lines.append("")
-    
-    return "\n".join(report_lines)
-
-def generate_html_report(old_ipa_path, new_ipa_path, old_file_size, new_file_size, file_size_diff,
-                        old_total_size, new_total_size, size_diff, old_files, new_files, 
-                        old_by_type_compressed, new_by_type_compressed, old_by_type_uncompressed, new_by_type_uncompressed):
-    """生成HTML格式的报告"""
-    import os
-    from datetime import datetime
-    
-    current_dir = Path(__file__).parent
-    html_file_path = current_dir / "ipa_comparison_report.html"
-    
-    # 计算变化数据
-    all_types = set(old_by_type_compressed.keys()) | set(new_by_type_compressed.keys())
-    type_changes = []
-    for file_type in all_types:
-        old_size = old_by_type_compressed.get(file_type, 0)
-        new_size = new_by_type_compressed.get(file_type, 0)
-        type_diff = new_size - old_size
-        if type_diff != 0:
-            type_changes.append((file_type, type_diff, old_size, new_size))
-    
-    total_compressed_diff = sum([x[1] for x in type_changes])
-    metadata_diff = file_size_diff - total_compressed_diff
-    
-    # 分离增大和减少的资源
-    increased_types = [(file_type, type_diff, old_size, new_size) for file_type, type_diff, old_size, new_size in type_changes if type_diff > 0]
-    decreased_types = [(file_type, type_diff, old_size, new_size) for file_type, type_diff, old_size, new_size in type_changes if type_diff < 0]
+        for file_type, type_diff, old_size, new_size in model.decreased_types:
+            yield from iter_markdown_file_table(
+                model, file_type,
+                f"### 📄 {file_type} - 详细文件列表 (IPA减少: {format_size(abs(type_diff))}，真实减少: {format_size(abs(model.real_diff(file_type)))})")
+    
+    # 内容级分析结果
+    if model.sections:
+        if separator_needed:
+            yield "---"  # 分割线
+            yield ""
+        for section in model.sections:
+            yield from iter_markdown_section(section)
+
+def markdown_cell(text):
+    """表格单元格中的文本：转义列分隔符 |，换行替换为空格（内容可能来自IPA中的文件名、本地化键等）"""
+    return str(text).replace('|', '\\|').replace('\r\n', ' ').replace('\n', ' ').replace('\r', ' ')
+
+def iter_markdown_section(section):
+    """生成内容级分析的表格（Markdown）"""
+    yield f"## {section.title}"
+    yield ""
+    if section.description:
+        yield f"*{section.description}*"
+        yield ""
+    if section.rows:
+        yield "| " + " | ".join(markdown_cell(header) for header in section.headers) + " |"
+        yield "|" + "|".join("------" for _ in section.headers) + "|"
+        for cells, _ in section.rows:
+            yield "| " + " | ".join(markdown_cell(cell) for cell in cells) + " |"
+    if section.note:
+        yield f"\n*注: {section.note}*"
+    yield ""
+
+def iter_markdown_file_table(model, file_type, title):
+    """生成某个类型的详细文件表格（Markdown）"""
+    significant_files = model.significant_files(file_type)
+    if not significant_files:
+        return
     
-    increased_types.sort(key=lambda x: x[1], reverse=True)
-    decreased_types.sort(key=lambda x: abs(x[1]), reverse=True)
+    yield title
+    yield ""
+    yield "| 文件路径 | 旧版本大小 | 新版本大小 | 变化 | 状态 |"
+    yield "|---------|------------|------------|------|------|"
     
-    # 获取详细文件信息
-    def get_files_by_type():
-        all_files = set(old_files.keys()) | set(new_files.keys())
-        files_by_type = defaultdict(list)
+    for file_info in significant_files:
+        old_size = file_info['old_size']
+        new_size = file_info['new_size']
+        status = file_info['status']
         
-        for file_path in all_files:
-            old_info = old_files.get(file_path, {})
-            new_info = new_files.get(file_path, {})
-            file_type = new_info.get('type') or old_info.get('type', '其他文件')
-            
-            old_size = old_info.get('size', 0)
-            new_size = new_info.get('size', 0)
-            change = new_size - old_size
-            
-            # 确定状态
-            if old_size == 0:
-                status = "新增"
-                status_priority = 1
-            elif new_size == 0:
-                status = "删除"
-                status_priority = 3
-            else:
-                status = "修改"
-                status_priority = 2
-            
-            files_by_type[file_type].append({
-                'path': file_path,
-                'old_size': old_size,
-                'new_size': new_size,
-                'change': change,
-                'status': status,
-                'status_priority': status_priority
-            })
+        # 格式化大小显示
+        old_size_str = format_size(old_size) if old_size > 0 else "-"
+        new_size_str = format_size(new_size) if new_size > 0 else "-"
         
-        # 为每个类型的文件排序
-        for file_type in files_by_type:
-            files_by_type[file_type].sort(key=lambda x: (x['status_priority'], -abs(x['change'])))
+        # 变化量
+        change_str = format_change(file_info['change'], status)
         
-        return files_by_type
+        display_path = markdown_cell(shorten_display_path(file_info['path']))
+        yield f"| {display_path} | {old_size_str} | {new_size_str} | {change_str} | {status} |"
+    
+    total_files = model.total_files(file_type)
+    if total_files > len(significant_files):
+        yield f"\n*注: {file_type}类型共有 {total_files} 个文件，仅显示变化较大的 {len(significant_files)} 个*"
     
-    files_by_type = get_files_by_type()
+    yield ""
+
+def write_report_lines(output, lines):
+    """将报告行逐行写入文件，结果与 "\\n".join(lines) 完全一致
+    
+    Returns:
+        写入的行数（按换行符拆分后的行数）
+    """
+    line_count = 0
+    for index, line in enumerate(lines):
+        if index:
+            output.write("\n")
+        output.write(line)
+        line_count += line.count("\n") + 1
+    return line_count
+
+def generate_report(model):
+    """生成对比报告（同时生成HTML报告）"""
+    html_file_path = generate_html_report(model)
+    return "\n".join(iter_report_lines(model, html_file_path))
+
+
+# HTML报告中各状态对应的样式
+STATUS_CSS_CLASS = {
+    STATUS_ADDED: "status-new",
+    STATUS_MODIFIED: "status-modified",
+    STATUS_CONTENT_CHANGED: "status-modified",
+    STATUS_DELETED: "status-deleted",
+    STATUS_MOVED: "status-moved",
+}
+
+def iter_html_report(model):
+    """逐段生成HTML格式的报告，各段直接拼接即为完整文件内容"""
+    from datetime import datetime
     
-    html_content = f"""
+    old_ipa_path = model.old_ipa_path
+    new_ipa_path = model.new_ipa_path
+    old_file_size = model.old_file_size
+    new_file_size = model.new_file_size
+    file_size_diff = model.file_size_diff
+    size_diff = model.size_diff
+    
+    yield f"""
 <!DOCTYPE html>
 <html lang="zh-CN">
 <head>
@@ -819,6 +2848,10 @@ def generate_html_report(old_ipa_path, new_ipa_path, old_file_size, new_file_siz
             background-color: #f8d7da;
             color: #721c24;
         }}
+        .status-moved {{
+            background-color: #d1ecf1;
+            color: #0c5460;
+        }}
         .file-change {{
             font-weight: 500;
         }}
@@ -870,11 +2903,11 @@ def generate_html_report(old_ipa_path, new_ipa_path, old_file_size, new_file_siz
         
         <div class="info-grid">
             <div class="info-card">
-                <span class="version-label">{Path(old_ipa_path).parent.name}版本IPA体积:</span> 
+                <span class="version-label">{html.escape(Path(old_ipa_path).parent.name)}版本IPA体积:</span> 
                 <span class="version-size">{format_size(old_file_size)}</span>
             </div>
             <div class="info-card">
-                <span class="version-label">{Path(new_ipa_path).parent.name}版本IPA体积:</span> 
+                <span class="version-label">{html.escape(Path(new_ipa_path).parent.name)}版本IPA体积:</span> 
                 <span class="version-size">{format_size(new_file_size)}</span>
             </div>
         </div>
@@ -905,140 +2938,60 @@ def generate_html_report(old_ipa_path, new_ipa_path, old_file_size, new_file_siz
             <div class="resource-list">"""
     
     # 生成可展开的增大资源类型
-    for file_type, type_diff, old_size, new_size in increased_types:
-        # 计算真实大小变化
-        real_old_size = old_by_type_uncompressed.get(file_type, 0)
-        real_new_size = new_by_type_uncompressed.get(file_type, 0)
-        real_diff = real_new_size - real_old_size
-        
-        # 获取该类型的详细文件列表
-        type_files = files_by_type.get(file_type, [])
-        significant_files = [f for f in type_files if abs(f['change']) >= 1024 or f['status'] in ['新增', '删除']]
-        
-        if len(significant_files) > 20:
-            significant_files = significant_files[:20]
-        
-        html_content += f"""
-                <div class="resource-item">
-                    <div class="resource-header" onclick="toggleDetails(this)">
-                        <span class="resource-name">
-                            <span class="expand-icon">▶</span>
-                            {file_type}
-                        </span>
-                        <div class="resource-change-container">
-                            <span class="resource-change change-increase ipa-badge">IPA +{format_size(type_diff)}</span>
-                            <span class="resource-change change-increase real-badge">真实 +{format_size(real_diff)}</span>
-                        </div>
-                    </div>
-                    <div class="details-panel">
-                        <table class="file-table">
-                            <thead>
-                                <tr>
-                                    <th>文件路径</th>
-                                    <th>旧版本大小</th>
-                                    <th>新版本大小</th>
-                                    <th>变化</th>
-                                    <th>状态</th>
-                                </tr>
-                            </thead>
-                            <tbody>"""
-        
-        for file_info in significant_files:
-            file_path = file_info['path']
-            old_size = file_info['old_size']
-            new_size = file_info['new_size']
-            change = file_info['change']
-            status = file_info['status']
-            
-            # 格式化显示路径
-            display_path = file_path
-            if 'Framework' in display_path and len(display_path) > 40:
-                if '.framework/' in display_path:
-                    parts = display_path.split('.framework/')
-                    if len(parts) == 2:
-                        framework_part = parts[0].split('/')[-1] + '.framework'
-                        file_part = parts[1]
-                        if len(file_part) > 25:
-                            file_part = "..." + file_part[-22:]
-                        display_path = f"{framework_part}/{file_part}"
-            elif len(display_path) > 50:
-                display_path = "..." + display_path[-47:]
-            
-            # 格式化大小
-            old_size_str = format_size(old_size) if old_size > 0 else "-"
-            new_size_str = format_size(new_size) if new_size > 0 else "-"
-            
-            # 变化量和样式
-            if change > 0:
-                change_str = f"+{format_size(change)}"
-                change_class = "positive"
-            elif change < 0:
-                change_str = f"-{format_size(abs(change))}"
-                change_class = "negative"
-            else:
-                change_str = "无变化"
-                change_class = ""
-            
-            # 状态样式
-            status_class = {
-                "新增": "status-new",
-                "修改": "status-modified",
-                "删除": "status-deleted"
-            }.get(status, "")
-            
-            html_content += f"""
-                                <tr>
-                                    <td class="file-path">{display_path}</td>
-                                    <td>{old_size_str}</td>
-                                    <td>{new_size_str}</td>
-                                    <td class="file-change {change_class}">{change_str}</td>
-                                    <td><span class="status-badge {status_class}">{status}</span></td>
-                                </tr>"""
-        
-        total_files = len(type_files)
-        shown_files = len(significant_files)
-        
-        html_content += f"""
-                            </tbody>
-                        </table>
-                        {f'<p style="margin-top: 10px; color: #6c757d; font-size: 0.9em;">注: {file_type}类型共有 {total_files} 个文件，仅显示变化较大的 {shown_files} 个</p>' if total_files > shown_files else ''}
-                    </div>
-                </div>"""
+    for file_type, type_diff, old_size, new_size in model.increased_types:
+        yield from iter_html_resource_item(
+            model, file_type, "change-increase",
+            f"IPA +{format_size(type_diff)}", f"真实 +{format_size(model.real_diff(file_type))}")
     
-    html_content += """
+    yield """
             </div>
         </div>"""
     
-    if decreased_types:
-        html_content += """
+    if model.decreased_types:
+        yield """
         <div class="resource-section">
             <h2>📉 减少的资源类型</h2>
             <p style="color: #6c757d; margin-bottom: 20px; font-style: italic;">以下显示各资源类型在IPA包中减少的体积大小（基于压缩后大小）</p>
             <div class="resource-list">"""
         
         # 生成可展开的减少资源类型
-        for file_type, type_diff, old_size, new_size in decreased_types:
-            # 计算真实大小变化
-            real_old_size = old_by_type_uncompressed.get(file_type, 0)
-            real_new_size = new_by_type_uncompressed.get(file_type, 0)
-            real_diff = real_new_size - real_old_size
-            
-            type_files = files_by_type.get(file_type, [])
-            significant_files = [f for f in type_files if abs(f['change']) >= 1024 or f['status'] in ['新增', '删除']]
-            
-            if len(significant_files) > 20:
-                significant_files = significant_files[:20]
-            
-            html_content += f"""
+        for file_type, type_diff, old_size, new_size in model.decreased_types:
+            yield from iter_html_resource_item(
+                model, file_type, "change-decrease",
+                f"IPA -{format_size(abs(type_diff))}", f"真实 -{format_size(abs(model.real_diff(file_type)))}")
+        
+        yield """
+            </div>
+        </div>"""
+    
+    # 内容级分析结果
+    for section in model.sections:
+        yield from iter_html_section(section)
+    
+    yield f"""
+        <div class="timestamp">
+            报告生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        </div>
+    </div>
+</body>
+</html>"""
+
+def iter_html_resource_item(model, file_type, change_class_name, ipa_badge, real_badge):
+    """生成某个类型可展开的资源项及其详细文件表格（HTML）"""
+    # 获取该类型的详细文件列表
+    significant_files = model.significant_files(file_type)
+    
+    file_type_text = html.escape(file_type)
+    yield f"""
                 <div class="resource-item">
                     <div class="resource-header" onclick="toggleDetails(this)">
                         <span class="resource-name">
                             <span class="expand-icon">▶</span>
-                            {file_type}
+                            {file_type_text}
                         </span>
                         <div class="resource-change-container">
-                            <span class="resource-change change-decrease ipa-badge">IPA -{format_size(abs(type_diff))}</span>
-                            <span class="resource-change change-decrease real-badge">真实 -{format_size(abs(real_diff))}</span>
+                            <span class="resource-change {change_class_name} ipa-badge">{ipa_badge}</span>
+                            <span class="resource-change {change_class_name} real-badge">{real_badge}</span>
                         </div>
                     </div>
                     <div class="details-panel">
@@ -1053,125 +3006,647 @@ def generate_html_report(old_ipa_path, new_ipa_path, old_file_size, new_file_siz
                                 </tr>
                             </thead>
                             <tbody>"""
-            
-            for file_info in significant_files:
-                file_path = file_info['path']
-                old_size = file_info['old_size']
-                new_size = file_info['new_size']
-                change = file_info['change']
-                status = file_info['status']
-                
-                # 同样的路径和大小格式化逻辑
-                display_path = file_path
-                if 'Framework' in display_path and len(display_path) > 40:
-                    if '.framework/' in display_path:
-                        parts = display_path.split('.framework/')
-                        if len(parts) == 2:
-                            framework_part = parts[0].split('/')[-1] + '.framework'
-                            file_part = parts[1]
-                            if len(file_part) > 25:
-                                file_part = "..." + file_part[-22:]
-                            display_path = f"{framework_part}/{file_part}"
-                elif len(display_path) > 50:
-                    display_path = "..." + display_path[-47:]
-                
-                old_size_str = format_size(old_size) if old_size > 0 else "-"
-                new_size_str = format_size(new_size) if new_size > 0 else "-"
-                
-                if change > 0:
-                    change_str = f"+{format_size(change)}"
-                    change_class = "positive"
-                elif change < 0:
-                    change_str = f"-{format_size(abs(change))}"
-                    change_class = "negative"
-                else:
-                    change_str = "无变化"
-                    change_class = ""
-                
-                status_class = {
-                    "新增": "status-new",
-                    "修改": "status-modified", 
-                    "删除": "status-deleted"
-                }.get(status, "")
-                
-                html_content += f"""
+    
+    for file_info in significant_files:
+        old_size = file_info['old_size']
+        new_size = file_info['new_size']
+        change = file_info['change']
+        status = file_info['status']
+        
+        # 格式化显示路径
+        display_path = html.escape(shorten_display_path(file_info['path']))
+        
+        # 格式化大小
+        old_size_str = format_size(old_size) if old_size > 0 else "-"
+        new_size_str = format_size(new_size) if new_size > 0 else "-"
+        
+        # 变化量和样式
+        change_str = format_change(change, status)
+        if change > 0:
+            change_class = "positive"
+        elif change < 0:
+            change_class = "negative"
+        else:
+            change_class = ""
+        
+        # 状态样式
+        status_class = STATUS_CSS_CLASS.get(status, "")
+        # 移动的文件在悬停提示中显示原路径
+        path_title = f' title="原路径: {html.escape(file_info["moved_from"])}"' if file_info['moved_from'] else ''
+        
+        yield f"""
                                 <tr>
-                                    <td class="file-path">{display_path}</td>
+                                    <td class="file-path"{path_title}>{display_path}</td>
                                     <td>{old_size_str}</td>
                                     <td>{new_size_str}</td>
                                     <td class="file-change {change_class}">{change_str}</td>
                                     <td><span class="status-badge {status_class}">{status}</span></td>
                                 </tr>"""
-            
-            total_files = len(type_files)
-            shown_files = len(significant_files)
-            
-            html_content += f"""
+    
+    total_files = model.total_files(file_type)
+    shown_files = len(significant_files)
+    
+    yield f"""
                             </tbody>
                         </table>
-                        {f'<p style="margin-top: 10px; color: #6c757d; font-size: 0.9em;">注: {file_type}类型共有 {total_files} 个文件，仅显示变化较大的 {shown_files} 个</p>' if total_files > shown_files else ''}
+                        {f'<p style="margin-top: 10px; color: #6c757d; font-size: 0.9em;">注: {file_type_text}类型共有 {total_files} 个文件，仅显示变化较大的 {shown_files} 个</p>' if total_files > shown_files else ''}
                     </div>
                 </div>"""
+
+def iter_html_section(section):
+    """生成内容级分析的表格（HTML）
+    
+    标题、说明和单元格可能包含IPA中的内容（本地化键、渲染资源名称、版本号等），全部转义后输出
+    """
+    description = (f'<p style="color: #6c757d; margin-bottom: 20px; font-style: italic;">{html.escape(section.description)}</p>'
+                   if section.description else '')
+    header_cells = "".join(f"<th>{html.escape(header)}</th>" for header in section.headers)
+    yield f"""
+        <div class="resource-section">
+            <h2>{html.escape(section.title)}</h2>
+            {description}
+            <table class="file-table">
+                <thead>
+                    <tr>{header_cells}</tr>
+                </thead>
+                <tbody>"""
+    
+    for cells, change in section.rows:
+        if change is not None and change > 0:
+            change_class = "positive"
+        elif change is not None and change < 0:
+            change_class = "negative"
+        else:
+            change_class = ""
+        # 变化量固定在最后一列
+        row_cells = "".join(f"<td>{html.escape(str(cell))}</td>" for cell in cells[:-1])
+        yield f"""
+                    <tr>{row_cells}<td class="file-change {change_class}">{html.escape(str(cells[-1]))}</td></tr>"""
+    
+    yield f"""
+                </tbody>
+            </table>
+            {f'<p style="margin-top: 10px; color: #6c757d; font-size: 0.9em;">注: {html.escape(section.note)}</p>' if section.note else ''}
+        </div>"""
+
+def generate_html_report(model):
+    """生成HTML格式的报告，边生成边写入文件"""
+    current_dir = Path(__file__).parent
+    html_file_path = current_dir / "ipa_comparison_report.html"
+    
+    with open(html_file_path, 'w', encoding='utf-8') as f:
+        for chunk in iter_html_report(model):
+            f.write(chunk)
+    
+    return str(html_file_path.absolute())
+
+# 趋势模式中每一步变化展示的分类数和文件数
+TREND_TOP_TYPES = 3
+TREND_TOP_FILES = 5
+# 趋势图的尺寸（像素）
+TREND_CHART_WIDTH = 1100
+TREND_CHART_HEIGHT = 260
+TREND_CHART_PADDING = 50
+
+def natural_sort_key(path):
+    """按文件名自然排序：build-9.ipa 排在 build-10.ipa 之前"""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', Path(path).name)]
+
+def collect_trend_builds(inputs):
+    """展开趋势模式的输入：IPA文件和URL按给定顺序，目录中的IPA按文件名自然排序"""
+    builds = []
+    for item in inputs:
+        if is_remote_url(item):
+            builds.append(item)
+            continue
+        item = Path(item)
+        if item.is_dir() and not item.name.endswith(('.app', '.xcarchive')):
+            builds.extend(sorted(item.glob("*.ipa"), key=natural_sort_key))
+        else:
+            builds.append(item)
+    return builds
+
+class TrendModel:
+    """多个构建的体积趋势
+    
+    每个IPA只扫描一次（相同路径只提交一次，可命中分析缓存），相邻构建之间用 DiffModel 计算差异，
+    整体开销随构建数线性增长；用完的条目表立即释放，串行时同一时间只保留相邻两个构建的条目表
+    
+    Args:
+        top_files: 每一步变化中展示的文件数
+    """
+    
+    def __init__(self, ipa_paths, jobs=1, cache=None, top_files=TREND_TOP_FILES, significant_change=1024,
+                 nested_depth=0, nested_budget=NESTED_MEMORY_BUDGET):
+        self.builds = []  # [{'path', 'name', 'file_size', 'total_size', 'total_compressed_size', 'file_count', 'by_type'}]
+        self.steps = []   # 相邻构建之间的差异
         
-        html_content += """
-            </div>
+        with analysis_pool(jobs) as executor:
+            if executor is not None:
+                print(f"正在并行分析 {len(ipa_paths)} 个IPA文件（{jobs}个进程）...")
+            futures = {}
+            if executor is not None:
+                for ipa_path in ipa_paths:
+                    if ipa_path not in futures:
+                        futures[ipa_path] = submit_job(executor, load_or_scan_ipa, ipa_path, cache, None,
+                                                       nested_depth, nested_budget)
+            
+            previous = None
+            for index, ipa_path in enumerate(ipa_paths):
+                future = futures.get(ipa_path)
+                if future is None:
+                    # 串行时按顺序逐个扫描
+                    print(f"正在分析 ({index + 1}/{len(ipa_paths)}): {Path(ipa_path).name}")
+                    future = futures[ipa_path] = submit_job(executor, load_or_scan_ipa, ipa_path, cache, None,
+                                                            nested_depth, nested_budget)
+                table, _, _ = future.result()
+                # 后面不再出现的路径释放Future持有的条目表
+                if ipa_path not in ipa_paths[index + 1:]:
+                    del futures[ipa_path]
+                by_type, _ = table.type_totals(aggregate_mode=True)
+                self.builds.append({
+                    'path': ipa_path,
+                    'name': Path(ipa_path).name,
+                    'file_size': get_file_size(ipa_path, table),
+                    'total_size': table.total_size,
+                    'total_compressed_size': table.total_compressed_size,
+                    'file_count': len(table.index),
+                    'by_type': dict(by_type),
+                })
+                if previous is not None:
+                    self.steps.append(self._diff_step(previous, (ipa_path, table), top_files, significant_change))
+                previous = (ipa_path, table)
+        
+        # 分类按最后一个构建中的大小降序，已消失的分类排在最后
+        last_by_type = self.builds[-1]['by_type'] if self.builds else {}
+        all_types = set()
+        for build in self.builds:
+            all_types.update(build['by_type'])
+        self.types = sorted(all_types, key=lambda file_type: (-last_by_type.get(file_type, 0), file_type))
+    
+    @staticmethod
+    def _diff_step(previous, current, top_files, significant_change):
+        """相邻两个构建的差异：总体变化、变化最大的分类和文件"""
+        (old_path, old_table), (new_path, new_table) = previous, current
+        model = DiffModel(old_path, new_path, old_table, new_table,
+                          max_files_per_type=top_files, significant_change=significant_change)
+        type_changes = sorted((item for item in model.type_changes if item[1]),
+                              key=lambda item: (-abs(item[1]), item[0]))
+        file_selector = TopKSelector(top_files)
+        for file_type, files in model.top_files_by_type.items():
+            for file_info in files:
+                if file_info['change']:
+                    file_selector.push((-abs(file_info['change']), file_info['path']), file_info)
+        return {
+            'old': Path(old_path).name,
+            'new': Path(new_path).name,
+            'file_size_diff': model.file_size_diff,
+            'size_diff': model.size_diff,
+            'compressed_diff': new_table.total_compressed_size - old_table.total_compressed_size,
+            'type_changes': type_changes[:TREND_TOP_TYPES],
+            'top_files': file_selector.results(),
+        }
+
+def write_trend_csv(trend, csv_path):
+    """按构建输出时间序列：每行一个构建，分类列为IPA中压缩后大小（字节）"""
+    with open(csv_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['build', 'ipa_file_size', 'compressed_size', 'uncompressed_size', 'file_count']
+                        + trend.types)
+        for build in trend.builds:
+            writer.writerow([build['name'], build['file_size'], build['total_compressed_size'],
+                             build['total_size'], build['file_count']]
+                            + [build['by_type'].get(file_type, 0) for file_type in trend.types])
+
+def change_css_class(change):
+    if change > 0:
+        return "positive"
+    if change < 0:
+        return "negative"
+    return ""
+
+def iter_trend_chart(trend):
+    """IPA文件大小折线图（内联SVG）"""
+    sizes = [build['file_size'] for build in trend.builds]
+    if len(sizes) < 2:
+        return
+    low, high = min(sizes), max(sizes)
+    span = (high - low) or 1
+    plot_width = TREND_CHART_WIDTH - 2 * TREND_CHART_PADDING
+    plot_height = TREND_CHART_HEIGHT - 2 * TREND_CHART_PADDING
+    points = []
+    for index, size in enumerate(sizes):
+        x = TREND_CHART_PADDING + plot_width * index / (len(sizes) - 1)
+        y = TREND_CHART_PADDING + plot_height * (high - size) / span
+        points.append((x, y))
+    polyline = " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+    yield f"""
+            <svg width="100%" viewBox="0 0 {TREND_CHART_WIDTH} {TREND_CHART_HEIGHT}" style="background: #f8f9fa; border-radius: 6px;">
+                <text x="{TREND_CHART_PADDING}" y="{TREND_CHART_PADDING - 15}" font-size="12" fill="#6c757d">{format_size(high)}</text>
+                <text x="{TREND_CHART_PADDING}" y="{TREND_CHART_HEIGHT - TREND_CHART_PADDING + 25}" font-size="12" fill="#6c757d">{format_size(low)}</text>
+                <polyline points="{polyline}" fill="none" stroke="#3498db" stroke-width="2"/>"""
+    for (x, y), build in zip(points, trend.builds):
+        yield f"""
+                <circle cx="{x:.1f}" cy="{y:.1f}" r="4" fill="#2c3e50"><title>{html.escape(build['name'])}: {format_size(build['file_size'])}</title></circle>"""
+    yield """
+            </svg>"""
+
+def iter_trend_html(trend):
+    """逐段生成趋势报告（HTML）"""
+    from datetime import datetime
+    
+    yield """
+<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>IPA体积趋势报告</title>
+    <style>
+        body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; margin: 0; padding: 20px; background-color: #f8f9fa; }
+        .container { max-width: 1400px; margin: 0 auto; background: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+        h1 { color: #2c3e50; text-align: center; margin-bottom: 30px; border-bottom: 3px solid #3498db; padding-bottom: 10px; }
+        h2 { color: #34495e; border-left: 4px solid #3498db; padding-left: 15px; margin-top: 30px; }
+        .table-wrapper { overflow-x: auto; }
+        .file-table { width: 100%; border-collapse: collapse; font-size: 0.9em; }
+        .file-table th { background-color: #34495e; color: white; padding: 10px; text-align: left; font-weight: 500; white-space: nowrap; }
+        .file-table td { padding: 8px 10px; border-bottom: 1px solid #dee2e6; white-space: nowrap; }
+        .file-table tr:hover td { background-color: #f1f3f4; }
+        .file-change { font-weight: 500; }
+        .file-change.positive { color: #e74c3c; }
+        .file-change.negative { color: #27ae60; }
+        .file-path { font-family: 'SF Mono', 'Monaco', 'Inconsolata', 'Roboto Mono', monospace; font-size: 0.85em; color: #495057; }
+        .timestamp { text-align: center; color: #7f8c8d; margin-top: 30px; font-size: 0.9em; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>📈 IPA体积趋势报告</h1>"""
+    
+    first, last = trend.builds[0], trend.builds[-1]
+    total_change = last['file_size'] - first['file_size']
+    yield f"""
+        <p>共 {len(trend.builds)} 个构建：{html.escape(first['name'])} → {html.escape(last['name'])}，
+        IPA文件大小 {format_size(first['file_size'])} → {format_size(last['file_size'])}
+        （<span class="file-change {change_css_class(total_change)}">{format_change(total_change, STATUS_MODIFIED)}</span>）</p>"""
+    yield from iter_trend_chart(trend)
+    
+    # 每个构建的总体大小
+    yield """
+        <h2>📦 构建总览</h2>
+        <div class="table-wrapper">
+            <table class="file-table">
+                <thead><tr><th>构建</th><th>IPA文件大小</th><th>较上一构建</th><th>解压后大小</th><th>较上一构建</th><th>文件数</th></tr></thead>
+                <tbody>"""
+    previous = None
+    for build in trend.builds:
+        file_change = build['file_size'] - previous['file_size'] if previous else 0
+        size_change = build['total_size'] - previous['total_size'] if previous else 0
+        yield f"""
+                    <tr><td class="file-path">{html.escape(build['name'])}</td><td>{format_size(build['file_size'])}</td>
+                    <td class="file-change {change_css_class(file_change)}">{format_change(file_change, STATUS_MODIFIED) if previous else '-'}</td>
+                    <td>{format_size(build['total_size'])}</td>
+                    <td class="file-change {change_css_class(size_change)}">{format_change(size_change, STATUS_MODIFIED) if previous else '-'}</td>
+                    <td>{build['file_count']}</td></tr>"""
+        previous = build
+    yield """
+                </tbody>
+            </table>
         </div>"""
     
-    html_content += f"""
-        <div class="timestamp">
-            报告生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+    # 分类时间序列
+    header_cells = "".join(f"<th>{html.escape(build['name'])}</th>" for build in trend.builds)
+    yield f"""
+        <h2>📊 按分类的IPA大小（压缩后）</h2>
+        <div class="table-wrapper">
+            <table class="file-table">
+                <thead><tr><th>分类</th>{header_cells}</tr></thead>
+                <tbody>"""
+    for file_type in trend.types:
+        cells = []
+        previous_size = None
+        for build in trend.builds:
+            size = build['by_type'].get(file_type, 0)
+            change = size - previous_size if previous_size is not None else 0
+            title = f' title="{format_change(change, STATUS_MODIFIED)}"' if change else ''
+            cells.append(f'<td class="file-change {change_css_class(change)}"{title}>{format_size(size) if size else "-"}</td>')
+            previous_size = size
+        yield f"""
+                    <tr><td>{html.escape(file_type)}</td>{''.join(cells)}</tr>"""
+    yield """
+                </tbody>
+            </table>
+        </div>"""
+    
+    # 相邻构建之间的主要变化
+    yield """
+        <h2>🔍 相邻构建的主要变化</h2>
+        <div class="table-wrapper">
+            <table class="file-table">
+                <thead><tr><th>构建</th><th>IPA变化</th><th>变化最大的分类</th><th>变化最大的文件</th></tr></thead>
+                <tbody>"""
+    for step in trend.steps:
+        type_text = "<br>".join(f"{html.escape(file_type)} {format_change(change, STATUS_MODIFIED)}"
+                                for file_type, change, _, _ in step['type_changes']) or "-"
+        file_text = "<br>".join(
+            f'<span class="file-path">{html.escape(shorten_display_path(file_info["path"]))}</span> '
+            f'{format_change(file_info["change"], file_info["status"])}'
+            for file_info in step['top_files']) or "-"
+        yield f"""
+                    <tr><td class="file-path">{html.escape(step['old'])} → {html.escape(step['new'])}</td>
+                    <td class="file-change {change_css_class(step['file_size_diff'])}">{format_change(step['file_size_diff'], STATUS_MODIFIED)}</td>
+                    <td>{type_text}</td><td>{file_text}</td></tr>"""
+    yield f"""
+                </tbody>
+            </table>
         </div>
+        <div class="timestamp">报告生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</div>
     </div>
 </body>
 </html>"""
+
+def generate_trend_report(trend, output_dir):
+    """生成趋势报告（HTML）和时间序列（CSV）
     
-    # 写入HTML文件
+    Returns:
+        (html文件路径, csv文件路径)
+    """
+    output_dir = Path(output_dir)
+    html_file_path = output_dir / "ipa_trend_report.html"
+    csv_file_path = output_dir / "ipa_trend.csv"
     with open(html_file_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
-    
-    return str(html_file_path.absolute())
+        for chunk in iter_trend_html(trend):
+            f.write(chunk)
+    write_trend_csv(trend, csv_file_path)
+    return str(html_file_path.absolute()), str(csv_file_path.absolute())
+
+def framework_budget_category(framework_name):
+    """预算中的framework名称（如 Flutter、Flutter.framework）对应的汇总分类"""
+    if framework_name.startswith(FRAMEWORK_CATEGORY_PREFIX):
+        return framework_name
+    return f'{FRAMEWORK_CATEGORY_PREFIX}{shorten_framework_name(framework_name)}'
+
+def scan_build_totals(ipa_path, cache=None, nested_depth=0, nested_budget=NESTED_MEMORY_BUDGET):
+    """扫描单个构建，只返回门禁需要的汇总：(IPA大小, 解压后总大小, 各分类压缩后大小, 各分类解压后大小)
+
+    在子进程中执行时只传回这份汇总，条目表不经过进程间传输，汇总后即释放
+    """
+    table, _, _ = load_or_scan_ipa(ipa_path, cache, None, nested_depth, nested_budget)
+    by_type_compressed, by_type_uncompressed = table.type_totals(aggregate_mode=True)
+    return (get_file_size(ipa_path, table), table.total_size, dict(by_type_compressed), dict(by_type_uncompressed))
+
+def budget_summary(old_totals, new_totals):
+    """新旧构建的体积汇总，格式见 size_budget.evaluate_budget"""
+    old_file_size, old_total_size, old_compressed, old_uncompressed = old_totals
+    new_file_size, new_total_size, new_compressed, new_uncompressed = new_totals
+    summary = {
+        'total': (old_file_size, new_file_size, old_total_size, new_total_size),
+        'categories': {},
+        'frameworks': {},
+    }
+    for file_type in set(old_compressed) | set(new_compressed):
+        scope = 'frameworks' if file_type.startswith(FRAMEWORK_CATEGORY_PREFIX) else 'categories'
+        summary[scope][file_type] = (old_compressed.get(file_type, 0), new_compressed.get(file_type, 0),
+                                     old_uncompressed.get(file_type, 0), new_uncompressed.get(file_type, 0))
+    return summary
+
+def scan_budget_summary(old_ipa_path, new_ipa_path, jobs=1, cache=None, nested_depth=0,
+                        nested_budget=NESTED_MEMORY_BUDGET):
+    """扫描新旧构建，只计算预算检查需要的分类汇总
+
+    不构建 DiffModel（不逐文件比较、不检测移动），不执行内容级分析，也不生成报告；
+    与完整报告共用分析缓存
+    """
+    with analysis_pool(jobs) as executor:
+        futures = [submit_job(executor, scan_build_totals, ipa_path, cache, nested_depth, nested_budget)
+                   for ipa_path in (old_ipa_path, new_ipa_path)]
+        return budget_summary(*(future.result() for future in futures))
+
+def format_budget_check(check):
+    """一项预算检查的输出：范围 名称 上限名称: 实际值 / 上限"""
+    limit = format_size(check['limit'])
+    if check['is_delta']:
+        actual = format_change(check['actual'], STATUS_MODIFIED)
+        if check['limit'] >= 0:
+            limit = f"+{limit}"
+    else:
+        actual = format_size(check['actual'])
+    # framework的分类名称本身带有 "Framework - " 前缀
+    if check['scope'] == 'frameworks':
+        target = check['name']
+    else:
+        target = SCOPE_NAMES[check['scope']] + (f" {check['name']}" if check['name'] else '')
+    return f"{target} {check['limit_key']}: {actual} / 上限 {limit}"
+
+def run_check(args, old_ipa, new_ipa):
+    """门禁模式：检查新构建是否超出预算
+
+    Returns:
+        退出码：通过为0，超出预算为1，预算文件无效为2，分析失败为3（见 size_budget）
+    """
+    try:
+        budget = load_budget(args.check)
+    except BudgetError as e:
+        print(f"错误: 预算文件无效: {e}")
+        return EXIT_INVALID
+    if args.analyze:
+        print("⚠️ 门禁模式不执行内容级分析，已忽略 --analyze")
+
+    cache = None
+    if args.cache_dir:
+        cache = AnalysisCache(args.cache_dir, max_bytes=args.cache_max_mb * 1000 * 1000)
+    try:
+        summary = scan_budget_summary(str(old_ipa), str(new_ipa), jobs=args.jobs, cache=cache,
+                                      nested_depth=args.nested_depth,
+                                      nested_budget=args.nested_budget_mb * 1000 * 1000)
+    except IPAScanError as e:
+        print(f"错误: {e}")
+        return EXIT_ERROR
+    except Exception as e:
+        print(f"错误: 分析IPA失败: {e}")
+        return EXIT_ERROR
+    if is_remote_url(old_ipa) or is_remote_url(new_ipa):
+        evict_block_cache()
+
+    checks, missing = evaluate_budget(budget, summary, framework_budget_category)
+    for scope, name in missing:
+        print(f"⚠️ 新旧构建中都没有{SCOPE_NAMES[scope]}: {name}（按0检查）")
+    violations = [check for check in checks if not check['passed']]
+    for check in checks:
+        print(f"{'✅' if check['passed'] else '❌'} {format_budget_check(check)}")
+
+    if violations:
+        print(f"\n❌ 预算检查未通过: {len(violations)}/{len(checks)} 项超出上限")
+        return EXIT_VIOLATED
+    print(f"\n✅ 预算检查通过: 共 {len(checks)} 项")
+    return EXIT_PASSED
 
 def find_ipa_file(directory):
-    """在指定目录中查找第一个IPA文件"""
+    """在指定目录中查找第一个IPA文件，没有IPA时查找未打包的 .xcarchive 或 .app 目录"""
     directory = Path(directory)
     ipa_files = list(directory.glob("*.ipa"))
     if ipa_files:
         return ipa_files[0]
+    for pattern in ("*.xcarchive", "*.app"):
+        bundles = sorted(path for path in directory.glob(pattern) if path.is_dir())
+        if bundles:
+            return bundles[0]
     return None
 
-def main():
-    """主函数"""
-    current_dir = Path(__file__).parent
+def parse_args(argv=None):
+    """解析命令行参数"""
+    import argparse
+    parser = argparse.ArgumentParser(description="IPA文件大小对比工具")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="并行分析使用的进程数（默认1，串行）")
+    parser.add_argument('--cache-dir', default=None,
+                        help="分析缓存目录，指定后复用已分析过的IPA（如CI中固定的基线包）")
+    parser.add_argument('--cache-max-mb', type=int, default=1000,
+                        help="分析缓存目录的容量上限（MB，默认1000），超出后按LRU淘汰；"
+                             "其中内容级分析结果（content/）最多占1/4，按条目最近使用时间淘汰")
+    parser.add_argument('--top-files', type=int, default=20,
+                        help="每个资源类型最多展示的文件数（默认20）")
+    parser.add_argument('--min-change', type=int, default=1024,
+                        help="文件变化小于该字节数时不展示（默认1024，新增/删除等状态始终展示）")
+    parser.add_argument('--extract-budget-mb', type=int, default=EXTRACT_INFLIGHT_BYTES // (1000 * 1000),
+                        help="内容级分析并行解压时在途数据量的上限（MB，默认%(default)s）")
+    parser.add_argument('--nested-depth', type=int, default=0,
+                        help="展开IPA中嵌套的.zip压缩包的最大层数（默认0，不展开），条目显示为 outer.zip!/inner/path")
+    parser.add_argument('--nested-budget-mb', type=int, default=NESTED_MEMORY_BUDGET // (1000 * 1000),
+                        help="展开嵌套压缩包时的内存预算（MB，默认%(default)s），超出的压缩包不展开")
+    parser.add_argument('--analyze', action='append', default=[],
+                        choices=list(CONTENT_ANALYSES) + ['all'],
+                        help="额外执行的内容级分析，可重复指定；all 表示全部（macho: Mach-O段/节变化，versions: framework版本号，duplicates: 重复资源，images: 图片检查，assets: Assets.car渲染资源，flutter: Flutter快照和flutter_assets，compression: 压缩率和瘦身估算，localization: 按语言的本地化资源和键）")
+    parser.add_argument('--old', default=None,
+                        help="旧版本的输入：IPA文件、http(s) URL、未打包的 .app/.xcarchive 目录或解压后的IPA目录"
+                             "（默认取old目录中的第一个IPA，没有IPA时取第一个 .xcarchive/.app）；"
+                             "URL只通过Range请求读取需要的部分，目录输入的IPA大小为抽样压缩估算值")
+    parser.add_argument('--new', default=None,
+                        help="新版本的输入，格式同 --old（默认取new目录中的第一个IPA，没有IPA时取第一个 .xcarchive/.app）")
+    parser.add_argument('--trend', nargs='+', metavar='输入', default=None,
+                        help="趋势模式：按顺序指定多个输入（IPA、URL、.app/.xcarchive 目录），"
+                             "或包含IPA的普通目录（按文件名自然排序），"
+                             "生成相邻构建的差异和按分类的时间序列（ipa_trend_report.html、ipa_trend.csv）")
+    parser.add_argument('--check', metavar='预算文件', default=None,
+                        help="门禁模式：按JSON预算文件检查总体、分类和framework的大小及变化（格式见 size_budget.py），"
+                             "只计算分类汇总、不生成报告；退出码 0 通过，1 超出预算，2 预算文件无效，3 分析失败")
+    args = parser.parse_args(argv)
+    if args.check and args.trend:
+        parser.error("--check 不能与 --trend 同时使用")
+    if 'all' in args.analyze:
+        args.analyze = list(CONTENT_ANALYSES)
+    else:
+        args.analyze = list(dict.fromkeys(args.analyze))
+    return args
+
+def run_trend(args, output_dir):
+    """趋势模式：分析多个构建并生成趋势报告
+    
+    Returns:
+        退出码：生成报告时返回 EXIT_PASSED；找不到IPA、构建少于2个或任一构建无法解析时返回 EXIT_ERROR，不生成报告
+    """
+    ipa_paths = [str(ipa_path) for ipa_path in collect_trend_builds(args.trend)]
+    missing = [ipa_path for ipa_path in ipa_paths if not is_remote_url(ipa_path) and not Path(ipa_path).exists()]
+    if missing:
+        print(f"错误: 找不到IPA文件: {', '.join(missing)}")
+        return EXIT_ERROR
+    if len(ipa_paths) < 2:
+        print(f"错误: 趋势模式至少需要2个IPA文件，当前找到 {len(ipa_paths)} 个")
+        return EXIT_ERROR
+    
+    print(f"趋势模式: 共 {len(ipa_paths)} 个构建")
+    cache = None
+    if args.cache_dir:
+        cache = AnalysisCache(args.cache_dir, max_bytes=args.cache_max_mb * 1000 * 1000)
+    try:
+        trend = TrendModel(ipa_paths, jobs=args.jobs, cache=cache, significant_change=args.min_change,
+                           nested_depth=args.nested_depth, nested_budget=args.nested_budget_mb * 1000 * 1000)
+    except IPAScanError as e:
+        print(f"错误: {e}")
+        return EXIT_ERROR
+    html_file, csv_file = generate_trend_report(trend, output_dir)
+    if any(is_remote_url(ipa_path) for ipa_path in ipa_paths):
+        evict_block_cache()
+    
+    for step in trend.steps:
+        print(f"  {step['old']} → {step['new']}: IPA {format_change(step['file_size_diff'], STATUS_MODIFIED)}")
+    print(f"\n趋势报告已保存到: {html_file}")
+    print(f"时间序列已保存到: {csv_file}")
+    return EXIT_PASSED
+
+def resolve_inputs(args, current_dir):
+    """确定新旧版本的输入：命令行指定时优先（可以是远程URL），否则取old、new目录中的第一个IPA
+
+    Returns:
+        (旧版本, 新版本)，找不到时打印错误并返回None
+    """
     old_dir = current_dir / "old"
     new_dir = current_dir / "new"
-    result_file = current_dir / "result.txt"
-    
-    # 自动查找IPA文件
-    old_ipa = find_ipa_file(old_dir)
-    new_ipa = find_ipa_file(new_dir)
+    old_ipa = args.old or find_ipa_file(old_dir)
+    new_ipa = args.new or find_ipa_file(new_dir)
     
     # 检查文件是否存在
     if not old_ipa:
         print(f"错误: 在old目录中找不到IPA文件: {old_dir}")
-        return
+        return None
     
     if not new_ipa:
         print(f"错误: 在new目录中找不到IPA文件: {new_dir}")
-        return
+        return None
+    
+    for ipa_path in (old_ipa, new_ipa):
+        if not is_remote_url(ipa_path) and not Path(ipa_path).exists():
+            print(f"错误: 找不到IPA文件: {ipa_path}")
+            return None
     
-    print(f"找到旧版本IPA: {old_ipa.name}")
-    print(f"找到新版本IPA: {new_ipa.name}")
+    print(f"找到旧版本IPA: {Path(old_ipa).name if not is_remote_url(old_ipa) else old_ipa}")
+    print(f"找到新版本IPA: {Path(new_ipa).name if not is_remote_url(new_ipa) else new_ipa}")
+    return old_ipa, new_ipa
+
+def main():
+    """主函数"""
+    args = parse_args()
+    current_dir = Path(__file__).parent
+    if args.cache_dir:
+        # 远程IPA的块缓存放在缓存目录下，进程池中的子进程通过环境变量继承
+        os.environ.setdefault(BLOCK_CACHE_ENV, str(Path(args.cache_dir) / "blocks"))
+    if args.trend:
+        sys.exit(run_trend(args, current_dir))
+    result_file = current_dir / "result.txt"
+    
+    inputs = resolve_inputs(args, current_dir)
+    if args.check:
+        sys.exit(run_check(args, *inputs) if inputs else EXIT_ERROR)
+    if not inputs:
+        return
+    old_ipa, new_ipa = inputs
     
     print("开始比较IPA文件...")
     
     try:
         # 执行比较
-        report = compare_ipa_files(str(old_ipa), str(new_ipa))
-        
-        # 保存结果到文件
-        with open(result_file, 'w', encoding='utf-8') as f:
-            f.write(report)
+        cache = None
+        if args.cache_dir:
+            cache = AnalysisCache(args.cache_dir, max_bytes=args.cache_max_mb * 1000 * 1000)
+        content_cache = ContentResultCache(
+            args.cache_dir, max_bytes=int(args.cache_max_mb * 1000 * 1000 * CONTENT_CACHE_SHARE))
+        # 报告边生成边写入临时文件，比较成功后再替换，失败时保留上一次的结果
+        tmp_file = result_file.with_name(f"{result_file.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                line_count = compare_ipa_files(str(old_ipa), str(new_ipa), jobs=args.jobs, cache=cache, output=f,
+                                               max_files_per_type=args.top_files,
+                                               significant_change=args.min_change,
+                                               analyses=args.analyze, content_cache=content_cache,
+                                               max_inflight_bytes=args.extract_budget_mb * 1000 * 1000,
+                                               nested_depth=args.nested_depth,
+                                               nested_budget=args.nested_budget_mb * 1000 * 1000)
+            os.replace(tmp_file, result_file)
+        finally:
+            AnalysisCache._remove(tmp_file)
         
+        if is_remote_url(old_ipa) or is_remote_url(new_ipa):
+            evict_block_cache()
         print(f"\n比较完成！结果已保存到: {result_file}")
         
         # 尝试自动打开HTML报告
@@ -1179,7 +3654,6 @@ def main():
         if html_file.exists():
             try:
                 import subprocess
-                import sys
                 if sys.platform == "darwin":  # macOS
                     subprocess.run(["open", str(html_file)], check=False)
                     print(f"✅ 已在默认浏览器中打开HTML报告")
@@ -1197,14 +3671,20 @@ def main():
         print("报告预览:")
         print("="*50)
         
-        # 显示报告的前几行
-        lines = report.split('\n')
-        for i, line in enumerate(lines[:20]):  # 显示前20行
-            print(line)
+        # 显示报告的前几行（只读取前20行，不加载整个文件）
+        with open(result_file, 'r', encoding='utf-8') as f:
+            for i, line in enumerate(f):
+                if i >= 20:  # 显示前20行
+                    break
+                print(line.rstrip('\n'))
         
-        if len(lines) > 20:
-            print(f"\n... (完整报告共 {len(lines)} 行，请查看 result.txt 文件)")
+        if line_count > 20:
+            print(f"\n... (完整报告共 {line_count} 行，请查看 result.txt 文件)")
             
+    except IPAScanError as e:
+        # 任一版本无法解析时不生成报告（否则会显示为体积减少100%）
+        print(f"错误: {e}")
+        sys.exit(EXIT_ERROR)
     except Exception as e:
         print(f"比较过程中出错: {e}")
         import traceback
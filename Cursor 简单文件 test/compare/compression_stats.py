@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+压缩效率统计
+只根据中央目录中的压缩方式、解压前后大小判断压缩是否合理，
+并按Assets.car中的渲染资源估算App Store按设备瘦身（App Thinning）后移除的多倍率/多设备图片
+"""
+
+import zipfile
+
+from car_parser import ATTRIBUTE_IDIOM, ATTRIBUTE_SCALE
+
+METHOD_NAMES = {
+    zipfile.ZIP_STORED: 'stored',
+    zipfile.ZIP_DEFLATED: 'deflate',
+    9: 'deflate64',
+    zipfile.ZIP_BZIP2: 'bzip2',
+    zipfile.ZIP_LZMA: 'lzma',
+    93: 'zstd',
+    95: 'xz',
+}
+
+# 本身已压缩的格式，再用deflate几乎没有收益，只增加安装时的解压开销
+PRECOMPRESSED_EXTENSIONS = (
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.heic', '.heif',
+    '.mp3', '.m4a', '.aac', '.mp4', '.m4v', '.mov',
+    '.zip', '.gz', '.bz2', '.xz', '.br', '.lz4', '.woff', '.woff2',
+)
+# 压缩率通常较高的格式；没有扩展名的文件（可执行文件、CodeResources等）同样视为可压缩
+COMPRESSIBLE_EXTENSIONS = (
+    '.json', '.plist', '.strings', '.stringsdict', '.js', '.html', '.htm', '.css', '.xml', '.txt',
+    '.svg', '.csv', '.yaml', '.yml', '.md', '.ttf', '.otf', '.nib', '.mom', '.omo', '.dylib', '.a',
+)
+
+# 压缩后大小不低于解压后大小的该比例，视为压缩无效
+INEFFECTIVE_RATIO = 0.98
+# 同类型文件没有可参考的deflate压缩率时使用的估计值
+DEFAULT_DEFLATE_RATIO = 0.4
+
+# App Thinning 为iPhone选择渲染资源时优先的设备（Assets.car中的idiom），都没有时该资源不会下发到iPhone
+THINNING_IDIOMS = ('iphone', 'universal')
+THINNING_SCALE = 3
+
+def method_name(method):
+    """压缩方式编号（ZipInfo.compress_type）对应的名称"""
+    return METHOD_NAMES.get(method, f'method{method}')
+
+def file_extension(file_path):
+    """小写的文件扩展名，没有扩展名时返回空字符串"""
+    name = file_path.rsplit('/', 1)[-1]
+    _, dot, extension = name.rpartition('.')
+    return f'.{extension.lower()}' if dot and _ else ''
+
+def is_precompressed(file_path):
+    return file_extension(file_path) in PRECOMPRESSED_EXTENSIONS
+
+def is_compressible(file_path):
+    extension = file_extension(file_path)
+    return extension == '' or extension in COMPRESSIBLE_EXTENSIONS
+
+def thinning_removals(renditions):
+    """估算为iPhone @3x设备瘦身时从Assets.car中移除的渲染资源
+
+    App Thinning 只作用于Asset Catalog：同一资源（名称和除倍率、设备外的其他属性都相同）
+    按设备只保留 iphone（没有时 universal）的渲染资源，再按倍率只保留@3x（没有时保留最大倍率）；
+    没有倍率的渲染资源（PDF、颜色、数据等）不按倍率移除。
+    bundle中单独存放的 @2x/@3x、~ipad 图片会下发到所有设备，不参与估算
+
+    Args:
+        renditions: car_parser.parse_car 返回的渲染资源列表
+
+    Returns:
+        (移除的渲染资源数, 移除的大小)
+    """
+    groups = {}  # (资源名称, 其他属性) -> [(倍率, 设备, 大小)]
+    for name, _, scale, idiom, _, _, _, size, attribute_key in renditions or ():
+        traits = tuple(item for item in attribute_key if item[0] not in (ATTRIBUTE_SCALE, ATTRIBUTE_IDIOM))
+        groups.setdefault((name, traits), []).append((scale, idiom, size))
+
+    removed_count = removed_size = 0
+    for group in groups.values():
+        kept_idiom = next((idiom for idiom in THINNING_IDIOMS if any(item[1] == idiom for item in group)), None)
+        kept = [item for item in group if item[1] == kept_idiom]
+        scales = {item[0] for item in kept if item[0]}
+        kept_scale = THINNING_SCALE if THINNING_SCALE in scales else max(scales, default=0)
+        for scale, idiom, size in group:
+            if idiom != kept_idiom or (scale and scale != kept_scale):
+                removed_count += 1
+                removed_size += size
+    return removed_count, removed_size
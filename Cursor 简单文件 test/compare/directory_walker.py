@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+目录输入（未打包的 .app、.xcarchive 或解压后的IPA目录）
+用 os.scandir 并行遍历目录，生成与IPA中央目录相同的条目（路径映射为 Payload/<App>.app/...），
+CRC32按完整内容计算，IPA中的压缩后大小按抽样deflate估算，不需要先打包成IPA
+"""
+
+import hashlib
+import io
+import os
+import stat
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+APP_SUFFIX = '.app'
+XCARCHIVE_SUFFIX = '.xcarchive'
+
+# 读取文件的块大小
+READ_CHUNK_SIZE = 1024 * 1024
+# 不超过该大小的文件整体压缩，得到准确的deflate大小
+SAMPLE_FULL_LIMIT = 256 * 1024
+# 更大的文件均匀抽取的样本数和每个样本的大小
+SAMPLE_COUNT = 8
+SAMPLE_SIZE = 32 * 1024
+# 与Xcode导出IPA相同的deflate压缩级别
+DEFLATE_LEVEL = 6
+# 并行遍历的线程数（读文件和zlib都会释放GIL）
+WALK_WORKERS = min(8, os.cpu_count() or 1)
+
+# ZIP中每个条目的固定开销：本地文件头(30) + 中央目录记录(46)，文件名各存一份；EOCD(22)
+ZIP_LOCAL_HEADER_SIZE = 30
+ZIP_CENTRAL_HEADER_SIZE = 46
+ZIP_EOCD_SIZE = 22
+
+class DirectoryInputError(Exception):
+    """目录输入无效（如 .xcarchive 中没有 .app）"""
+
+def is_directory_input(path):
+    return isinstance(path, (str, os.PathLike)) and os.path.isdir(path)
+
+def bundle_root(directory):
+    """目录输入对应的根目录和条目路径前缀
+
+    .app 映射为 Payload/<App>.app/；.xcarchive 取 Products/Applications 下的 .app；
+    其他目录（如解压后的IPA，包含Payload）按相对路径
+    """
+    directory = Path(directory)
+    if directory.name.endswith(XCARCHIVE_SUFFIX):
+        apps = sorted((directory / 'Products' / 'Applications').glob(f'*{APP_SUFFIX}'))
+        if not apps:
+            raise DirectoryInputError(f"xcarchive中没有找到.app: {directory}")
+        directory = apps[0]
+    if directory.name.endswith(APP_SUFFIX):
+        return directory, f'Payload/{directory.name}/'
+    return directory, ''
+
+def _sampled_digest(file_path, size):
+    """读取整个文件计算CRC32，并抽样估算deflate压缩后的大小
+
+    Returns:
+        (CRC32, 估算的压缩后大小)
+    """
+    crc = 0
+    if size <= SAMPLE_FULL_LIMIT:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15)
+        compressed_size = len(compressor.compress(data)) + len(compressor.flush())
+        return zlib.crc32(data), min(size, compressed_size)
+
+    # 每隔 stride 个样本块抽取一块，各自独立压缩
+    sample_blocks = -(-size // SAMPLE_SIZE)
+    stride = max(1, sample_blocks // SAMPLE_COUNT)
+    sampled = sampled_compressed = 0
+    block_index = 0
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+            for offset in range(0, len(chunk), SAMPLE_SIZE):
+                if block_index % stride == 0:
+                    sample = chunk[offset:offset + SAMPLE_SIZE]
+                    compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15)
+                    sampled += len(sample)
+                    sampled_compressed += len(compressor.compress(sample)) + len(compressor.flush())
+                block_index += 1
+    estimated = -(-size * sampled_compressed // sampled) if sampled else size
+    return crc, min(size, estimated)
+
+def _scan_directory(directory, prefix):
+    """扫描一层目录
+
+    Returns:
+        (条目列表, 子目录列表)；条目为 (file_path, 大小, 估算的压缩后大小, CRC32, 压缩方式)
+    """
+    entries = []
+    subdirectories = []
+    with os.scandir(directory) as iterator:
+        for dir_entry in iterator:
+            file_path = prefix + dir_entry.name
+            if dir_entry.is_symlink():
+                # 与 zip -y 一致：符号链接以链接目标作为内容
+                target = os.readlink(dir_entry.path).encode('utf-8')
+                entries.append((file_path, len(target), len(target), zlib.crc32(target), zipfile.ZIP_STORED))
+            elif dir_entry.is_dir(follow_symlinks=False):
+                subdirectories.append((dir_entry.path, file_path + '/'))
+            elif dir_entry.is_file(follow_symlinks=False):
+                size = dir_entry.stat(follow_symlinks=False).st_size
+                crc, compressed_size = _sampled_digest(dir_entry.path, size)
+                entries.append((file_path, size, compressed_size, crc, zipfile.ZIP_DEFLATED))
+    return entries, subdirectories
+
+def walk_directory(directory, workers=WALK_WORKERS):
+    """并行遍历目录输入，生成与IPA中央目录相同格式的条目
+
+    每个子目录作为一个任务提交到线程池，任务完成后继续提交其子目录
+
+    Returns:
+        按路径排序的条目列表：[(file_path, 解压后大小, 估算的压缩后大小, CRC32, 压缩方式)]
+    """
+    root, prefix = bundle_root(directory)
+    entries = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = [executor.submit(_scan_directory, root, prefix)]
+        while pending:
+            future = pending.pop()
+            directory_entries, subdirectories = future.result()
+            entries.extend(directory_entries)
+            for subdirectory, sub_prefix in subdirectories:
+                pending.append(executor.submit(_scan_directory, subdirectory, sub_prefix))
+    entries.sort()
+    return entries
+
+def directory_fingerprint(directory):
+    """目录输入的指纹：所有文件的相对路径、大小和mtime的哈希（只stat，不读取内容）"""
+    root, prefix = bundle_root(directory)
+    records = []
+    pending = [(str(root), prefix)]
+    while pending:
+        current, current_prefix = pending.pop()
+        with os.scandir(current) as iterator:
+            for dir_entry in iterator:
+                file_stat = dir_entry.stat(follow_symlinks=False)
+                if stat.S_ISDIR(file_stat.st_mode):
+                    pending.append((dir_entry.path, current_prefix + dir_entry.name + '/'))
+                else:
+                    records.append(f"{current_prefix}{dir_entry.name}|{file_stat.st_size}|{file_stat.st_mtime_ns}")
+    records.sort()
+    digest = hashlib.sha1('\n'.join(records).encode('utf-8', 'surrogateescape')).hexdigest()
+    return f"dir-{len(records)}-{digest}"
+
+def estimated_archive_size(paths, compressed_total):
+    """按条目估算打包成IPA后的文件大小：压缩后大小 + 每个条目的ZIP头开销"""
+    overhead = sum(ZIP_LOCAL_HEADER_SIZE + ZIP_CENTRAL_HEADER_SIZE + 2 * len(file_path.encode('utf-8'))
+                   for file_path in paths)
+    return compressed_total + overhead + ZIP_EOCD_SIZE
+
+class DirectoryArchive:
+    """以 ZipFile 的接口（getinfo/open/read）访问目录输入中的文件，供内容级分析按需读取"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.root, self.prefix = bundle_root(directory)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        pass
+
+    def _real_path(self, file_path):
+        if not file_path.startswith(self.prefix):
+            raise KeyError(f"目录中没有该条目: {file_path}")
+        return self.root / file_path[len(self.prefix):]
+
+    def getinfo(self, file_path):
+        """返回条目的ZipInfo（文件直接读取，压缩方式为stored）"""
+        real_path = self._real_path(file_path)
+        try:
+            file_stat = os.lstat(real_path)
+        except OSError:
+            raise KeyError(f"目录中没有该条目: {file_path}")
+        info = zipfile.ZipInfo(file_path)
+        info.file_size = info.compress_size = (len(os.readlink(real_path).encode('utf-8'))
+                                               if stat.S_ISLNK(file_stat.st_mode) else file_stat.st_size)
+        info.compress_type = zipfile.ZIP_STORED
+        return info
+
+    def open(self, info):
+        if isinstance(info, str):
+            info = self.getinfo(info)
+        real_path = self._real_path(info.filename)
+        if os.path.islink(real_path):
+            return io.BytesIO(os.readlink(real_path).encode('utf-8'))
+        return open(real_path, 'rb')
+
+    def read(self, info):
+        with self.open(info) as f:
+            return f.read()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Flutter 产物分析
+App.framework/App 是Dart AOT快照编译成的Mach-O，按导出符号拆分为VM/Isolate的数据和指令部分；
+flutter_assets 下的文件按Dart包归类
+"""
+
+from macho_parser import parse_macho
+
+# AOT快照的导出符号及对应的展示名称
+SNAPSHOT_PARTS = [
+    ('_kDartVmSnapshotData', 'VM快照数据'),
+    ('_kDartVmSnapshotInstructions', 'VM快照指令'),
+    ('_kDartIsolateSnapshotData', 'Isolate快照数据'),
+    ('_kDartIsolateSnapshotInstructions', 'Isolate快照指令'),
+]
+OTHER_PART = '其他（Mach-O头、符号表等）'
+
+def snapshot_layout(stream, total_size):
+    """按快照符号拆分App二进制的大小
+
+    符号大小为同一节内相邻符号的地址差，切片中剩余的部分计入"其他"
+
+    Returns:
+        {部分: 大小}，多架构时部分名称带架构前缀；没有快照符号时返回None
+    """
+    slices = parse_macho(stream, total_size, with_symbols=True)
+    layout = {}
+    for macho_slice in slices:
+        sizes = {symbol['name']: symbol['size'] for symbol in macho_slice['symbols']}
+        if not any(name in sizes for name, _ in SNAPSHOT_PARTS):
+            continue
+        prefix = f"{macho_slice['arch']} " if len(slices) > 1 else ''
+        known_size = 0
+        for name, label in SNAPSHOT_PARTS:
+            size = sizes.get(name, 0)
+            layout[prefix + label] = size
+            known_size += size
+        layout[prefix + OTHER_PART] = max(0, macho_slice['size'] - known_size)
+    return layout or None
+
+def flutter_assets_group(file_path):
+    """flutter_assets下文件的归属
+
+    packages/<包名>/ 下的文件归到 package:<包名>，其余按第一级目录（assets/、fonts/、shaders/）或文件名
+
+    Returns:
+        归属名称，不在flutter_assets下时返回None
+    """
+    _, sep, asset_path = file_path.partition('flutter_assets/')
+    if not sep:
+        return None
+    if asset_path.startswith('packages/'):
+        package_name = asset_path.split('/', 2)[1]
+        return f'package:{package_name}'
+    head, sep, _ = asset_path.partition('/')
+    return head + '/' if sep else head
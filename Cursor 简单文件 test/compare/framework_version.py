@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Framework 版本号提取
+优先读取 Info.plist 中的 CFBundleShortVersionString；
+没有plist（或plist中没有版本号）时，分块扫描二进制中的字符串，
+规则与 get_framework_version.sh 中的 strings | grep 一致
+"""
+
+import re
+import plistlib
+
+# 版本号形式：1.2 / 1.2.3
+VERSION_PATTERN = re.compile(rb'\d+\.\d+(?:\.\d+)?')
+# 纯版本号字符串（可带v前缀）
+BARE_VERSION_PATTERN = re.compile(r'v?(\d+\.\d+(?:\.\d+)?)')
+# Xcode 生成的版本字符串："@(#)PROGRAM:Foo  PROJECT:Foo-1.2.3"
+PROJECT_PATTERN = re.compile(rb'PROJECT:[\x21-\x7e]+?-(\d+(?:\.\d+)+)')
+# 与脚本中 grep -v 相同的排除规则：编译器、系统版本等无关字符串
+EXCLUDED_PATTERN = re.compile(r'Apple clang|iPhoneOS[0-9]|Mac OS X|Darwin|Mozilla|arm64|_types|dispatch|objc')
+
+# 版本号前后最多向外扩展的可打印字符数
+MAX_STRING_CONTEXT = 128
+_PRINTABLE_AFTER = re.compile(rb'[\x20-\x7e]{0,%d}' % MAX_STRING_CONTEXT)
+_PRINTABLE_BEFORE = re.compile(rb'[\x20-\x7e]{0,%d}\Z' % MAX_STRING_CONTEXT)
+
+# 分块读取的大小，以及块之间保留的重叠字节数（避免字符串被块边界截断）
+CHUNK_SIZE = 1024 * 1024
+CHUNK_OVERLAP = 2 * MAX_STRING_CONTEXT + 64
+
+# 最多保留的候选版本号个数
+MAX_CANDIDATES = 5
+
+def plist_version(data):
+    """从Info.plist内容（XML或二进制格式）中读取版本号，读取失败时返回None"""
+    try:
+        info = plistlib.loads(data)
+    except Exception:
+        return None
+    if not isinstance(info, dict):
+        return None
+    version = info.get('CFBundleShortVersionString')
+    return str(version) if version else None
+
+def _string_around(buffer, start, end):
+    """取出包含 buffer[start:end] 的可打印字符串（两侧各最多扩展 MAX_STRING_CONTEXT 字节）"""
+    before = _PRINTABLE_BEFORE.search(buffer, max(0, start - MAX_STRING_CONTEXT), start)
+    after = _PRINTABLE_AFTER.match(buffer, end)
+    return buffer[before.start():after.end()].decode('ascii')
+
+def _scan_chunk(buffer, framework_name, candidates):
+    for match in PROJECT_PATTERN.finditer(buffer):
+        candidates[match.group(1).decode('ascii')] = 0
+
+    name_lower = framework_name.lower()
+    for match in VERSION_PATTERN.finditer(buffer):
+        string = _string_around(buffer, match.start(), match.end())
+        if EXCLUDED_PATTERN.search(string):
+            continue
+        version = match.group(0).decode('ascii')
+        if name_lower and name_lower in string.lower():
+            # 与framework同名的字符串中的版本号
+            priority = 1
+        elif BARE_VERSION_PATTERN.fullmatch(string.strip()):
+            priority = 2
+        else:
+            continue
+        if candidates.get(version, priority + 1) > priority:
+            candidates[version] = priority
+
+def scan_binary_versions(stream, framework_name, chunk_size=CHUNK_SIZE):
+    """分块扫描二进制中的版本号字符串
+
+    压缩的ZIP条目无法mmap，按块流式读取，内存占用与文件大小无关
+
+    Args:
+        stream: 支持read的文件对象（如ZipFile.open返回的对象）
+        framework_name: framework名称，包含该名称的字符串优先
+
+    Returns:
+        候选版本号列表，按可信度排序：PROJECT版本字符串 > 含framework名称的字符串 > 纯版本号字符串
+    """
+    candidates = {}  # {版本号: 优先级}，字典保留首次出现的顺序
+    tail = b''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer = tail + chunk
+        _scan_chunk(buffer, framework_name, candidates)
+        tail = buffer[-CHUNK_OVERLAP:]
+
+    ordered = sorted(candidates.items(), key=lambda item: item[1])
+    return [version for version, _ in ordered[:MAX_CANDIDATES]]
+
+def version_key(version):
+    """将版本号转换为可比较的元组，无法解析时返回None"""
+    try:
+        return tuple(int(part) for part in version.split('.'))
+    except (AttributeError, ValueError):
+        return None
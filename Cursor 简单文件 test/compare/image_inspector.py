@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片资源检查
+从文件头读取PNG/JPEG/WebP的尺寸、位深和透明通道，只读取到像素数据之前；
+安装了Pillow时可以估算PNG无损重新压缩后的大小
+"""
+
+import io
+import re
+import struct
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+PILLOW_AVAILABLE = Image is not None
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# PNG文件头中IDAT之前最多遍历的chunk数
+MAX_PNG_CHUNKS = 64
+# JPEG中SOF之前最多遍历的段数
+MAX_JPEG_SEGMENTS = 64
+
+# 最大的iOS屏幕（13英寸iPad，单位：点）。
+# 按倍率换算后的逻辑尺寸仍超过整块屏幕的图片，在任何设备上都会被缩小显示
+MAX_SCREEN_POINTS = (1032, 1376)
+
+# Pillow重新编码PNG时无法原样保留的模式（16位灰度、32位整数）
+LOSSY_ROUND_TRIP_MODES = ('I;16', 'I;16B', 'I;16L', 'I')
+
+# 文件名中的倍率（icon@2x.png）和Flutter资源目录中的倍率（assets/3.0x/icon.png）
+_NAME_SCALE_PATTERN = re.compile(r'@(\d+(?:\.\d+)?)x(?:~\w+)?\.[^./]+$')
+_DIR_SCALE_PATTERN = re.compile(r'/(\d+(?:\.\d+)?)x/[^/]+$')
+
+class ImageFormatError(Exception):
+    """图片文件头格式错误"""
+
+class _HeaderReader:
+    """在已读取的前缀之后继续从流中读取"""
+
+    def __init__(self, prefix, stream):
+        self.buffer = prefix
+        self.stream = stream
+
+    def read(self, size):
+        if self.buffer:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+            if len(data) < size:
+                data += self.stream.read(size - len(data))
+        else:
+            data = self.stream.read(size)
+        if len(data) != size:
+            raise ImageFormatError("文件被截断")
+        return data
+
+    def skip(self, size):
+        # 压缩流只能顺序读取，分块读过需要跳过的数据
+        while size > 0:
+            step = min(size, 64 * 1024)
+            self.read(step)
+            size -= step
+
+def _png_header(reader):
+    reader.read(8)  # 签名
+    header = None
+    crushed = False
+    alpha = False
+    for _ in range(MAX_PNG_CHUNKS):
+        length, chunk_type = struct.unpack('>I4s', reader.read(8))
+        if chunk_type == b'IHDR':
+            width, height, bit_depth, color_type = struct.unpack('>IIBB', reader.read(10))
+            reader.skip(length - 10 + 4)
+            header = {'format': 'PNG', 'width': width, 'height': height, 'bit_depth': bit_depth}
+            alpha = color_type in (4, 6)
+            continue
+        if chunk_type in (b'IDAT', b'IEND'):
+            break
+        if chunk_type == b'CgBI':
+            # Xcode压缩过的PNG（私有格式，通用解码器无法读取）
+            crushed = True
+        elif chunk_type == b'tRNS':
+            alpha = True
+        reader.skip(length + 4)
+    if header is None:
+        raise ImageFormatError("缺少IHDR")
+    header['alpha'] = alpha
+    header['crushed'] = crushed
+    return header
+
+def _jpeg_header(reader):
+    reader.read(2)  # SOI
+    for _ in range(MAX_JPEG_SEGMENTS):
+        marker = reader.read(2)
+        while marker[1] == 0xFF:
+            # 填充字节
+            marker = marker[1:] + reader.read(1)
+        if marker[0] != 0xFF:
+            raise ImageFormatError("无效的JPEG标记")
+        code = marker[1]
+        if code == 0x01 or 0xD0 <= code <= 0xD8:
+            continue
+        length = struct.unpack('>H', reader.read(2))[0]
+        # SOF0~SOF15（C4/C8/CC不是帧头）
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            bit_depth, height, width, components = struct.unpack('>BHHB', reader.read(6))
+            return {'format': 'JPEG', 'width': width, 'height': height,
+                    'bit_depth': bit_depth, 'alpha': False, 'components': components}
+        if code == 0xDA:
+            break
+        reader.skip(length - 2)
+    raise ImageFormatError("缺少SOF")
+
+def _webp_header(reader):
+    reader.read(12)  # RIFF size WEBP
+    chunk_type, _ = struct.unpack('<4sI', reader.read(8))
+    if chunk_type == b'VP8X':
+        data = reader.read(10)
+        width = int.from_bytes(data[4:7], 'little') + 1
+        height = int.from_bytes(data[7:10], 'little') + 1
+        return {'format': 'WebP', 'width': width, 'height': height, 'bit_depth': 8,
+                'alpha': bool(data[0] & 0x10)}
+    if chunk_type == b'VP8L':
+        data = reader.read(5)
+        if data[0] != 0x2F:
+            raise ImageFormatError("无效的VP8L签名")
+        bits = int.from_bytes(data[1:5], 'little')
+        return {'format': 'WebP', 'width': (bits & 0x3FFF) + 1, 'height': ((bits >> 14) & 0x3FFF) + 1,
+                'bit_depth': 8, 'alpha': bool((bits >> 28) & 1)}
+    if chunk_type == b'VP8 ':
+        data = reader.read(10)
+        if data[3:6] != b'\x9d\x01\x2a':
+            raise ImageFormatError("无效的VP8起始码")
+        width, height = struct.unpack('<HH', data[6:10])
+        return {'format': 'WebP', 'width': width & 0x3FFF, 'height': height & 0x3FFF,
+                'bit_depth': 8, 'alpha': False}
+    raise ImageFormatError(f"未知的WebP chunk: {chunk_type!r}")
+
+def read_image_header(stream):
+    """从流中读取图片文件头
+
+    只读取到像素数据之前（PNG读到IDAT，JPEG读到SOF），对压缩流只需要部分解压
+
+    Returns:
+        {'format', 'width', 'height', 'bit_depth', 'alpha', ...}，不是支持的图片格式时返回None
+    """
+    prefix = stream.read(12)
+    reader = _HeaderReader(prefix, stream)
+    if prefix[:8] == PNG_SIGNATURE:
+        return _png_header(reader)
+    if prefix[:3] == b'\xff\xd8\xff':
+        return _jpeg_header(reader)
+    if prefix[:4] == b'RIFF' and prefix[8:12] == b'WEBP':
+        return _webp_header(reader)
+    return None
+
+def image_scale(file_path):
+    """从文件名（@2x/@3x）或Flutter资源目录（2.0x/3.0x）中获取图片倍率，默认为1"""
+    match = _NAME_SCALE_PATTERN.search(file_path) or _DIR_SCALE_PATTERN.search(file_path)
+    if match:
+        scale = float(match.group(1))
+        if scale > 0:
+            return scale
+    return 1.0
+
+def logical_size(header, scale):
+    """图片按倍率换算后的逻辑尺寸（点）"""
+    return header['width'] / scale, header['height'] / scale
+
+def is_oversized(header, scale):
+    """按倍率换算后仍大于最大的iOS屏幕，即像素远超@3x设备所需"""
+    width, height = logical_size(header, scale)
+    short_side, long_side = sorted((width, height))
+    return short_side > MAX_SCREEN_POINTS[0] or long_side > MAX_SCREEN_POINTS[1]
+
+def png_recompressed_size(data):
+    """用Pillow以最高压缩级别无损重新编码PNG，返回编码后的大小
+
+    像素数据不变，只丢弃非必要的元数据chunk。Pillow无法原样保存的图片（16位、带tRNS的调色板等）
+    重新编码会损失信息，不做估算；编码后再解码，像素或调色板与原图不同时同样不做估算。
+    没有Pillow或无法解码时返回None
+    """
+    if Image is None:
+        return None
+    # IHDR固定为第一个chunk，第24字节为位深
+    if data[12:16] == b'IHDR' and len(data) > 24 and data[24] > 8:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.mode in LOSSY_ROUND_TRIP_MODES or (image.mode == 'P' and 'transparency' in image.info):
+                return None
+            output = io.BytesIO()
+            image.save(output, format='PNG', optimize=True)
+            output.seek(0)
+            with Image.open(output) as reencoded:
+                if (reencoded.mode != image.mode or reencoded.size != image.size
+                        or reencoded.tobytes() != image.tobytes()
+                        or (image.mode == 'P' and reencoded.getpalette() != image.getpalette())):
+                    return None
+    except Exception:
+        return None
+    return len(output.getvalue())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mach-O 头部解析
+只读取文件头、fat架构表和load commands，统计每个架构切片的段/节大小，
+不需要读取（解压）二进制的正文部分
+"""
+
+import struct
+
+MH_MAGIC = 0xfeedface
+MH_CIGAM = 0xcefaedfe
+MH_MAGIC_64 = 0xfeedfacf
+MH_CIGAM_64 = 0xcffaedfe
+FAT_MAGIC = 0xcafebabe
+FAT_MAGIC_64 = 0xcafebabf
+
+LC_SEGMENT = 0x1
+LC_SYMTAB = 0x2
+LC_SEGMENT_64 = 0x19
+
+# nlist.n_type 中的标志位
+N_STAB = 0xe0
+N_TYPE = 0x0e
+N_SECT = 0xe
+N_EXT = 0x01
+
+CPU_ARCH_ABI64 = 0x01000000
+CPU_ARCH_ABI64_32 = 0x02000000
+CPU_TYPE_X86 = 7
+CPU_TYPE_ARM = 12
+
+# load commands总大小的上限，超过视为损坏的文件
+MAX_SIZEOFCMDS = 16 * 1024 * 1024
+# fat架构数的上限
+MAX_FAT_ARCHS = 64
+
+THIN_MAGICS = (MH_MAGIC, MH_CIGAM, MH_MAGIC_64, MH_CIGAM_64)
+FAT_MAGICS = (FAT_MAGIC, FAT_MAGIC_64)
+
+class MachOError(Exception):
+    """Mach-O 格式错误"""
+
+def is_macho_prefix(prefix):
+    """根据文件开头4个字节判断是否为Mach-O（thin或fat）"""
+    if len(prefix) < 4:
+        return False
+    magic_be = struct.unpack('>I', prefix[:4])[0]
+    if magic_be in FAT_MAGICS:
+        # Java class文件同样以0xcafebabe开头，但不会出现在IPA中需要解析的位置
+        return True
+    magic_le = struct.unpack('<I', prefix[:4])[0]
+    return magic_le in THIN_MAGICS
+
+def arch_name(cputype, cpusubtype):
+    """将cputype/cpusubtype转换成常见的架构名称"""
+    subtype = cpusubtype & 0x00ffffff
+    if cputype == CPU_TYPE_ARM | CPU_ARCH_ABI64:
+        return 'arm64e' if subtype == 2 else 'arm64'
+    if cputype == CPU_TYPE_ARM | CPU_ARCH_ABI64_32:
+        return 'arm64_32'
+    if cputype == CPU_TYPE_ARM:
+        return {9: 'armv7', 11: 'armv7s', 12: 'armv7k'}.get(subtype, 'arm')
+    if cputype == CPU_TYPE_X86 | CPU_ARCH_ABI64:
+        return 'x86_64'
+    if cputype == CPU_TYPE_X86:
+        return 'i386'
+    return f'cpu{cputype}'
+
+def _read_exact(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise MachOError("文件被截断")
+    return data
+
+def _cstring(raw):
+    return raw.split(b'\0', 1)[0].decode('ascii', 'replace')
+
+def _read_symbols(stream, endian, is_64, symtab, sections, slice_offset, slice_size, position):
+    """读取符号表中定义在section内的外部符号，并按相邻符号的地址差计算大小
+
+    position为stream当前位置；符号表和字符串表按偏移顺序读取，压缩流中只向前seek
+    """
+    symoff, nsyms, stroff, strsize = symtab
+    nlist_format, nlist_size = (endian + 'IBBHQ', 16) if is_64 else (endian + 'IBBHI', 12)
+    if symoff + nsyms * nlist_size > slice_size or stroff + strsize > slice_size:
+        raise MachOError("符号表越界")
+
+    tables = {}
+    for name, offset, size in sorted((('symbols', symoff, nsyms * nlist_size), ('strings', stroff, strsize)),
+                                     key=lambda item: item[1]):
+        if slice_offset + offset != position:
+            stream.seek(slice_offset + offset)
+        tables[name] = _read_exact(stream, size)
+        position = slice_offset + offset + size
+
+    symbols_by_section = {}
+    strings = tables['strings']
+    for strx, n_type, n_sect, _, value in struct.iter_unpack(nlist_format, tables['symbols']):
+        if n_type & N_STAB or (n_type & N_TYPE) != N_SECT or not n_type & N_EXT:
+            continue
+        if not 0 < n_sect <= len(sections) or strx >= len(strings):
+            continue
+        end = strings.find(b'\0', strx)
+        name = strings[strx:end if end >= 0 else len(strings)].decode('ascii', 'replace')
+        symbols_by_section.setdefault(n_sect, []).append((value, name))
+
+    symbols = []
+    for n_sect, section_symbols in symbols_by_section.items():
+        segment_name, section_name, section_addr, section_size = sections[n_sect - 1]
+        section_symbols.sort()
+        for index, (value, name) in enumerate(section_symbols):
+            end = section_symbols[index + 1][0] if index + 1 < len(section_symbols) else section_addr + section_size
+            symbols.append({
+                'name': name,
+                'segment': segment_name,
+                'section': section_name,
+                'addr': value,
+                'size': max(0, end - value),
+            })
+    return symbols
+
+def _parse_thin(stream, slice_size, slice_offset=0, with_symbols=False):
+    """解析单架构Mach-O（stream位于切片开头）"""
+    magic_raw = _read_exact(stream, 4)
+    magic = struct.unpack('<I', magic_raw)[0]
+    if magic in (MH_MAGIC, MH_MAGIC_64):
+        endian = '<'
+    elif magic in (MH_CIGAM, MH_CIGAM_64):
+        endian = '>'
+    else:
+        raise MachOError(f"无效的Mach-O magic: {magic:#x}")
+    is_64 = magic in (MH_MAGIC_64, MH_CIGAM_64)
+
+    # 64位头比32位多4字节reserved
+    header_rest = _read_exact(stream, 28 if is_64 else 24)
+    cputype, cpusubtype, filetype, ncmds, sizeofcmds, flags = struct.unpack(endian + 'iiIIII', header_rest[:24])
+    if sizeofcmds > MAX_SIZEOFCMDS:
+        raise MachOError(f"load commands过大: {sizeofcmds}")
+    commands = _read_exact(stream, sizeofcmds)
+
+    segments = []
+    flat_sections = []  # 按n_sect编号顺序：(段, 节, 地址, 大小)
+    symtab = None
+    offset = 0
+    for _ in range(ncmds):
+        if offset + 8 > len(commands):
+            raise MachOError("load command越界")
+        cmd, cmdsize = struct.unpack_from(endian + 'II', commands, offset)
+        if cmdsize < 8 or offset + cmdsize > len(commands):
+            raise MachOError("load command大小无效")
+
+        if cmd == LC_SEGMENT_64:
+            segname, vmaddr, vmsize, fileoff, filesize, maxprot, initprot, nsects, seg_flags = \
+                struct.unpack_from(endian + '16sQQQQiiII', commands, offset + 8)
+            section_format, section_size, section_start = endian + '16s16sQQ', 80, offset + 72
+        elif cmd == LC_SEGMENT:
+            segname, vmaddr, vmsize, fileoff, filesize, maxprot, initprot, nsects, seg_flags = \
+                struct.unpack_from(endian + '16sIIIIiiII', commands, offset + 8)
+            section_format, section_size, section_start = endian + '16s16sII', 68, offset + 56
+        else:
+            if cmd == LC_SYMTAB:
+                symtab = struct.unpack_from(endian + 'IIII', commands, offset + 8)
+            offset += cmdsize
+            continue
+
+        if section_start + nsects * section_size > offset + cmdsize:
+            raise MachOError("section表越界")
+        sections = []
+        for index in range(nsects):
+            sectname, _, addr, size = struct.unpack_from(section_format, commands, section_start + index * section_size)
+            sections.append({'name': _cstring(sectname), 'addr': addr, 'size': size})
+            flat_sections.append((_cstring(segname), _cstring(sectname), addr, size))
+        segments.append({
+            'name': _cstring(segname),
+            'vmsize': vmsize,
+            'filesize': filesize,
+            'sections': sections,
+        })
+        offset += cmdsize
+
+    macho_slice = {
+        'arch': arch_name(cputype, cpusubtype),
+        'filetype': filetype,
+        'size': slice_size,
+        'segments': segments,
+    }
+    if with_symbols:
+        header_size = (32 if is_64 else 28) + sizeofcmds
+        macho_slice['symbols'] = _read_symbols(stream, endian, is_64, symtab, flat_sections, slice_offset,
+                                               slice_size, slice_offset + header_size) if symtab else []
+    return macho_slice
+
+def parse_macho(stream, total_size, with_symbols=False):
+    """解析Mach-O文件的段/节布局
+
+    Args:
+        stream: 支持read和向前seek的文件对象（如ZipFile.open返回的对象）
+        total_size: 文件总大小
+        with_symbols: 是否同时读取符号表中的外部符号（每个切片增加 'symbols'）
+
+    Returns:
+        架构切片列表：[{'arch', 'filetype', 'size', 'segments': [{'name', 'vmsize', 'filesize', 'sections'}]}]
+    """
+    magic_raw = _read_exact(stream, 4)
+    magic_be = struct.unpack('>I', magic_raw)[0]
+    if magic_be not in FAT_MAGICS:
+        stream.seek(0)
+        return [_parse_thin(stream, total_size, 0, with_symbols)]
+
+    is_fat64 = magic_be == FAT_MAGIC_64
+    nfat_arch = struct.unpack('>I', _read_exact(stream, 4))[0]
+    if nfat_arch > MAX_FAT_ARCHS:
+        raise MachOError(f"fat架构数无效: {nfat_arch}")
+    arch_format, arch_size = ('>iiQQII', 32) if is_fat64 else ('>iiIII', 20)
+    arch_table = _read_exact(stream, nfat_arch * arch_size)
+    archs = []
+    for index in range(nfat_arch):
+        fields = struct.unpack_from(arch_format, arch_table, index * arch_size)
+        archs.append((fields[2], fields[3]))  # (offset, size)
+
+    # 按偏移升序读取，压缩流只需要向前seek
+    slices = []
+    for arch_offset, arch_size_bytes in sorted(archs):
+        if arch_offset + arch_size_bytes > total_size:
+            raise MachOError("fat架构切片越界")
+        stream.seek(arch_offset)
+        slices.append(_parse_thin(stream, arch_size_bytes, arch_offset, with_symbols))
+    return slices
+
+def section_sizes(slices):
+    """将切片布局展平为 {(架构, 段, 节): 大小}
+
+    没有节的段（如__LINKEDIT）以段的文件大小记在节名为空的键下
+    """
+    sizes = {}
+    for macho_slice in slices:
+        arch = macho_slice['arch']
+        for segment in macho_slice['segments']:
+            if segment['sections']:
+                for section in segment['sections']:
+                    key = (arch, segment['name'], section['name'])
+                    sizes[key] = sizes.get(key, 0) + section['size']
+            else:
+                key = (arch, segment['name'], '')
+                sizes[key] = sizes.get(key, 0) + segment['filesize']
+    return sizes
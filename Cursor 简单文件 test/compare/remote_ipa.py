@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+远程IPA读取（HTTP Range请求）
+中央目录分析只读取文件末尾的EOCD和中央目录；内容级分析需要的条目在解压时按需读取。
+读取按固定大小的块进行，块同时缓存在内存和本地磁盘上，同一个IPA的重复读取不再请求服务器。
+
+也可以直接运行，启动一个支持Range请求的本地HTTP服务器作为制品库的替身：
+    python3 remote_ipa.py [目录] [--port 8000]
+"""
+
+import hashlib
+import os
+import re
+import sys
+import tempfile
+import urllib.request
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from zip_directory import EOCD_SEARCH_SIZE, directory_span, iter_central_directory
+
+REMOTE_SCHEMES = ('http://', 'https://')
+# 每次请求读取的块大小
+BLOCK_SIZE = 1024 * 1024
+# 每个RangeFile在内存中保留的块数
+MEMORY_BLOCKS = 32
+# 本地块缓存目录：优先使用该环境变量（子进程同样继承），否则放在系统临时目录下
+BLOCK_CACHE_ENV = 'IPA_COMPARE_BLOCK_CACHE'
+BLOCK_CACHE_MAX_BYTES = 1024 * 1000 * 1000
+REQUEST_TIMEOUT = 60
+
+_CONTENT_RANGE_PATTERN = re.compile(r'bytes (\d+)-(\d+)/(\d+)')
+
+class RemoteIPAError(Exception):
+    """远程IPA读取失败（服务器不支持Range请求、文件在读取过程中变化等）"""
+
+def is_remote_url(path):
+    return isinstance(path, str) and path.lower().startswith(REMOTE_SCHEMES)
+
+def block_cache_dir():
+    """本地块缓存目录"""
+    return Path(os.environ.get(BLOCK_CACHE_ENV) or Path(tempfile.gettempdir()) / 'ipa_compare_blocks')
+
+def _range_request(url, start, end):
+    """请求 [start, end] 字节（含end），返回 (数据, 文件总大小, 版本标识)"""
+    request = urllib.request.Request(url, headers={'Range': f'bytes={start}-{end}'})
+    with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+        if response.status != 206:
+            raise RemoteIPAError(f"服务器不支持Range请求: {url} (HTTP {response.status})")
+        match = _CONTENT_RANGE_PATTERN.match(response.headers.get('Content-Range', ''))
+        if not match or int(match.group(1)) != start:
+            raise RemoteIPAError(f"无效的Content-Range: {response.headers.get('Content-Range')}")
+        validator = response.headers.get('ETag') or response.headers.get('Last-Modified') or ''
+        data = response.read()
+    if len(data) != int(match.group(2)) - start + 1:
+        raise RemoteIPAError(f"响应数据不完整: {url}")
+    return data, int(match.group(3)), validator
+
+# 当前进程中已探测的远程文件：{url: (总大小, 版本标识)}
+_remote_info = {}
+
+def remote_info(url):
+    """探测远程文件的总大小和版本标识（ETag或Last-Modified），每个进程只请求一次"""
+    info = _remote_info.get(url)
+    if info is None:
+        _, total_size, validator = _range_request(url, 0, 0)
+        info = _remote_info[url] = (total_size, validator)
+    return info
+
+def remote_size(url):
+    return remote_info(url)[0]
+
+class RangeFile:
+    """按块读取远程文件的只读文件对象，可以直接交给 zipfile.ZipFile
+
+    缺失的连续块合并为一次Range请求；块缓存在内存（LRU）和本地磁盘上，
+    磁盘缓存以 URL + 版本标识 + 大小 为键，远程文件更新后自动失效。
+    服务器既不返回ETag也不返回Last-Modified时，无法发现同一URL上大小相同的文件被替换，只使用内存缓存
+    """
+
+    def __init__(self, url, cache_dir=None):
+        self.url = url
+        self.name = url
+        self.size, self.validator = remote_info(url)
+        self.cache_dir = None
+        if self.validator:
+            key_source = f"{url}|{self.validator}|{self.size}"
+            self.cache_dir = Path(cache_dir or block_cache_dir()) / hashlib.sha1(key_source.encode('utf-8')).hexdigest()
+        self.position = 0
+        self.closed = False
+        self._blocks = OrderedDict()
+        self.requests = 0  # 实际发出的Range请求数
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.closed = True
+        self._blocks.clear()
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_SET:
+            position = offset
+        elif whence == os.SEEK_CUR:
+            position = self.position + offset
+        elif whence == os.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"无效的whence: {whence}")
+        if position < 0:
+            raise ValueError("seek位置不能为负数")
+        self.position = position
+        return position
+
+    def read(self, size=-1):
+        if self.closed:
+            raise ValueError("文件已关闭")
+        end = self.size if size is None or size < 0 else min(self.size, self.position + size)
+        if end <= self.position:
+            return b''
+        first_block = self.position // BLOCK_SIZE
+        last_block = (end - 1) // BLOCK_SIZE
+        data = b''.join(self._load_blocks(first_block, last_block))
+        offset = self.position - first_block * BLOCK_SIZE
+        data = data[offset:offset + end - self.position]
+        self.position = end
+        return data
+
+    def _block_file(self, index):
+        return self.cache_dir / f"{index}.block"
+
+    def _read_cached_block(self, index):
+        """从磁盘缓存读取块，没有缓存时返回None"""
+        if self.cache_dir is None:
+            return None
+        try:
+            return self._block_file(index).read_bytes()
+        except OSError:
+            return None
+
+    def _load_blocks(self, first_block, last_block):
+        """返回 [first_block, last_block] 范围内各块的数据，依次查找内存、磁盘，最后请求服务器"""
+        blocks = {}
+        missing = []
+        for index in range(first_block, last_block + 1):
+            block = self._blocks.get(index)
+            if block is None:
+                block = self._read_cached_block(index)
+            if block is None:
+                missing.append(index)
+                continue
+            blocks[index] = block
+
+        # 连续缺失的块合并成一次请求
+        start = 0
+        while start < len(missing):
+            stop = start
+            while stop + 1 < len(missing) and missing[stop + 1] == missing[stop] + 1:
+                stop += 1
+            blocks.update(self._fetch(missing[start], missing[stop]))
+            start = stop + 1
+
+        for index in range(first_block, last_block + 1):
+            self._blocks[index] = blocks[index]
+            self._blocks.move_to_end(index)
+        while len(self._blocks) > MEMORY_BLOCKS:
+            self._blocks.popitem(last=False)
+        return [blocks[index] for index in range(first_block, last_block + 1)]
+
+    def _fetch(self, first_block, last_block):
+        """用一次Range请求读取连续的块并写入磁盘缓存，返回 {块编号: 数据}"""
+        range_start = first_block * BLOCK_SIZE
+        range_end = min(self.size, (last_block + 1) * BLOCK_SIZE) - 1
+        data, total_size, validator = _range_request(self.url, range_start, range_end)
+        self.requests += 1
+        if total_size != self.size or validator != self.validator:
+            raise RemoteIPAError(f"远程文件在读取过程中发生变化: {self.url}")
+        blocks = {}
+        for index in range(first_block, last_block + 1):
+            block = data[(index - first_block) * BLOCK_SIZE:(index - first_block + 1) * BLOCK_SIZE]
+            self._store_block(index, block)
+            blocks[index] = block
+        return blocks
+
+    def _store_block(self, index, block):
+        """写入磁盘缓存（先写临时文件再替换，多个进程同时写入同一块时也不会读到不完整的数据）"""
+        if self.cache_dir is None:
+            return
+        block_file = self._block_file(index)
+        tmp_file = block_file.with_name(f"{block_file.name}.{os.getpid()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file.write_bytes(block)
+            os.replace(tmp_file, block_file)
+        except OSError:
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+
+def read_remote_tail(range_file):
+    """读取远程文件中从中央目录开始到文件末尾的部分
+
+    先读取EOCD可能所在的尾部，中央目录更大时再向前补读
+    """
+    tail_size = min(range_file.size, EOCD_SEARCH_SIZE)
+    range_file.seek(range_file.size - tail_size)
+    tail = range_file.read(tail_size)
+    start, _ = directory_span(tail)
+    if start < 0:
+        tail_size = min(range_file.size, tail_size - start)
+        range_file.seek(range_file.size - tail_size)
+        tail = range_file.read(tail_size)
+    return tail
+
+@contextmanager
+def remote_central_directory(url):
+    """只通过Range请求读取远程IPA的中央目录，返回条目迭代器（见 zip_directory.iter_central_directory）"""
+    with RangeFile(url) as range_file:
+        yield iter_central_directory(read_remote_tail(range_file))
+
+def remote_fingerprint(url):
+    """远程IPA的指纹：大小 + 版本标识 + 尾部（EOCD所在部分）的哈希"""
+    with RangeFile(url) as range_file:
+        tail_size = min(range_file.size, EOCD_SEARCH_SIZE)
+        range_file.seek(range_file.size - tail_size)
+        digest = hashlib.sha1(range_file.read(tail_size)).hexdigest()
+    return f"{range_file.size}-{range_file.validator}-{digest}"
+
+def evict_block_cache(max_bytes=BLOCK_CACHE_MAX_BYTES, cache_dir=None):
+    """按最近写入时间淘汰本地块缓存，直到总大小不超过上限"""
+    cached = []
+    for block_file in Path(cache_dir or block_cache_dir()).glob('*/*.block'):
+        try:
+            stat = block_file.stat()
+        except OSError:
+            continue
+        cached.append((stat.st_mtime, stat.st_size, block_file))
+    total_size = sum(size for _, size, _ in cached)
+    cached.sort()
+    for _, size, block_file in cached:
+        if total_size <= max_bytes:
+            break
+        try:
+            os.remove(block_file)
+        except OSError:
+            pass
+        total_size -= size
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """支持单个Range请求的静态文件服务，用作制品库的本地替身"""
+
+    def send_head(self):
+        range_header = self.headers.get('Range')
+        match = re.fullmatch(r'bytes=(\d*)-(\d*)', range_header or '')
+        path = self.translate_path(self.path)
+        if match is None or os.path.isdir(path):
+            return super().send_head()
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+        size = os.fstat(f.fileno()).st_size
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last) if last else size - 1, size - 1)
+        else:
+            start, end = max(0, size - int(last or 0)), size - 1
+        if start > end:
+            f.close()
+            self.send_error(416, "Requested Range Not Satisfiable")
+            return None
+        f.seek(start)
+        self.send_response(206)
+        self.send_header('Content-Type', self.guess_type(path))
+        self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Last-Modified', self.date_time_string(int(os.fstat(f.fileno()).st_mtime)))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        self._range_left = end - start + 1
+        return f
+
+    def copyfile(self, source, outputfile):
+        left = getattr(self, '_range_left', None)
+        if left is None:
+            return super().copyfile(source, outputfile)
+        while left > 0:
+            chunk = source.read(min(left, 64 * 1024))
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            left -= len(chunk)
+        self._range_left = None
+
+def make_server(directory, port=8000, handler_class=RangeRequestHandler):
+    """创建本地Range服务器（未启动），port为0时由系统分配端口"""
+    def handler(*args, **kwargs):
+        return handler_class(*args, directory=directory, **kwargs)
+    return ThreadingHTTPServer(('127.0.0.1', port), handler)
+
+def serve(directory, port=8000):
+    """启动本地Range服务器（阻塞）"""
+    with make_server(directory, port) as server:
+        print(f"本地制品服务: http://127.0.0.1:{server.server_address[1]}/ （目录: {directory}）")
+        server.serve_forever()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="支持Range请求的本地HTTP服务器（远程IPA分析的替身）")
+    parser.add_argument('directory', nargs='?', default='.')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+    try:
+        serve(args.directory, args.port)
+    except KeyboardInterrupt:
+        sys.exit(0)
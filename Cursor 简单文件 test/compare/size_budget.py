@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+体积预算门禁
+从JSON预算文件读取IPA总体、各分类和各framework的上限，对照新旧构建的体积汇总逐项检查，
+用退出码表示结果，供CI直接判断是否通过。
+
+预算文件示例（大小可以是字节数，或带单位的字符串，单位与报告一致使用1000进制）：
+    {
+        "total": {"max_size": "150MB", "max_delta": "1MB"},
+        "categories": {"图片资源": {"max_delta": "500KB"}, "*": {"max_delta": "2MB"}},
+        "frameworks": {"Flutter": {"max_size": "40MB"}, "*": {"max_uncompressed_delta": "1MB"}}
+    }
+"*" 对没有单独配置的每个分类（或framework）分别生效。
+"""
+
+import json
+import re
+
+# 退出码
+EXIT_PASSED = 0
+EXIT_VIOLATED = 1
+EXIT_INVALID = 2   # 预算文件或命令行参数错误（与argparse的参数错误一致）
+EXIT_ERROR = 3     # 找不到输入或分析失败
+
+# 上限名称 -> (是否为解压后大小, 是否为变化量)
+# 压缩后大小：总体为IPA文件大小，分类和framework为条目压缩后大小之和
+LIMIT_KEYS = {
+    'max_size': (False, False),
+    'max_delta': (False, True),
+    'max_uncompressed_size': (True, False),
+    'max_uncompressed_delta': (True, True),
+}
+SCOPE_KEYS = ('total', 'categories', 'frameworks')
+WILDCARD = '*'
+
+SCOPE_NAMES = {
+    'total': '总体',
+    'categories': '分类',
+    'frameworks': 'Framework',
+}
+
+_SIZE_UNITS = {'': 1, 'B': 1, 'KB': 1000, 'MB': 1000 ** 2, 'GB': 1000 ** 3}
+_SIZE_PATTERN = re.compile(r'([+-]?\d+(?:\.\d+)?)\s*([KMG]?B?)', re.I)
+
+class BudgetError(Exception):
+    """预算文件格式错误"""
+
+def parse_size(value):
+    """解析预算中的大小：整数字节数，或 "500KB"、"1.5MB" 这样的字符串"""
+    if isinstance(value, bool):
+        raise BudgetError(f"无效的大小: {value!r}")
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        match = _SIZE_PATTERN.fullmatch(value.strip())
+        if match:
+            return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+    raise BudgetError(f"无效的大小: {value!r}")
+
+def _parse_limits(limits, where):
+    if not isinstance(limits, dict):
+        raise BudgetError(f"{where} 应为对象")
+    parsed = {}
+    for key, value in limits.items():
+        if key not in LIMIT_KEYS:
+            raise BudgetError(f"{where} 中未知的上限: {key}（可用: {', '.join(LIMIT_KEYS)}）")
+        parsed[key] = parse_size(value)
+    return parsed
+
+class SizeBudget:
+    """解析后的预算
+
+    Attributes:
+        total: IPA总体的上限 {上限名称: 字节数}
+        categories: {分类名称: 上限}，键可以是 "*"
+        frameworks: {framework名称: 上限}，键可以是 "*"
+    """
+
+    def __init__(self, data):
+        if not isinstance(data, dict):
+            raise BudgetError("预算文件顶层应为对象")
+        unknown = set(data) - set(SCOPE_KEYS)
+        if unknown:
+            raise BudgetError(f"未知的预算项: {', '.join(sorted(unknown))}（可用: {', '.join(SCOPE_KEYS)}）")
+        self.total = _parse_limits(data.get('total', {}), 'total')
+        self.categories = self._parse_scope(data.get('categories', {}), 'categories')
+        self.frameworks = self._parse_scope(data.get('frameworks', {}), 'frameworks')
+        if not self.total and not self.categories and not self.frameworks:
+            raise BudgetError("预算文件中没有任何上限")
+
+    @staticmethod
+    def _parse_scope(scope, where):
+        if not isinstance(scope, dict):
+            raise BudgetError(f"{where} 应为对象")
+        return {name: _parse_limits(limits, f"{where}.{name}") for name, limits in scope.items()}
+
+def load_budget(budget_path):
+    """读取JSON预算文件，格式错误时抛出 BudgetError"""
+    try:
+        with open(budget_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except OSError as e:
+        raise BudgetError(f"无法读取预算文件: {e}")
+    except ValueError as e:
+        raise BudgetError(f"JSON格式错误: {e}")
+    return SizeBudget(data)
+
+def _check_limits(scope, name, limits, sizes):
+    """按上限逐项检查一个目标
+
+    Args:
+        sizes: (旧压缩后, 新压缩后, 旧解压后, 新解压后)
+    """
+    old_compressed, new_compressed, old_uncompressed, new_uncompressed = sizes
+    checks = []
+    for limit_key, limit in limits.items():
+        uncompressed, is_delta = LIMIT_KEYS[limit_key]
+        old_size, new_size = ((old_uncompressed, new_uncompressed) if uncompressed
+                              else (old_compressed, new_compressed))
+        actual = new_size - old_size if is_delta else new_size
+        checks.append({
+            'scope': scope,
+            'name': name,
+            'limit_key': limit_key,
+            'limit': limit,
+            'actual': actual,
+            'is_delta': is_delta,
+            'passed': actual <= limit,
+        })
+    return checks
+
+def evaluate_budget(budget, summary, framework_category):
+    """对照体积汇总检查预算
+
+    Args:
+        summary: {'total': 大小元组, 'categories': {分类: 大小元组}, 'frameworks': {framework分类: 大小元组}}，
+                 大小元组为 (旧压缩后, 新压缩后, 旧解压后, 新解压后)，只包含新旧构建中存在的分类
+        framework_category: 把预算中的framework名称映射为summary['frameworks']中的分类名称
+
+    Returns:
+        (检查结果列表, 新旧构建中都不存在的预算目标列表)
+    """
+    checks = []
+    missing = []
+    if budget.total:
+        checks.extend(_check_limits('total', '', budget.total, summary['total']))
+
+    for scope, targets in (('categories', budget.categories), ('frameworks', budget.frameworks)):
+        present = summary[scope]
+        configured = set()
+        for name, limits in targets.items():
+            if name == WILDCARD:
+                continue
+            category = framework_category(name) if scope == 'frameworks' else name
+            configured.add(category)
+            sizes = present.get(category)
+            if sizes is None:
+                missing.append((scope, name))
+                sizes = (0, 0, 0, 0)
+            checks.extend(_check_limits(scope, category, limits, sizes))
+        wildcard_limits = targets.get(WILDCARD)
+        if wildcard_limits:
+            for category in sorted(present):
+                if category not in configured:
+                    checks.extend(_check_limits(scope, category, wildcard_limits, present[category]))
+    return checks, missing
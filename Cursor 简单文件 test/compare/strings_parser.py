@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地化文件解析
+.strings 在IPA中可能是二进制plist（Xcode默认编译结果）、XML plist或文本格式（"key" = "value";，UTF-8/UTF-16），
+.stringsdict 是plist字典；只提取键，不保留翻译内容
+"""
+
+import codecs
+import plistlib
+import re
+
+LPROJ_SUFFIX = '.lproj/'
+STRINGS_EXTENSIONS = ('.strings', '.stringsdict')
+
+# 文本格式的词法单元：空白、注释、带引号的字符串、不带引号的单词、分隔符
+_TOKEN_PATTERN = re.compile(r'''
+    (?P<space>\s+|//[^\n]*|/\*.*?\*/)
+  | "(?P<quoted>(?:[^"\\]|\\.)*)"
+  | (?P<word>[A-Za-z0-9_$+/:.\-]+)
+  | (?P<punct>[={};])
+''', re.S | re.X)
+
+class StringsFormatError(Exception):
+    """.strings 格式错误"""
+
+def lproj_locale(file_path):
+    """路径所在的 .lproj 目录对应的语言（如 en、zh-Hans、Base），不在 .lproj 下时返回None"""
+    end = file_path.rfind(LPROJ_SUFFIX)
+    if end == -1:
+        return None
+    start = file_path.rfind('/', 0, end) + 1
+    return file_path[start:end] or None
+
+def is_strings_file(file_path):
+    return file_path.endswith(STRINGS_EXTENSIONS) and LPROJ_SUFFIX in file_path
+
+def _decode_text(data):
+    if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return data.decode('utf-16')
+    if data.startswith(codecs.BOM_UTF8):
+        return data[len(codecs.BOM_UTF8):].decode('utf-8')
+    if b'\x00' in data[:2]:
+        # 没有BOM的UTF-16，ASCII字符的高字节为0
+        return data.decode('utf-16-le' if data[1:2] == b'\x00' else 'utf-16-be')
+    return data.decode('utf-8')
+
+def _text_keys(text):
+    """解析文本格式：按 键 = 值; 或 键; 的顺序读取"""
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN_PATTERN.match(text, position)
+        if match is None:
+            raise StringsFormatError(f"无法识别的字符: {text[position]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        if kind == 'space' or match.group(0) in ('{', '}'):
+            continue
+        tokens.append((kind, match.group(kind)))
+
+    keys = []
+    index = 0
+    while index < len(tokens):
+        kind, key = tokens[index]
+        if kind not in ('quoted', 'word'):
+            raise StringsFormatError(f"缺少键: {key!r}")
+        if index + 1 < len(tokens) and tokens[index + 1] == ('punct', '='):
+            index += 3
+        else:
+            index += 1
+        if index >= len(tokens) or tokens[index] != ('punct', ';'):
+            raise StringsFormatError(f"缺少分号: {key!r}")
+        keys.append(key)
+        index += 1
+    return keys
+
+def parse_strings_keys(data):
+    """提取 .strings/.stringsdict 中的键
+
+    Returns:
+        去重排序后的键列表
+    """
+    if data.startswith(b'bplist') or data.lstrip().startswith((b'<?xml', b'<plist', b'<!DOCTYPE')):
+        try:
+            content = plistlib.loads(data)
+        except Exception as e:
+            raise StringsFormatError(f"plist解析失败: {e}")
+        if not isinstance(content, dict):
+            raise StringsFormatError("plist顶层不是字典")
+        keys = [str(key) for key in content]
+    else:
+        try:
+            text = _decode_text(data)
+        except UnicodeDecodeError as e:
+            raise StringsFormatError(f"无法解码: {e}")
+        keys = _text_keys(text)
+    return sorted(set(keys))
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""测试直接导入 compare 目录下的模块（与 compare_ipa.py 的导入方式一致）"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""分析缓存：分类规则指纹、内容级分析结果的容量上限"""
+
+import pickle
+
+from compare_ipa import AnalysisCache, ContentResultCache, FileCategorizer, categorizer_fingerprint
+
+def _payload_binary(file_path, path_lower):
+    return '/payload/' in path_lower
+
+def _payload_binary_edited(file_path, path_lower):
+    return '/payload/' in path_lower and '.' not in file_path
+
+def test_fingerprint_changes_when_rule_body_changes():
+    original = FileCategorizer([('可执行文件', _payload_binary)])
+    edited = FileCategorizer([('可执行文件', _payload_binary_edited)])
+    # 同名函数、不同函数体
+    _payload_binary_edited.__qualname__ = _payload_binary.__qualname__
+    assert categorizer_fingerprint(original) != categorizer_fingerprint(edited)
+
+def test_fingerprint_is_stable():
+    assert categorizer_fingerprint(FileCategorizer()) == categorizer_fingerprint(FileCategorizer())
+
+def _content_cache(tmp_path, now, max_bytes=None):
+    cache = ContentResultCache(tmp_path, max_bytes=max_bytes)
+    cache._now = now
+    return cache
+
+def test_content_cache_evicts_least_recently_used(tmp_path):
+    value = b'x' * 1000
+    nbytes = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    cache = _content_cache(tmp_path, 1)
+    for crc in (1, 2, 3):
+        cache.put('macho', crc, 10, value)
+    cache.put('car', 4, 10, value)
+    cache.save()
+
+    # 第二次运行只用到crc=1，上限只能容纳两个条目
+    cache = _content_cache(tmp_path, 2, max_bytes=2 * nbytes)
+    assert cache.lookup('macho', 1, 10) == (True, value)
+    cache.put('macho', 5, 10, value)
+    cache.save()
+
+    cache = _content_cache(tmp_path, 3)
+    assert [cache.lookup('macho', crc, 10)[0] for crc in (1, 2, 3, 5)] == [True, False, False, True]
+    # 所有条目都被淘汰的分析器不再保留文件
+    assert cache.lookup('car', 4, 10) == (False, None)
+    assert not (tmp_path / 'content' / 'car.results').exists()
+
+def test_content_cache_counts_toward_analysis_cache_limit(tmp_path):
+    cache = _content_cache(tmp_path, 1)
+    cache.put('macho', 1, 10, b'x' * 5000)
+    cache.save()
+    content_size = (tmp_path / 'content' / 'macho.results').stat().st_size
+
+    entries_file = tmp_path / 'old.entries'
+    entries_file.write_bytes(b'x' * 1000)
+    AnalysisCache(tmp_path, max_bytes=content_size + 1000).evict()
+    assert entries_file.exists()
+    AnalysisCache(tmp_path, max_bytes=content_size + 999).evict()
+    assert not entries_file.exists()
+
+def test_content_cache_replaces_legacy_format(tmp_path):
+    content_dir = tmp_path / 'content'
+    content_dir.mkdir()
+    with open(content_dir / 'macho.results', 'wb') as f:
+        pickle.dump({(1, 10): 'stale'}, f)
+
+    cache = _content_cache(tmp_path, 1)
+    assert cache.lookup('macho', 1, 10) == (False, None)
+    cache.save()
+    assert not (content_dir / 'macho.results').exists()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""Assets.car解析：最小的BOM/CAR文件、截断和损坏数据的报错"""
+
+import struct
+
+import pytest
+
+from car_parser import (ATTRIBUTE_IDENTIFIER, ATTRIBUTE_IDIOM, ATTRIBUTE_SCALE, BOMStore, CSI_HEADER_FORMAT,
+                        CarFormatError, parse_car)
+
+TOKENS = (ATTRIBUTE_SCALE, ATTRIBUTE_IDIOM, ATTRIBUTE_IDENTIFIER)
+BLOCKS_START = 512
+
+class _BOMBuilder:
+    """按块编号组装BOM文件，块0保留为空"""
+
+    def __init__(self):
+        self.blocks = [b'']
+        self.vars = []
+
+    def add(self, data):
+        self.blocks.append(data)
+        return len(self.blocks) - 1
+
+    def tree(self, items):
+        """items为 [(键, 值)]，拆成两个叶子节点和一个根节点，覆盖下降和forward链表遍历"""
+        half = max(1, len(items) // 2)
+        groups = [items[:half], items[half:]] if len(items) > 1 else [items]
+        leaf_pairs = [[(self.add(value), self.add(key)) for key, value in group] for group in groups]
+        leaf_ids = [self.add(b'') for _ in leaf_pairs]
+        for index, pairs in enumerate(leaf_pairs):
+            forward = leaf_ids[index + 1] if index + 1 < len(leaf_ids) else 0
+            self.blocks[leaf_ids[index]] = (struct.pack('>HHII', 1, len(pairs), forward, 0)
+                                            + b''.join(struct.pack('>II', v, k) for v, k in pairs))
+        root = self.add(struct.pack('>HHII', 0, len(leaf_ids), 0, 0)
+                        + b''.join(struct.pack('>II', leaf_id, 0) for leaf_id in leaf_ids))
+        return self.add(b'tree' + struct.pack('>IIII', 1, root, 4096, len(items)) + b'\0')
+
+    def build(self):
+        body = b''
+        pointers = []
+        for block in self.blocks:
+            pointers.append((BLOCKS_START + len(body) if block else 0, len(block)))
+            body += block
+        vars_data = struct.pack('>I', len(self.vars)) + b''.join(
+            struct.pack('>IB', block_id, len(name)) + name.encode() for name, block_id in self.vars)
+        vars_offset = BLOCKS_START + len(body)
+        index_offset = vars_offset + len(vars_data)
+        index = struct.pack('>I', len(self.blocks)) + b''.join(struct.pack('>II', *p) for p in pointers)
+        header = b'BOMStore' + struct.pack('>IIIIII', 1, len(self.blocks), index_offset, len(index),
+                                           vars_offset, len(vars_data))
+        return header.ljust(BLOCKS_START, b'\0') + body + vars_data + index
+
+def _csi(name, width, height, scale, pixel_format, payload_size):
+    header = struct.pack(CSI_HEADER_FORMAT, b'ISTC', 1, 0, width, height, int(scale * 100),
+                         struct.unpack('>I', pixel_format)[0], 0, 0, 0, 0, name.encode(), 0, 1, 0, payload_size)
+    return header + b'\x55' * payload_size
+
+def _build_car(renditions, facets):
+    """renditions为 [({属性: 值}, CSI数据)]，facets为 {资源名称: Identifier}"""
+    bom = _BOMBuilder()
+    key_format = bom.add(b'tmfk' + struct.pack('<II', 0, len(TOKENS)) + struct.pack(f'<{len(TOKENS)}I', *TOKENS))
+    rendition_tree = bom.tree([(struct.pack(f'<{len(TOKENS)}H', *[attributes.get(t, 0) for t in TOKENS]), csi)
+                               for attributes, csi in renditions])
+    facet_tree = bom.tree([(name.encode(), struct.pack('<HHHHH', 0, 0, 1, ATTRIBUTE_IDENTIFIER, identifier))
+                           for name, identifier in sorted(facets.items())])
+    bom.vars = [('KEYFORMAT', key_format), ('RENDITIONS', rendition_tree), ('FACETKEYS', facet_tree)]
+    return bom.build()
+
+def _sample_car():
+    return _build_car([
+        ({ATTRIBUTE_SCALE: 2, ATTRIBUTE_IDIOM: 1, ATTRIBUTE_IDENTIFIER: 7}, _csi('icon@2x.png', 40, 30, 2, b'ARGB', 100)),
+        ({ATTRIBUTE_SCALE: 3, ATTRIBUTE_IDIOM: 1, ATTRIBUTE_IDENTIFIER: 7}, _csi('icon@3x.png', 60, 45, 3, b'ARGB', 200)),
+        ({ATTRIBUTE_IDENTIFIER: 9}, _csi('photo.jpg', 800, 600, 1, b'JPEG', 50)),
+    ], {'icon': 7, 'photo': 9})
+
+def test_parse_renditions():
+    csi_size = struct.calcsize(CSI_HEADER_FORMAT)
+    assert parse_car(_sample_car()) == [
+        ('icon', 'icon@2x.png', 2.0, 'iphone', 'ARGB', 40, 30, csi_size + 100,
+         ((ATTRIBUTE_SCALE, 2), (ATTRIBUTE_IDIOM, 1))),
+        ('icon', 'icon@3x.png', 3.0, 'iphone', 'ARGB', 60, 45, csi_size + 200,
+         ((ATTRIBUTE_SCALE, 3), (ATTRIBUTE_IDIOM, 1))),
+        ('photo', 'photo.jpg', 1.0, 'universal', 'JPEG', 800, 600, csi_size + 50, ()),
+    ]
+
+def test_name_falls_back_to_csi_name():
+    data = _build_car([({ATTRIBUTE_IDENTIFIER: 3}, _csi('orphan.png', 1, 1, 1, b'ARGB', 0))], {})
+    assert parse_car(data)[0][:2] == ('orphan.png', 'orphan.png')
+
+def test_bom_vars():
+    store = BOMStore(_sample_car())
+    assert sorted(store.vars) == ['FACETKEYS', 'KEYFORMAT', 'RENDITIONS']
+    assert store.named_block('CARHEADER') is None
+
+def test_not_bom():
+    with pytest.raises(CarFormatError):
+        parse_car(b'\x89PNG' + b'\0' * 64)
+
+@pytest.mark.parametrize('length', [16, 40, BLOCKS_START + 8])
+def test_truncated(length):
+    # 分别截断在BOM头、块索引和数据块中，块索引位于文件末尾
+    with pytest.raises(CarFormatError):
+        parse_car(_sample_car()[:length])
+
+def test_truncated_tail():
+    data = _sample_car()
+    with pytest.raises(CarFormatError):
+        parse_car(data[:-1])
+
+def test_invalid_block_pointer():
+    data = bytearray(_sample_car())
+    _, _, index_offset, _, _, _ = struct.unpack_from('>IIIIII', data, 8)
+    # 第一个块的长度超出文件
+    struct.pack_into('>I', data, index_offset + 4 + 8 + 4, len(data))
+    with pytest.raises(CarFormatError):
+        parse_car(bytes(data))
+
+def test_missing_key_format():
+    bom = _BOMBuilder()
+    bom.vars = [('RENDITIONS', bom.tree([(b'\0' * 6, b'')]))]
+    with pytest.raises(CarFormatError):
+        parse_car(bom.build())
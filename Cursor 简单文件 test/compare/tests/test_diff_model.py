@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""文件变化状态：大小不变的内容修改、移动/重命名，以及目录输入"""
+
+import zipfile
+import zlib
+
+from compare_ipa import (STATUS_ADDED, STATUS_CONTENT_CHANGED, STATUS_DELETED, STATUS_MODIFIED, STATUS_MOVED,
+                         DiffModel, classify_change, detect_moves, scan_ipa_entries)
+from directory_walker import walk_directory
+
+def info(data):
+    return {'size': len(data), 'crc': zlib.crc32(data)}
+
+def write_ipa(ipa_path, files):
+    with zipfile.ZipFile(ipa_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for file_path, data in files.items():
+            zip_file.writestr(file_path, data)
+    return str(ipa_path)
+
+def statuses(model):
+    return {file_info['path']: (file_info['status'], file_info['moved_from'])
+            for files in model.top_files_by_type.values() for file_info in files}
+
+def test_classify_change():
+    assert classify_change({}, info(b'a')) == STATUS_ADDED
+    assert classify_change(info(b'a'), {}) == STATUS_DELETED
+    assert classify_change(info(b'a'), info(b'ab')) == STATUS_MODIFIED
+    # 大小相同、CRC32不同
+    assert classify_change(info(b'ab'), info(b'ba')) == STATUS_CONTENT_CHANGED
+    assert classify_change(info(b'ab'), info(b'ab')) is None
+
+def test_move_with_same_crc_and_size():
+    old_files = {'Payload/A.app/a/icon.png': info(b'icon'), 'Payload/A.app/keep': info(b'k')}
+    new_files = {'Payload/A.app/b/icon.png': info(b'icon'), 'Payload/A.app/keep': info(b'k')}
+    assert detect_moves(old_files, new_files) == {'Payload/A.app/b/icon.png': 'Payload/A.app/a/icon.png'}
+
+def test_empty_files_are_not_paired():
+    assert detect_moves({'a/empty': info(b'')}, {'b/empty': info(b'')}) == {}
+
+def test_one_to_many_pairing_is_deterministic():
+    old_files = {'old/x.png': info(b'same'), 'old/y.png': info(b'same')}
+    new_items = [('new/d.png', info(b'same')), ('new/x.png', info(b'same')),
+                 ('new/c.png', info(b'same')), ('new/a.png', info(b'same'))]
+    expected = {'new/x.png': 'old/x.png', 'new/a.png': 'old/y.png'}
+    # 同名文件优先配对，其余按路径顺序；与条目顺序无关
+    assert detect_moves(old_files, dict(new_items)) == expected
+    assert detect_moves(dict(reversed(list(old_files.items()))), dict(reversed(new_items))) == expected
+
+def test_diff_model_statuses(tmp_path):
+    old_ipa = write_ipa(tmp_path / 'old.ipa', {
+        'Payload/A.app/same.json': b'{"a": 1}',
+        'Payload/A.app/content.json': b'{"a": 1}',
+        'Payload/A.app/old/logo.png': b'logo' * 500,
+        'Payload/A.app/gone.txt': b'gone' * 400,
+    })
+    new_ipa = write_ipa(tmp_path / 'new.ipa', {
+        'Payload/A.app/same.json': b'{"a": 1}',
+        'Payload/A.app/content.json': b'{"a": 2}',
+        'Payload/A.app/new/logo.png': b'logo' * 500,
+        'Payload/A.app/added.txt': b'added' * 400,
+    })
+    old_table, _, _ = scan_ipa_entries(old_ipa)
+    new_table, _, _ = scan_ipa_entries(new_ipa)
+    rows = statuses(DiffModel(old_ipa, new_ipa, old_table, new_table))
+    assert rows == {
+        'Payload/A.app/content.json': (STATUS_CONTENT_CHANGED, None),
+        'Payload/A.app/new/logo.png': (STATUS_MOVED, 'Payload/A.app/old/logo.png'),
+        'Payload/A.app/gone.txt': (STATUS_DELETED, None),
+        'Payload/A.app/added.txt': (STATUS_ADDED, None),
+    }
+
+def test_directory_input_computes_crc(tmp_path):
+    files = {'Info.plist': b'<plist/>' * 100, 'Frameworks/F.framework/F': bytes(range(256)) * 2000,
+             'Base.lproj/Main.storyboardc/x.nib': b'nib'}
+    old_ipa = write_ipa(tmp_path / 'old.ipa', {f'Payload/A.app/{name}': data for name, data in files.items()})
+    bundle = tmp_path / 'A.app'
+    for name, data in files.items():
+        (bundle / name).parent.mkdir(parents=True, exist_ok=True)
+        (bundle / name).write_bytes(data)
+    (bundle / 'Info.plist').write_bytes(b'<PLIST/>' * 100)  # 大小不变
+    (bundle / 'Base.lproj' / 'Main.storyboardc' / 'x.nib').rename(bundle / 'Base.lproj' / 'x.nib')
+
+    with zipfile.ZipFile(old_ipa) as zip_file:
+        crcs = {zip_info.filename: zip_info.CRC for zip_info in zip_file.infolist()}
+    walked = {file_path: crc for file_path, _, _, crc, _ in walk_directory(bundle)}
+    assert walked['Payload/A.app/Frameworks/F.framework/F'] == crcs['Payload/A.app/Frameworks/F.framework/F']
+    assert walked['Payload/A.app/Info.plist'] == zlib.crc32(b'<PLIST/>' * 100)
+
+    old_table, _, _ = scan_ipa_entries(old_ipa)
+    new_table, _, _ = scan_ipa_entries(str(bundle))
+    rows = statuses(DiffModel(old_ipa, str(bundle), old_table, new_table))
+    assert rows == {
+        'Payload/A.app/Info.plist': (STATUS_CONTENT_CHANGED, None),
+        'Payload/A.app/Base.lproj/x.nib': (STATUS_MOVED, 'Payload/A.app/Base.lproj/Main.storyboardc/x.nib'),
+    }
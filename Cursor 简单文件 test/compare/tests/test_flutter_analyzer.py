@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Flutter产物分析：AOT快照符号拆分、flutter_assets归属、截断数据的报错"""
+
+import io
+import struct
+
+import pytest
+
+from flutter_analyzer import OTHER_PART, flutter_assets_group, snapshot_layout
+from macho_parser import LC_SEGMENT_64, LC_SYMTAB, MH_MAGIC_64, MachOError
+
+TEXT_OFFSET = 4096
+
+def _section(name, addr, size):
+    return struct.pack('<16s16sQQIIIIIIII', name, b'__TEXT', addr, size, addr, 0, 0, 0, 0, 0, 0, 0)
+
+def _app_binary(vm_data, isolate_data, vm_instructions, isolate_instructions, symbol_names=None, padding=1000):
+    """thin arm64的App二进制：__text放快照指令，__const放快照数据，符号表位于文件末尾"""
+    text_size = vm_instructions + isolate_instructions
+    const_offset = TEXT_OFFSET + text_size
+    const_size = vm_data + isolate_data
+    symbols = [
+        ('_kDartVmSnapshotInstructions', 1, TEXT_OFFSET),
+        ('_kDartIsolateSnapshotInstructions', 1, TEXT_OFFSET + vm_instructions),
+        ('_kDartVmSnapshotData', 2, const_offset),
+        ('_kDartIsolateSnapshotData', 2, const_offset + vm_data),
+    ]
+    if symbol_names is not None:
+        symbols = [symbol for symbol in symbols if symbol[0] in symbol_names]
+
+    strings = b'\0'
+    nlists = b''
+    for name, section_index, value in symbols:
+        # N_SECT | N_EXT
+        nlists += struct.pack('<IBBHQ', len(strings), 0x0f, section_index, 0, value)
+        strings += name.encode() + b'\0'
+
+    symbol_offset = const_offset + const_size + padding
+    string_offset = symbol_offset + len(nlists)
+    total_size = string_offset + len(strings)
+    segment = struct.pack('<II16sQQQQiiII', LC_SEGMENT_64, 72 + 80 * 2, b'__TEXT', 0, total_size, 0, total_size,
+                          5, 5, 2, 0)
+    segment += _section(b'__text', TEXT_OFFSET, text_size) + _section(b'__const', const_offset, const_size)
+    symtab = struct.pack('<IIIIII', LC_SYMTAB, 24, symbol_offset, len(symbols), string_offset, len(strings))
+    commands = segment + symtab
+    header = struct.pack('<IiiIIIII', MH_MAGIC_64, 0x0100000c, 0, 6, 2, len(commands), 0, 0)
+    return ((header + commands).ljust(TEXT_OFFSET, b'\0') + b'\x11' * text_size + b'\x22' * const_size
+            + b'\0' * padding + nlists + strings)
+
+def _layout(data):
+    return snapshot_layout(io.BytesIO(data), len(data))
+
+def test_snapshot_layout():
+    data = _app_binary(vm_data=300, isolate_data=5000, vm_instructions=200, isolate_instructions=8000)
+    assert _layout(data) == {
+        'VM快照数据': 300,
+        'VM快照指令': 200,
+        'Isolate快照数据': 5000,
+        'Isolate快照指令': 8000,
+        OTHER_PART: len(data) - 13500,
+    }
+
+def test_missing_symbols_count_as_zero():
+    data = _app_binary(300, 5000, 200, 8000, symbol_names={'_kDartIsolateSnapshotData'})
+    layout = _layout(data)
+    # 没有后续符号时，大小一直算到节末尾
+    assert layout['Isolate快照数据'] == 5000
+    assert layout['VM快照指令'] == 0
+    assert layout[OTHER_PART] == len(data) - 5000
+
+def test_no_snapshot_symbols():
+    assert _layout(_app_binary(300, 5000, 200, 8000, symbol_names=())) is None
+
+def test_truncated_symbol_table():
+    data = _app_binary(300, 5000, 200, 8000)
+    # 符号表在文件末尾，截断后超出切片范围
+    with pytest.raises(MachOError):
+        _layout(data[:-20])
+    with pytest.raises(MachOError):
+        _layout(data[:100])
+
+@pytest.mark.parametrize('file_path, group', [
+    ('Payload/Runner.app/Frameworks/App.framework/flutter_assets/packages/cupertino_icons/assets/a.ttf',
+     'package:cupertino_icons'),
+    ('Payload/Runner.app/Frameworks/App.framework/flutter_assets/assets/images/logo.png', 'assets/'),
+    ('Payload/Runner.app/Frameworks/App.framework/flutter_assets/AssetManifest.json', 'AssetManifest.json'),
+    ('Payload/Runner.app/Frameworks/App.framework/App', None),
+])
+def test_flutter_assets_group(file_path, group):
+    assert flutter_assets_group(file_path) == group
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""PNG无损重新压缩估算：Pillow无法原样重新编码的图片不参与估算"""
+
+import io
+import struct
+import zlib
+
+import pytest
+
+from image_inspector import PNG_SIGNATURE, png_recompressed_size, read_image_header
+
+def _chunk(chunk_type, data):
+    return (struct.pack('>I', len(data)) + chunk_type + data
+            + struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff))
+
+def _png(width, height, bit_depth, color_type, row, extra_chunks=()):
+    """每行内容相同的PNG，像素数据不压缩（zlib level 0），重新编码后必然更小"""
+    ihdr = struct.pack('>IIBBBBB', width, height, bit_depth, color_type, 0, 0, 0)
+    raw = (b'\0' + row) * height
+    return (PNG_SIGNATURE + _chunk(b'IHDR', ihdr) + b''.join(_chunk(t, d) for t, d in extra_chunks)
+            + _chunk(b'IDAT', zlib.compress(raw, 0)) + _chunk(b'IEND', b''))
+
+def test_header_of_16_bit_png():
+    header = read_image_header(io.BytesIO(_png(4, 4, 16, 0, b'\x12\x34' * 4)))
+    assert (header['width'], header['height'], header['bit_depth'], header['alpha']) == (4, 4, 16, False)
+
+@pytest.mark.parametrize('bit_depth, color_type, row', [
+    (16, 0, b'\x12\x34' * 64),   # 16位灰度
+    (16, 2, b'\x12\x34' * 192),  # 16位RGB，Pillow解码为8位
+])
+def test_16_bit_png_is_not_estimated(bit_depth, color_type, row):
+    assert png_recompressed_size(_png(64, 64, bit_depth, color_type, row)) is None
+
+def test_palette_with_transparency_is_not_estimated():
+    pytest.importorskip('PIL')
+    palette = bytes(range(48))
+    data = _png(64, 64, 8, 3, bytes(range(16)) * 4,
+                extra_chunks=[(b'PLTE', palette), (b'tRNS', b'\x00\x80')])
+    assert png_recompressed_size(data) is None
+
+def test_rgb_png_is_estimated():
+    pytest.importorskip('PIL')
+    data = _png(64, 64, 8, 2, bytes(range(192)))
+    recompressed_size = png_recompressed_size(data)
+    assert recompressed_size is not None and recompressed_size < len(data)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""本地化分析：无法解析的 .strings 文件不计入键变化"""
+
+import zipfile
+
+import compare_ipa
+from compare_ipa import compare_ipa_files
+
+def write_ipa(ipa_path, files):
+    with zipfile.ZipFile(ipa_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for file_path, data in files.items():
+            zip_file.writestr(file_path, data)
+    return str(ipa_path)
+
+def compare(tmp_path, monkeypatch, old_files, new_files):
+    # HTML报告写在脚本所在目录，改写到临时目录
+    monkeypatch.setattr(compare_ipa, '__file__', str(tmp_path / 'compare_ipa.py'))
+    old_ipa = write_ipa(tmp_path / 'old.ipa', old_files)
+    new_ipa = write_ipa(tmp_path / 'new.ipa', new_files)
+    return compare_ipa_files(old_ipa, new_ipa, analyses=('localization',))
+
+def test_key_changes(tmp_path, monkeypatch):
+    report = compare(tmp_path, monkeypatch,
+                     {'Payload/A.app/en.lproj/Main.strings': '"title" = "A";\n"gone" = "B";\n'},
+                     {'Payload/A.app/en.lproj/Main.strings': '"title" = "A";\n"hello" = "C";\n'})
+    assert '| en | 1 → 1 |' in report
+    assert '| 2 → 2 | hello | gone |' in report
+    assert '无法解析' not in report
+
+def test_unparsable_file_is_not_counted(tmp_path, monkeypatch):
+    strings = ''.join(f'"key{index}" = "value";\n' for index in range(20))
+    report = compare(tmp_path, monkeypatch,
+                     {'Payload/A.app/en.lproj/Main.strings': strings},
+                     {'Payload/A.app/en.lproj/Main.strings': strings + '"broken" = \n'})
+    # 新版本解析失败时，旧版本的键不能被当作全部删除
+    assert '| 20 → 无法解析 | 无法解析 | 无法解析 |' in report
+    assert 'key0' not in report
+    assert '-20' not in report
+    assert '1 个本地化文件无法解析' in report
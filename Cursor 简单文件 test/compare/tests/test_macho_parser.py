@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Mach-O头部解析：thin/fat文件的段和节大小，截断数据的报错"""
+
+import io
+import struct
+
+import pytest
+
+from macho_parser import (CPU_ARCH_ABI64, CPU_TYPE_ARM, CPU_TYPE_X86, FAT_MAGIC, LC_SEGMENT_64, MH_MAGIC_64,
+                          MachOError, is_macho_prefix, parse_macho, section_sizes)
+
+ARM64 = CPU_TYPE_ARM | CPU_ARCH_ABI64
+X86_64 = CPU_TYPE_X86 | CPU_ARCH_ABI64
+
+def _segment_64(name, filesize, sections):
+    """LC_SEGMENT_64命令，sections为 [(节名, 大小)]"""
+    cmdsize = 72 + 80 * len(sections)
+    command = struct.pack('<II16sQQQQiiII', LC_SEGMENT_64, cmdsize, name, 0, filesize, 0, filesize,
+                          5, 5, len(sections), 0)
+    addr = 0x1000
+    for section_name, size in sections:
+        command += struct.pack('<16s16sQQIIIIIIII', section_name, name, addr, size, 0, 0, 0, 0, 0, 0, 0, 0)
+        addr += size
+    return command
+
+def _thin_macho(cputype, size=0x4000):
+    commands = (_segment_64(b'__TEXT', 0x3000, [(b'__text', 0x2000), (b'__cstring', 0x300)])
+                + _segment_64(b'__LINKEDIT', 0x800, []))
+    header = struct.pack('<IiiIIIII', MH_MAGIC_64, cputype, 0, 6, 2, len(commands), 0, 0)
+    return (header + commands).ljust(size, b'\0')
+
+def _fat_macho(slices):
+    """slices为 [(cputype, thin数据)]，切片按4096对齐"""
+    header = struct.pack('>II', FAT_MAGIC, len(slices))
+    offset = 4096
+    body = b''
+    for cputype, data in slices:
+        header += struct.pack('>iiIII', cputype, 0, offset, len(data), 12)
+        body += data
+        offset += len(data)
+    return header.ljust(4096, b'\0') + body
+
+def _parse(data):
+    return parse_macho(io.BytesIO(data), len(data))
+
+def test_thin_segments_and_sections():
+    data = _thin_macho(ARM64)
+    assert is_macho_prefix(data[:4])
+    slices = _parse(data)
+    assert [(s['arch'], s['filetype'], s['size']) for s in slices] == [('arm64', 6, len(data))]
+    assert section_sizes(slices) == {
+        ('arm64', '__TEXT', '__text'): 0x2000,
+        ('arm64', '__TEXT', '__cstring'): 0x300,
+        # 没有节的段按文件大小计入
+        ('arm64', '__LINKEDIT', ''): 0x800,
+    }
+
+def test_fat_slices():
+    arm64 = _thin_macho(ARM64)
+    x86_64 = _thin_macho(X86_64, size=0x5000)
+    data = _fat_macho([(ARM64, arm64), (X86_64, x86_64)])
+    assert is_macho_prefix(data[:4])
+    slices = _parse(data)
+    assert [(s['arch'], s['size']) for s in slices] == [('arm64', len(arm64)), ('x86_64', len(x86_64))]
+    sizes = section_sizes(slices)
+    assert sizes[('x86_64', '__TEXT', '__text')] == 0x2000
+    assert sizes[('arm64', '__LINKEDIT', '')] == 0x800
+    assert len(sizes) == 6
+
+def test_not_macho():
+    assert not is_macho_prefix(b'\x89PNG')
+    assert not is_macho_prefix(b'\xcf\xfa')
+    with pytest.raises(MachOError):
+        _parse(b'\x89PNG\r\n\x1a\n' + b'\0' * 64)
+
+@pytest.mark.parametrize('length', [2, 20, 40, 32 + 72 + 40])
+def test_truncated_thin(length):
+    # 分别截断在magic、文件头、load commands和section表中
+    with pytest.raises(MachOError):
+        _parse(_thin_macho(ARM64)[:length])
+
+def test_truncated_fat():
+    data = _fat_macho([(ARM64, _thin_macho(ARM64)), (X86_64, _thin_macho(X86_64))])
+    with pytest.raises(MachOError):
+        _parse(data[:12])  # 架构表不完整
+    with pytest.raises(MachOError):
+        _parse(data[:-1])  # 最后一个切片越界
+
+def test_invalid_load_command_size():
+    data = bytearray(_thin_macho(ARM64))
+    # 第一个load command的cmdsize超出sizeofcmds
+    struct.pack_into('<I', data, 32 + 4, 0x10000)
+    with pytest.raises(MachOError):
+        _parse(bytes(data))
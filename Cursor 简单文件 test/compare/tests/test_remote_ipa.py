@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""远程IPA读取：对 remote_ipa 自带的本地Range服务器发起请求"""
+
+import threading
+import zipfile
+
+import pytest
+
+import remote_ipa
+from compare_ipa import scan_ipa_entries
+from remote_ipa import RangeFile, RangeRequestHandler, make_server, remote_central_directory
+from zip_directory import central_directory
+
+FILES = {
+    'Payload/A.app/A': b'\xcf\xfa\xed\xfe' + bytes(range(256)) * 64,
+    'Payload/A.app/Info.plist': b'<plist></plist>' * 100,
+    'Payload/A.app/icon@3x.png': b'\x89PNG' + b'\x01' * 3000,
+}
+
+class NoValidatorHandler(RangeRequestHandler):
+    """不返回ETag和Last-Modified的服务器"""
+
+    def send_header(self, keyword, value):
+        if keyword.lower() not in ('etag', 'last-modified'):
+            super().send_header(keyword, value)
+
+def write_ipa(ipa_path, files, compression=zipfile.ZIP_DEFLATED):
+    with zipfile.ZipFile(ipa_path, 'w', compression) as zip_file:
+        for file_path, data in files.items():
+            zip_file.writestr(file_path, data)
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv(remote_ipa.BLOCK_CACHE_ENV, str(tmp_path / 'blocks'))
+    monkeypatch.setattr(remote_ipa, '_remote_info', {})
+
+def start_server(directory, handler_class=RangeRequestHandler):
+    server = make_server(str(directory), 0, handler_class)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+@pytest.fixture
+def served(tmp_path):
+    root = tmp_path / 'www'
+    root.mkdir()
+    write_ipa(root / 'app.ipa', FILES)
+    server, base_url = start_server(root)
+    yield root, f'{base_url}/app.ipa'
+    server.shutdown()
+    server.server_close()
+
+def test_remote_central_directory_matches_local(served):
+    root, url = served
+    with central_directory(root / 'app.ipa') as entries:
+        local = list(entries)
+    with remote_central_directory(url) as entries:
+        remote = list(entries)
+    assert remote == local
+
+def test_scan_remote_ipa_matches_local(served):
+    root, url = served
+    local_table, local_size, local_compressed = scan_ipa_entries(str(root / 'app.ipa'))
+    remote_table, remote_size, remote_compressed = scan_ipa_entries(url)
+    assert list(remote_table.paths) == list(local_table.paths)
+    assert list(remote_table.crcs) == list(local_table.crcs)
+    assert (remote_size, remote_compressed) == (local_size, local_compressed)
+
+def test_members_are_read_from_disk_cache(served, tmp_path):
+    _, url = served
+    with RangeFile(url, cache_dir=tmp_path / 'cache') as range_file:
+        with zipfile.ZipFile(range_file) as zip_file:
+            assert zip_file.read('Payload/A.app/A') == FILES['Payload/A.app/A']
+        assert range_file.requests > 0
+    with RangeFile(url, cache_dir=tmp_path / 'cache') as range_file:
+        with zipfile.ZipFile(range_file) as zip_file:
+            assert zip_file.read('Payload/A.app/A') == FILES['Payload/A.app/A']
+        assert range_file.requests == 0
+
+def test_same_size_reupload_without_validator_is_not_served_stale(tmp_path):
+    root = tmp_path / 'www'
+    root.mkdir()
+    write_ipa(root / 'app.ipa', FILES, zipfile.ZIP_STORED)
+    server, base_url = start_server(root, NoValidatorHandler)
+    url = f'{base_url}/app.ipa'
+    try:
+        with RangeFile(url) as range_file:
+            assert range_file.validator == ''
+            assert zipfile.ZipFile(range_file).read('Payload/A.app/Info.plist') == FILES['Payload/A.app/Info.plist']
+
+        # 同一URL重新上传大小相同、内容不同的IPA
+        replaced = dict(FILES, **{'Payload/A.app/Info.plist': b'<PLIST></PLIST>' * 100})
+        write_ipa(root / 'app.ipa', replaced, zipfile.ZIP_STORED)
+        with RangeFile(url) as range_file:
+            assert range_file.requests == 0
+            data = zipfile.ZipFile(range_file).read('Payload/A.app/Info.plist')
+        assert data == replaced['Payload/A.app/Info.plist']
+    finally:
+        server.shutdown()
+        server.server_close()
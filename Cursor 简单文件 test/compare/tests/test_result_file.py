@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""对比模式的结果文件：分析失败时保留上一次的 result.txt"""
+
+import os
+import shutil
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+from size_budget import EXIT_ERROR
+
+SCRIPT_DIR = Path(__file__).resolve().parent.parent
+
+def write_ipa(ipa_path, files):
+    with zipfile.ZipFile(ipa_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for file_path, data in files.items():
+            zip_file.writestr(file_path, data)
+    return ipa_path
+
+def run_compare(script_dir, old_ipa, new_ipa):
+    # 清空PATH，完成后不会自动打开浏览器
+    result = subprocess.run([sys.executable, str(script_dir / 'compare_ipa.py'),
+                             '--old', str(old_ipa), '--new', str(new_ipa)],
+                            capture_output=True, text=True, encoding='utf-8', env={**os.environ, 'PATH': ''})
+    return result.returncode, result.stdout
+
+def test_failed_scan_keeps_previous_result(tmp_path):
+    # 报告写在脚本所在目录，复制一份脚本，避免改动仓库中的 result.txt
+    script_dir = tmp_path / 'compare'
+    script_dir.mkdir()
+    for module in SCRIPT_DIR.glob('*.py'):
+        shutil.copy(module, script_dir)
+
+    old_ipa = write_ipa(tmp_path / 'old.ipa', {'Payload/A.app/A': os.urandom(2000)})
+    new_ipa = write_ipa(tmp_path / 'new.ipa', {'Payload/A.app/A': os.urandom(3000)})
+    returncode, stdout = run_compare(script_dir, old_ipa, new_ipa)
+    assert returncode == 0, stdout
+    previous = (script_dir / 'result.txt').read_text(encoding='utf-8')
+    assert previous
+
+    bad_ipa = tmp_path / 'bad.ipa'
+    bad_ipa.write_bytes(new_ipa.read_bytes()[:100])
+    returncode, stdout = run_compare(script_dir, old_ipa, bad_ipa)
+    assert returncode == EXIT_ERROR, stdout
+    assert (script_dir / 'result.txt').read_text(encoding='utf-8') == previous
+    assert not list(script_dir.glob('result.txt.*.tmp'))
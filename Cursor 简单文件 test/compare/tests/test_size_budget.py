@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""体积预算门禁：预算解析、逐项检查和 --check 的退出码"""
+
+import json
+import os
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from compare_ipa import IPAScanError, framework_budget_category, scan_ipa_entries
+from size_budget import (EXIT_ERROR, EXIT_INVALID, EXIT_PASSED, EXIT_VIOLATED, BudgetError, SizeBudget,
+                         evaluate_budget, parse_size)
+
+COMPARE_IPA = Path(__file__).resolve().parent.parent / 'compare_ipa.py'
+
+def write_ipa(ipa_path, files):
+    with zipfile.ZipFile(ipa_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for file_path, data in files.items():
+            zip_file.writestr(file_path, data)
+    return ipa_path
+
+@pytest.fixture
+def builds(tmp_path):
+    old_ipa = write_ipa(tmp_path / 'old.ipa', {
+        'Payload/A.app/A': os.urandom(20000),
+        'Payload/A.app/Frameworks/Flutter.framework/Flutter': os.urandom(10000),
+    })
+    new_ipa = write_ipa(tmp_path / 'new.ipa', {
+        'Payload/A.app/A': os.urandom(20000),
+        'Payload/A.app/Frameworks/Flutter.framework/Flutter': os.urandom(30000),
+        'Payload/A.app/icon@3x.png': os.urandom(5000),
+    })
+    return old_ipa, new_ipa
+
+def run_check(tmp_path, budget, old_ipa, new_ipa):
+    budget_path = tmp_path / 'budget.json'
+    budget_path.write_text(budget if isinstance(budget, str) else json.dumps(budget), encoding='utf-8')
+    result = subprocess.run([sys.executable, str(COMPARE_IPA), '--check', str(budget_path),
+                             '--old', str(old_ipa), '--new', str(new_ipa)],
+                            capture_output=True, text=True, encoding='utf-8')
+    return result.returncode, result.stdout
+
+def test_parse_size():
+    assert parse_size(1500) == 1500
+    assert parse_size('500KB') == 500 * 1000
+    assert parse_size('1.5 MB') == 1500 * 1000
+    assert parse_size('-2kb') == -2000
+    with pytest.raises(BudgetError):
+        parse_size('1XB')
+
+def test_unknown_limit_is_rejected():
+    with pytest.raises(BudgetError):
+        SizeBudget({'total': {'max_sise': 1}})
+
+def test_wildcard_applies_to_unconfigured_targets():
+    budget = SizeBudget({
+        'categories': {'图片资源': {'max_delta': 100}, '*': {'max_delta': 0}},
+        'frameworks': {'Flutter': {'max_size': 50}},
+    })
+    summary = {
+        'total': (0, 0, 0, 0),
+        'categories': {'图片资源': (0, 80, 0, 80), '配置文件': (10, 20, 10, 20)},
+        'frameworks': {framework_budget_category('Flutter'): (40, 60, 40, 60)},
+    }
+    checks, missing = evaluate_budget(budget, summary, framework_budget_category)
+    failed = {(check['name'], check['limit_key']) for check in checks if not check['passed']}
+    assert failed == {('配置文件', 'max_delta'), ('Framework - Flutter.framework', 'max_size')}
+    assert missing == []
+
+def test_check_passes(tmp_path, builds):
+    returncode, stdout = run_check(tmp_path, {'total': {'max_delta': '1MB'}}, *builds)
+    assert returncode == EXIT_PASSED, stdout
+
+def test_check_reports_violations(tmp_path, builds):
+    returncode, stdout = run_check(tmp_path, {'frameworks': {'Flutter': {'max_uncompressed_delta': '10KB'}}},
+                                   *builds)
+    assert returncode == EXIT_VIOLATED, stdout
+    assert 'Framework - Flutter.framework' in stdout
+
+def test_invalid_budget(tmp_path, builds):
+    returncode, stdout = run_check(tmp_path, '{"total": ', *builds)
+    assert returncode == EXIT_INVALID, stdout
+
+@pytest.mark.parametrize('corrupt', ['truncated', 'random'])
+def test_corrupt_ipa_fails_the_gate(tmp_path, builds, corrupt):
+    old_ipa, new_ipa = builds
+    bad_ipa = tmp_path / 'bad.ipa'
+    data = new_ipa.read_bytes()
+    bad_ipa.write_bytes(data[:len(data) // 2] if corrupt == 'truncated' else os.urandom(len(data)))
+    with pytest.raises(IPAScanError):
+        scan_ipa_entries(str(bad_ipa))
+    returncode, stdout = run_check(tmp_path, {'total': {'max_delta': '1MB'}}, old_ipa, bad_ipa)
+    assert returncode == EXIT_ERROR, stdout
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""有界堆选择：结果与完整排序一致，路径作为最后的比较项时与插入顺序无关"""
+
+import random
+
+from compare_ipa import TopKSelector
+
+def select(items, k):
+    selector = TopKSelector(k)
+    for key, item in items:
+        selector.push(key, item)
+    return selector.results()
+
+def test_matches_full_sort():
+    rng = random.Random(0)
+    items = [((rng.randint(1, 5), -rng.randint(0, 50)), index) for index in range(500)]
+    for k in (0, 1, 7, 500, 600):
+        expected = [item for _, item in sorted(items, key=lambda pair: pair[0])][:k]
+        assert select(items, k) == expected
+
+def test_path_tie_break_is_order_independent():
+    rng = random.Random(1)
+    items = [((4, 0, f'Payload/A.app/icon_{index}@3x.png'), index) for index in range(100)]
+    expected = select(items, 10)
+    for _ in range(5):
+        rng.shuffle(items)
+        assert select(items, 10) == expected
+    assert expected == [item for _, item in sorted(items)][:10]
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""趋势模式的退出码：输入错误时返回 EXIT_ERROR"""
+
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+from compare_ipa import parse_args, run_trend
+from size_budget import EXIT_ERROR, EXIT_PASSED
+
+COMPARE_IPA = Path(__file__).resolve().parent.parent / 'compare_ipa.py'
+
+def write_ipa(ipa_path, files):
+    with zipfile.ZipFile(ipa_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for file_path, data in files.items():
+            zip_file.writestr(file_path, data)
+    return ipa_path
+
+def run_trend_command(*inputs):
+    result = subprocess.run([sys.executable, str(COMPARE_IPA), '--trend', *map(str, inputs)],
+                            capture_output=True, text=True, encoding='utf-8')
+    return result.returncode, result.stdout
+
+def test_missing_ipa(tmp_path):
+    old_ipa = write_ipa(tmp_path / 'old.ipa', {'Payload/A.app/A': b'a' * 100})
+    returncode, stdout = run_trend_command(old_ipa, tmp_path / 'nope.ipa')
+    assert returncode == EXIT_ERROR, stdout
+    assert '找不到IPA文件' in stdout
+
+def test_single_build(tmp_path):
+    old_ipa = write_ipa(tmp_path / 'old.ipa', {'Payload/A.app/A': b'a' * 100})
+    returncode, stdout = run_trend_command(old_ipa)
+    assert returncode == EXIT_ERROR, stdout
+    assert '至少需要2个IPA文件' in stdout
+
+def test_report_generated(tmp_path):
+    builds = [write_ipa(tmp_path / f'{index}.ipa', {'Payload/A.app/A': b'a' * (100 * index)})
+              for index in (1, 2, 3)]
+    output_dir = tmp_path / 'out'
+    output_dir.mkdir()
+    assert run_trend(parse_args(['--trend', *map(str, builds)]), output_dir) == EXIT_PASSED
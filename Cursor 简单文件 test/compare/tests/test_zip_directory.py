@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""中央目录读取器：与 zipfile.ZipFile.infolist() 的结果逐项对照"""
+
+import struct
+import warnings
+import zipfile
+import zlib
+
+import pytest
+
+from zip_directory import CENTRAL_HEADER, EOCD, ZIP64_EXTRA_ID, ZIP64_LIMIT, ZipDirectoryError, central_directory
+
+def read_entries(zip_path):
+    with central_directory(str(zip_path)) as entries:
+        return list(entries)
+
+def zipfile_entries(zip_path):
+    """zipfile 读取的条目，跳过目录，字段顺序与 iter_central_directory 一致"""
+    with zipfile.ZipFile(zip_path) as zip_file:
+        return [(info.filename, info.file_size, info.compress_size, info.CRC, info.compress_type)
+                for info in zip_file.infolist() if not info.is_dir()]
+
+def assert_matches_zipfile(zip_path):
+    entries = read_entries(zip_path)
+    assert entries == zipfile_entries(zip_path)
+    return entries
+
+def write_zip(zip_path, files, comment=b''):
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for file_path, data in files:
+            zip_file.writestr(file_path, data)
+        zip_file.comment = comment
+    return zip_path
+
+def test_utf8_names(tmp_path):
+    zip_path = write_zip(tmp_path / 'a.zip', [
+        ('Payload/A.app/zh-Hans.lproj/本地化.strings', b'"a" = "b";'),
+        ('Payload/A.app/émoji 🎉.png', b'\x89PNG' * 100),
+    ])
+    names = [entry[0] for entry in assert_matches_zipfile(zip_path)]
+    assert names == ['Payload/A.app/zh-Hans.lproj/本地化.strings', 'Payload/A.app/émoji 🎉.png']
+
+def test_cp437_names(tmp_path):
+    # zipfile 只为非ASCII文件名写UTF-8标志：先写入同样长度的ASCII占位名，再替换为cp437编码的字节
+    zip_path = write_zip(tmp_path / 'a.zip', [('Payload/A.app/caf?.txt', b'coffee' * 50)])
+    data = zip_path.read_bytes().replace(b'caf?.txt', 'café.txt'.encode('cp437'))
+    zip_path.write_bytes(data)
+    entries = assert_matches_zipfile(zip_path)
+    assert entries[0][0] == 'Payload/A.app/café.txt'
+
+def test_directory_entries_are_skipped(tmp_path):
+    zip_path = tmp_path / 'a.zip'
+    with zipfile.ZipFile(zip_path, 'w') as zip_file:
+        zip_file.writestr('Payload/', b'')
+        zip_file.writestr('Payload/A.app/', b'')
+        zip_file.writestr('Payload/A.app/A', b'binary')
+    assert [entry[0] for entry in assert_matches_zipfile(zip_path)] == ['Payload/A.app/A']
+
+def test_archive_comment(tmp_path):
+    zip_path = write_zip(tmp_path / 'a.zip', [('Payload/A.app/A', b'binary' * 100)],
+                         comment=b'built by CI #42\n' * 100)
+    assert len(assert_matches_zipfile(zip_path)) == 1
+
+def test_duplicate_names(tmp_path):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        zip_path = write_zip(tmp_path / 'a.zip', [('Payload/A.app/A', b'first'), ('Payload/A.app/A', b'second!')])
+    entries = assert_matches_zipfile(zip_path)
+    assert [entry[1] for entry in entries] == [5, 7]
+
+def test_prefixed_archive(tmp_path):
+    # 前面拼接了其他数据（如自解压程序），偏移需要按EOCD位置反推
+    zip_path = write_zip(tmp_path / 'a.zip', [('Payload/A.app/A', b'binary' * 100)])
+    zip_path.write_bytes(b'#!/bin/sh\n' * 30 + zip_path.read_bytes())
+    assert len(assert_matches_zipfile(zip_path)) == 1
+
+def test_zip64_entry_count(tmp_path):
+    # 超过65535个条目时 zipfile 写入ZIP64 EOCD
+    zip_path = tmp_path / 'many.zip'
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_STORED) as zip_file:
+        for index in range(0x10000 + 10):
+            zip_file.writestr(f'Payload/A.app/{index}', b'')
+    entries = assert_matches_zipfile(zip_path)
+    assert len(entries) == 0x10000 + 10
+
+def build_zip64_sizes_zip(entries):
+    """手工构造的压缩包：中央目录记录头中的大小为0xFFFFFFFF，实际大小写在ZIP64扩展字段中
+
+    entries为 [(文件名, 内容)]，均以STORED方式保存
+    """
+    local = b''
+    directory = b''
+    for file_path, data in entries:
+        name = file_path.encode('ascii')
+        crc = zlib.crc32(data)
+        offset = len(local)
+        local += struct.pack('<4s5H3I2H', b'PK\x03\x04', 45, 0, 0, 0, 0, crc, len(data), len(data), len(name), 0)
+        local += name + data
+        extra = struct.pack('<HHQQ', ZIP64_EXTRA_ID, 16, len(data), len(data))
+        directory += CENTRAL_HEADER.pack(b'PK\x01\x02', 45, 45, 0, 0, 0, 0, crc, ZIP64_LIMIT, ZIP64_LIMIT,
+                                         len(name), len(extra), 0, 0, 0, 0, offset)
+        directory += name + extra
+    eocd = EOCD.pack(b'PK\x05\x06', 0, 0, len(entries), len(entries), len(directory), len(local), 0)
+    return local + directory + eocd
+
+def test_zip64_sizes(tmp_path):
+    zip_path = tmp_path / 'sizes.zip'
+    zip_path.write_bytes(build_zip64_sizes_zip([('Payload/A.app/A', b'binary' * 100), ('Payload/A.app/B', b'b')]))
+    entries = assert_matches_zipfile(zip_path)
+    assert [(entry[0], entry[1], entry[2]) for entry in entries] == [('Payload/A.app/A', 600, 600),
+                                                                      ('Payload/A.app/B', 1, 1)]
+
+def test_not_a_zip(tmp_path):
+    path = tmp_path / 'a.zip'
+    path.write_bytes(b'not a zip file' * 10)
+    with pytest.raises(ZipDirectoryError):
+        read_entries(path)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+只读取ZIP中央目录的快速读取器
+mmap打开压缩包，从文件末尾定位EOCD（或ZIP64 EOCD），按固定长度的记录头批量解码中央目录，
+只取出路径、大小、压缩后大小、CRC32和压缩方式，不为每个条目创建 ZipInfo 对象
+"""
+
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+
+EOCD_SIGNATURE = b'PK\x05\x06'
+EOCD64_LOCATOR_SIGNATURE = b'PK\x06\x07'
+EOCD64_SIGNATURE = b'PK\x06\x06'
+CENTRAL_HEADER_SIGNATURE = b'PK\x01\x02'
+
+# EOCD：signature, disk, cd_disk, disk_entries, total_entries, cd_size, cd_offset, comment_length
+EOCD = struct.Struct('<4s4H2IH')
+# ZIP64 EOCD定位记录：signature, eocd64_disk, eocd64_offset, total_disks
+EOCD64_LOCATOR = struct.Struct('<4sIQI')
+# ZIP64 EOCD：signature, record_size, version_made, version_needed, disk, cd_disk,
+#             disk_entries, total_entries, cd_size, cd_offset
+EOCD64 = struct.Struct('<4sQ2H2I4Q')
+# 中央目录记录头：signature, version_made, version_needed, flags, method, time, date,
+#                 crc, compressed_size, file_size, name_length, extra_length, comment_length,
+#                 disk, internal_attr, external_attr, local_header_offset
+CENTRAL_HEADER = struct.Struct('<4s6H3I5H2I')
+
+ZIP64_EXTRA_ID = 0x0001
+ZIP64_LIMIT = 0xFFFFFFFF
+# 通用标志位第11位：文件名为UTF-8编码
+FLAG_UTF8 = 0x800
+# EOCD记录(22字节) + 最长65535字节的注释
+EOCD_SEARCH_SIZE = EOCD.size + 0xFFFF
+
+class ZipDirectoryError(Exception):
+    """中央目录格式错误或不支持"""
+
+def locate_central_directory(buffer):
+    """定位中央目录
+
+    与 zipfile 相同，按EOCD（或ZIP64 EOCD）所在位置反推中央目录的实际起点，
+    兼容前面拼接了其他数据的压缩包
+
+    Returns:
+        (中央目录起始偏移, 中央目录大小)
+    """
+    start, cd_size = directory_span(buffer)
+    if start < 0:
+        raise ZipDirectoryError("中央目录越界")
+    return start, cd_size
+
+def directory_span(buffer):
+    """在文件尾部的数据中定位中央目录
+
+    buffer可以只是文件末尾的一段（如远程文件先读取的尾部），此时返回的起始偏移可能为负数，
+    表示还需要向前多读取的字节数
+
+    Returns:
+        (中央目录相对buffer的起始偏移, 中央目录大小)
+    """
+    size = len(buffer)
+    search_start = max(0, size - EOCD_SEARCH_SIZE)
+    eocd_pos = buffer.rfind(EOCD_SIGNATURE, search_start)
+    if eocd_pos == -1 or eocd_pos + EOCD.size > size:
+        raise ZipDirectoryError("找不到EOCD记录")
+    _, _, _, _, _, cd_size, _, _ = EOCD.unpack_from(buffer, eocd_pos)
+    directory_end = eocd_pos
+
+    locator_pos = eocd_pos - EOCD64_LOCATOR.size
+    if locator_pos >= 0 and buffer[locator_pos:locator_pos + 4] == EOCD64_LOCATOR_SIGNATURE:
+        eocd64_pos = locator_pos - EOCD64.size
+        if eocd64_pos < 0 or buffer[eocd64_pos:eocd64_pos + 4] != EOCD64_SIGNATURE:
+            raise ZipDirectoryError("ZIP64 EOCD记录损坏")
+        cd_size = EOCD64.unpack_from(buffer, eocd64_pos)[8]
+        directory_end = eocd64_pos
+
+    return directory_end - cd_size, cd_size
+
+def _zip64_sizes(extra, file_size, compressed_size):
+    """从ZIP64扩展字段中读取超出4GB的大小，字段只包含记录头中为0xFFFFFFFF的值"""
+    offset = 0
+    while offset + 4 <= len(extra):
+        header_id, data_size = struct.unpack_from('<HH', extra, offset)
+        offset += 4
+        if header_id == ZIP64_EXTRA_ID:
+            position = offset
+            if file_size == ZIP64_LIMIT:
+                file_size = struct.unpack_from('<Q', extra, position)[0]
+                position += 8
+            if compressed_size == ZIP64_LIMIT:
+                compressed_size = struct.unpack_from('<Q', extra, position)[0]
+            return file_size, compressed_size
+        offset += data_size
+    raise ZipDirectoryError("缺少ZIP64扩展字段")
+
+def iter_central_directory(buffer):
+    """逐条解码中央目录（跳过目录条目）
+
+    记录头为固定的46字节，直接在buffer上 unpack_from；文件名按 zipfile 的规则解码（UTF-8标志或cp437）
+
+    Yields:
+        (file_path, 解压后大小, 压缩后大小, CRC32, 压缩方式)
+    """
+    start, cd_size = locate_central_directory(buffer)
+    end = start + cd_size
+    header_size = CENTRAL_HEADER.size
+    unpack_header = CENTRAL_HEADER.unpack_from
+    offset = start
+    while offset < end:
+        if offset + header_size > end:
+            raise ZipDirectoryError("中央目录记录被截断")
+        (signature, _, _, flags, method, _, _, crc, compressed_size, file_size,
+         name_length, extra_length, comment_length, _, _, _, _) = unpack_header(buffer, offset)
+        if signature != CENTRAL_HEADER_SIGNATURE:
+            raise ZipDirectoryError(f"无效的中央目录记录: 偏移 {offset}")
+        name_start = offset + header_size
+        extra_start = name_start + name_length
+        offset = extra_start + extra_length + comment_length
+        if offset > end:
+            raise ZipDirectoryError("中央目录记录越界")
+
+        raw_name = buffer[name_start:extra_start]
+        file_path = raw_name.decode('utf-8' if flags & FLAG_UTF8 else 'cp437')
+        # 与 ZipInfo 一致：文件名在第一个空字符处截断
+        null_pos = file_path.find('\0')
+        if null_pos >= 0:
+            file_path = file_path[:null_pos]
+        if file_path.endswith('/'):
+            continue
+        if file_size == ZIP64_LIMIT or compressed_size == ZIP64_LIMIT:
+            file_size, compressed_size = _zip64_sizes(buffer[extra_start:extra_start + extra_length],
+                                                      file_size, compressed_size)
+        yield file_path, file_size, compressed_size, crc, method
+
+@contextmanager
+def central_directory(zip_path):
+    """mmap打开压缩包，返回中央目录条目的迭代器（见 iter_central_directory）
+
+    定位失败时在进入with之前抛出 ZipDirectoryError，调用方可以回退到 zipfile
+    """
+    with open(zip_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ZipDirectoryError("空文件")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            locate_central_directory(buffer)
+            yield iter_central_directory(buffer)